@@ -0,0 +1,65 @@
+"""Benchmark mesin AQI tervektorisasi vs implementasi per baris.
+
+    python benchmarks/bench_aqi.py [--repeat 5] [--rowwise-sample 20000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dashboard"))
+
+from aqi import POLLUTANTS, STANDARDS, add_aqi_columns, compute_aqi, sub_index  # noqa: E402
+from ingest import raw_files  # noqa: E402
+
+
+def rowwise_aqi(row, standard):
+    # Referensi naif: loop Python per baris dan per polutan
+    best = np.nan
+    for p in POLLUTANTS:
+        value = row[p]
+        if pd.isna(value):
+            continue
+        sub = sub_index([value], p, standard)[0]
+        best = sub if np.isnan(best) else max(best, sub)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--rowwise-sample", type=int, default=20_000)
+    args = parser.parse_args()
+
+    df = pd.concat([pd.read_csv(p, usecols=POLLUTANTS) for p in raw_files()], ignore_index=True)
+    print(f"{len(df)} baris, {len(POLLUTANTS)} polutan")
+
+    for standard in STANDARDS:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            compute_aqi(df, standard)
+            timings.append(time.perf_counter() - start)
+        print(f"vectorized {standard}: best {min(timings) * 1000:.1f} ms, "
+              f"median {np.median(timings) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    add_aqi_columns(df.copy())
+    print(f"add_aqi_columns (US + CN): {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    sample = df.head(args.rowwise_sample)
+    start = time.perf_counter()
+    expected = sample.apply(rowwise_aqi, axis=1, standard="US")
+    elapsed = time.perf_counter() - start
+    print(f"row-wise US pada {len(sample)} baris: {elapsed:.2f} s "
+          f"(estimasi {elapsed * len(df) / len(sample):.1f} s untuk seluruh data)")
+
+    vectorized, _ = compute_aqi(sample, "US")
+    assert np.allclose(vectorized, expected, equal_nan=True), "hasil vectorized != row-wise"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""Benchmark jalur panas dashboard (load, filter, agregasi, figure) tanpa Streamlit.
+
+Dataset sintetis dibuat dengan mereplikasi data PRSA bawaan (12 stasiun) sebanyak
+N kali sebagai stasiun baru, lalu setiap langkah diukur: waktu (median & terbaik
+dari beberapa ulangan), memori puncak (tracemalloc, satu run terpisah agar tidak
+memengaruhi waktu) dan ukuran payload JSON per chart.
+
+    python benchmarks/bench_dashboard.py [--scales 1,10,50] [--repeat 3]
+    python benchmarks/bench_dashboard.py --compare benchmarks/results/<file>.json
+
+Hasil disimpan sebagai JSON di benchmarks/results/ agar bisa dibandingkan antar
+revisi; dengan --compare, langkah yang melambat lebih dari --threshold dicetak
+dan exit code bernilai 1.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "dashboard"))
+
+from cube import cube_exists, load_cube, merge_cubes, save_cube  # noqa: E402
+from dataset import Dataset  # noqa: E402
+from exposure import daily_exposure  # noqa: E402
+from figure_cache import FigureCache, to_figure  # noqa: E402
+from sketches import SKETCH_SPECS, load_sketch, save_sketches  # noqa: E402
+from spatial import IdwGrid, StationHours, StationIndex  # noqa: E402
+from storage import STORE_DIR, append_arrow_segment, new_version, open_arrow, to_compact, write_manifest  # noqa: E402
+from views import CHARTS, FEATURE_NAMES, STATION_COORDINATES, VIEW_CHARTS, ViewContext, build_view, view_charts  # noqa: E402
+
+SYNTHETIC_DIR = os.path.join(BENCH_DIR, ".synthetic")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+# Agregasi yang dipakai tab dashboard: (by, features); None = fitur terpilih
+AGGREGATIONS = [
+    ("hour", None), ("day", None), ("month", None), ("year", None),
+    ("station", None), (["station", "year"], None), (["season", "year"], None),
+    (["season", "station"], None), ("season", ["TEMP", "DEWP", "WSPM"]), ("season", "PRES"),
+    ("station", ["TEMP", "DEWP", "WSPM"]), ("station", "PRES"),
+]
+
+
+def _aggregation_name(by, features):
+    name = by if isinstance(by, str) else "+".join(by)
+    if features is not None:
+        name += ":" + (features if isinstance(features, str) else "+".join(features))
+    return name
+
+
+def _replica_name(station, k):
+    return station if k == 0 else f"{station}-{k:02d}"
+
+
+def _rename_stations(frame, k):
+    frame = frame.copy()
+    frame["station"] = frame["station"].astype(str).map(lambda s: _replica_name(s, k))
+    return frame
+
+
+def build_synthetic_store(scale, source=STORE_DIR, rebuild=False):
+    """Store berisi `scale` replika data bawaan (Arrow per replika, cube & sketch)."""
+    root = os.path.join(SYNTHETIC_DIR, f"x{scale}")
+    # Store lama tanpa cuboid terbaru dibangun ulang otomatis
+    if os.path.exists(root) and cube_exists(root) and not rebuild:
+        return root
+    shutil.rmtree(root, ignore_errors=True)
+    os.makedirs(root)
+
+    base = Dataset.open(source).table
+    token = new_version()
+    write_manifest({
+        "segments": [], "last_datetime": {},
+        "versions": {"dataset": token, "cube": token, "sketch_base": token, "sketch": {}},
+    }, root)
+    manifest = None
+    for k in range(scale):
+        station = base["station"].combine_chunks()
+        names = [_replica_name(s, k) for s in station.dictionary.to_pylist()]
+        renamed = station.__class__.from_arrays(station.indices, names)
+        table = base.set_column(base.schema.get_field_index("station"), "station", renamed)
+        # Tiap replika menjadi satu segmen Arrow; tidak perlu kompaksi seluruh store
+        manifest = append_arrow_segment(table, root)
+        write_manifest(manifest, root)
+
+    # Replika identik: cube & sketch cukup diganti nama stasiunnya
+    cube = load_cube(source)
+    save_cube(merge_cubes([{name: _rename_stations(f, k) for name, f in cube.items()} for k in range(scale)]), root)
+    sketches = {}
+    for f in SKETCH_SPECS:
+        sketch = load_sketch(f, source)
+        sketches[f] = to_compact(pd.concat([_rename_stations(sketch, k) for k in range(scale)], ignore_index=True))
+    save_sketches(sketches, root)
+    return root
+
+
+def measure(func, repeat):
+    """Median & waktu terbaik (ms), memori puncak (MB) dan hasil run terakhir."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {
+        "median_ms": round(statistics.median(timings), 3),
+        "best_ms": round(min(timings), 3),
+        "peak_mb": round(peak / 2**20, 3),
+    }
+
+
+def scenarios(dataset):
+    """Kombinasi filter yang mewakili jalur berbeda (cube, satu stasiun, rentang tanggal)."""
+    start, end = (pd.Timestamp(t) for t in dataset.time_range)
+    return {
+        "all": dict(),
+        "station": dict(station=dataset.stations[0]),
+        "seasons": dict(seasons=["Winter", "Summer"]),
+        "date": dict(start=end - pd.Timedelta(days=90), end=end + pd.Timedelta(hours=1)),
+    }
+
+
+def _frame_mb(ctx, columns=None):
+    """Perkiraan ukuran DataFrame hasil filter (MB) tanpa membuatnya."""
+    rows = ctx.dataset.rows(ctx.seasons, ctx.station, ctx.start, ctx.end)
+    n_rows = rows.stop - rows.start if isinstance(rows, slice) else len(rows)
+    table = ctx.dataset.table.select(columns or ctx.dataset.columns)
+    return n_rows * table.nbytes / max(ctx.dataset.num_rows, 1) / 2**20
+
+
+def bench_scale(root, scale, feature, repeat, max_frame_mb):
+    results = []
+
+    def record(group, name, scenario, stats, **extra):
+        results.append({"group": group, "name": name, "scenario": scenario, **stats, **extra})
+        payload = f" {extra['payload_bytes']:>10,} B" if "payload_bytes" in extra else ""
+        print(f"  {group:<10} {name:<24} {scenario:<8} {stats['median_ms']:>10.1f} ms "
+              f"{stats['peak_mb']:>9.1f} MB{payload}")
+
+    # Store sintetis hanya berisi segmen Arrow (tanpa Parquet), jadi dibuka langsung
+    dataset, stats = measure(lambda: Dataset(open_arrow(root)), repeat)
+    record("load", "dataset", "-", stats, rows=dataset.num_rows)
+    cube, stats = measure(lambda: load_cube(root), repeat)
+    record("load", "cube", "-", stats)
+    sketch_cache = {}
+
+    def cached_sketch(f):
+        if f not in sketch_cache:
+            sketch_cache[f] = load_sketch(f, root)
+        return sketch_cache[f]
+
+    _, stats = measure(lambda: load_sketch(feature, root), repeat)
+    record("load", "sketch", "-", stats)
+    # Konversi kolom ke NumPy terjadi sekali per proses; ukur pada dataset segar
+    _, stats = measure(lambda: Dataset(open_arrow(root)).array(feature), repeat)
+    record("load", "dataset+column", "-", stats)
+    # Tabel harian paparan dihitung ulang setiap kali versi dataset berubah
+    exposure, stats = measure(lambda: daily_exposure(dataset), repeat)
+    record("load", "exposure", "-", stats)
+
+    # Koordinat replika = koordinat stasiun asal agar chart peta memuat semua titik
+    for name in dataset.stations:
+        STATION_COORDINATES.setdefault(name, STATION_COORDINATES.get(name.rsplit("-", 1)[0]))
+    # Registry berisi semua stasiun (asli & replika) untuk indeks spasial & grid IDW
+    registry = pd.DataFrame(
+        [(name, *STATION_COORDINATES[name]) for name in dataset.stations], columns=["station", "lat", "lon"]
+    )
+    grid, stats = measure(lambda: IdwGrid(StationIndex(registry)), repeat)
+    record("load", "idw_grid", "-", stats, stations=len(registry))
+    station_hours, stats = measure(lambda: StationHours(dataset, feature, grid.stations), repeat)
+    record("load", "station_hours", "-", stats)
+    # Satu langkah geser jam: ambil baris matriks jam × stasiun + satu perkalian W @ v
+    hour = station_hours.start + (station_hours.end - station_hours.start) // 2
+    _, stats = measure(lambda: grid.evaluate(station_hours.at(hour)), repeat)
+    record("aggregate", "idw_hour", "-", stats)
+
+    cache = FigureCache()
+    for scenario, filters in scenarios(dataset).items():
+        def new_ctx():
+            return ViewContext(dataset, cube, cached_sketch, feature, load_exposure=lambda: exposure, spatial=grid,
+                               load_hours=lambda f: station_hours, **filters)
+
+        # Semua kolom pada skala besar bisa melebihi RAM mesin benchmark
+        if _frame_mb(new_ctx()) <= max_frame_mb:
+            _, stats = measure(lambda: new_ctx().filter_data(), repeat)
+            record("filter", "all_columns", scenario, stats)
+        else:
+            print(f"  filter     all_columns              {scenario:<8} dilewati (> {max_frame_mb} MB)")
+        _, stats = measure(lambda: new_ctx().filter_data(["datetime", feature]), repeat)
+        record("filter", "datetime+feature", scenario, stats)
+
+        for by, features in AGGREGATIONS:
+            # Context baru tiap ulangan: agregat di-memo per context
+            _, stats = measure(lambda: new_ctx().aggregate(by, features), repeat)
+            record("aggregate", _aggregation_name(by, features), scenario, stats)
+
+        _, stats = measure(lambda: new_ctx().box_stats(), repeat)
+        record("aggregate", "box_stats", scenario, stats)
+
+        # Figure dibangun dari context yang agregatnya sudah hangat, jadi waktu
+        # "figure" hanya mencakup konstruksi Plotly; serialisasi diukur terpisah
+        ctx = new_ctx()
+        for chart in dict.fromkeys(c for view in VIEW_CHARTS for c in view_charts(view, ctx)):
+            build = CHARTS[chart]
+            build(ctx)
+            fig, stats = measure(lambda: build(ctx), repeat)
+            record("figure", chart, scenario, stats)
+            payload, stats = measure(fig.to_json, repeat)
+            record("serialize", chart, scenario, stats, payload_bytes=len(payload.encode()))
+            # Jalur cache hit: payload JSON -> figure -> spec yang dikirim Streamlit
+            cache.put(ctx.cache_key(chart), payload)
+            _, stats = measure(lambda: to_figure(cache.get_or_build(ctx.cache_key(chart), fig.to_json)).to_json(),
+                               repeat)
+            record("cache_hit", chart, scenario, stats)
+
+        # Biaya satu interaksi: hanya view aktif yang dihitung (agregat dingin)
+        for view in VIEW_CHARTS:
+            _, stats = measure(lambda: build_view(view, new_ctx()), repeat)
+            record("view", view, scenario, stats)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _key(row, scale):
+    return (scale, row["group"], row["name"], row["scenario"])
+
+
+def compare(current, baseline, threshold, min_delta_ms):
+    """Cetak langkah yang melambat > threshold (dan > min_delta_ms) dibanding baseline.
+
+    Mengembalikan jumlah regresi.
+    """
+    base = {_key(r, s): r for s, entry in baseline["scales"].items() for r in entry["results"]}
+    regressions = 0
+    print(f"\nDibandingkan dengan {baseline['revision']} ({baseline['timestamp']}):")
+    for scale, entry in current["scales"].items():
+        for row in entry["results"]:
+            old = base.get(_key(row, scale))
+            if old is None or old["median_ms"] <= 0:
+                continue
+            ratio = row["median_ms"] / old["median_ms"]
+            if ratio > 1 + threshold and row["median_ms"] - old["median_ms"] > min_delta_ms:
+                regressions += 1
+                print(f"  REGRESI x{scale} {row['group']}/{row['name']}/{row['scenario']}: "
+                      f"{old['median_ms']:.1f} -> {row['median_ms']:.1f} ms ({ratio:.2f}x)")
+    if not regressions:
+        print("  tidak ada regresi")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", default="1,10,50",
+                        help="Kelipatan data bawaan yang diuji, dipisah koma")
+    parser.add_argument("--feature", default="AQI_True", choices=list(FEATURE_NAMES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--rebuild", action="store_true", help="Bangun ulang store sintetis")
+    parser.add_argument("--output", help="Path file hasil (default: benchmarks/results/<rev>-<waktu>.json)")
+    parser.add_argument("--compare", help="File hasil sebelumnya sebagai baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Perlambatan relatif yang dianggap regresi (default 0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0,
+                        help="Selisih absolut minimum agar dianggap regresi (meredam noise)")
+    parser.add_argument("--max-frame-mb", type=float, default=1500,
+                        help="Lewati filter semua kolom jika hasilnya diperkirakan lebih besar")
+    args = parser.parse_args()
+
+    timestamp = datetime.datetime.now().strftime("%Y%m%dT%H%M%S")
+    report = {
+        "revision": git_revision(), "timestamp": timestamp,
+        "python": platform.python_version(), "platform": platform.platform(),
+        "feature": args.feature, "repeat": args.repeat, "scales": {},
+    }
+    for scale in (int(s) for s in args.scales.split(",")):
+        print(f"Skala x{scale}: menyiapkan store sintetis...")
+        root = build_synthetic_store(scale, rebuild=args.rebuild)
+        results = bench_scale(root, scale, args.feature, args.repeat, args.max_frame_mb)
+        report["scales"][str(scale)] = {"rows": results[0]["rows"], "results": results}
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['revision']}-{timestamp}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"Hasil disimpan ke {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold, args.min_delta_ms):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
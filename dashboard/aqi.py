@@ -0,0 +1,192 @@
+"""Mesin perhitungan AQI (US EPA & China HJ 633-2012) yang tervektorisasi.
+
+Semua sub-indeks dihitung per kolom dengan tabel breakpoint NumPy
+(np.searchsorted + interpolasi linear per segmen), tanpa apply per baris.
+Data PRSA berupa konsentrasi per jam, jadi setiap baris dievaluasi terhadap
+tabel breakpoint masing-masing standar memakai nilai per jam tersebut.
+"""
+import numpy as np
+import pandas as pd
+
+POLLUTANTS = ["PM2.5", "PM10", "SO2", "NO2", "CO", "O3"]
+STANDARDS = ("US", "CN")
+
+# Nama kolom hasil untuk tiap standar
+AQI_COLUMNS = {"US": "AQI_True", "CN": "AQI_CN"}
+DOMINANT_COLUMNS = {"US": "Dominant_Pollutant", "CN": "Dominant_Pollutant_CN"}
+
+# Data PRSA dalam ug/m3 (termasuk CO). EPA memakai ppb/ppm untuk gas
+# (konversi pada 25°C: ppb = ug/m3 * 24.45 / berat molekul), HJ 633
+# memakai ug/m3 kecuali CO dalam mg/m3.
+UNIT_FACTORS = {
+    "US": {
+        "PM2.5": 1.0,
+        "PM10": 1.0,
+        "SO2": 24.45 / 64.066,
+        "NO2": 24.45 / 46.0055,
+        "CO": 24.45 / 28.01 / 1000.0,  # ug/m3 -> ppm
+        "O3": 24.45 / 48.00,
+    },
+    "CN": {
+        "PM2.5": 1.0,
+        "PM10": 1.0,
+        "SO2": 1.0,
+        "NO2": 1.0,
+        "CO": 1.0 / 1000.0,  # ug/m3 -> mg/m3
+        "O3": 1.0,
+    },
+}
+
+# EPA memotong (truncate) konsentrasi ke jumlah desimal ini sebelum lookup
+US_DECIMALS = {"PM2.5": 1, "PM10": 0, "SO2": 0, "NO2": 0, "CO": 1, "O3": 0}
+
+# (C_low, C_high, I_low, I_high) per kategori. Untuk O3 dipakai tabel 8 jam
+# sampai 200 ppb (106-200 ppb -> 201-300) lalu tabel 1 jam di atasnya. Pada
+# 201-404 ppb indeks tabel 1 jam (<= 300) lebih kecil dari indeks 8 jam di
+# 200 ppb, sehingga nilai tertinggi keduanya (aturan EPA) adalah 300.
+US_BANDS = {
+    "PM2.5": [(0.0, 12.0, 0, 50), (12.1, 35.4, 51, 100), (35.5, 55.4, 101, 150),
+              (55.5, 150.4, 151, 200), (150.5, 250.4, 201, 300),
+              (250.5, 350.4, 301, 400), (350.5, 500.4, 401, 500)],
+    "PM10": [(0, 54, 0, 50), (55, 154, 51, 100), (155, 254, 101, 150),
+             (255, 354, 151, 200), (355, 424, 201, 300), (425, 504, 301, 400),
+             (505, 604, 401, 500)],
+    "SO2": [(0, 35, 0, 50), (36, 75, 51, 100), (76, 185, 101, 150),
+            (186, 304, 151, 200), (305, 604, 201, 300), (605, 804, 301, 400),
+            (805, 1004, 401, 500)],
+    "NO2": [(0, 53, 0, 50), (54, 100, 51, 100), (101, 360, 101, 150),
+            (361, 649, 151, 200), (650, 1249, 201, 300), (1250, 1649, 301, 400),
+            (1650, 2049, 401, 500)],
+    "CO": [(0.0, 4.4, 0, 50), (4.5, 9.4, 51, 100), (9.5, 12.4, 101, 150),
+           (12.5, 15.4, 151, 200), (15.5, 30.4, 201, 300), (30.5, 40.4, 301, 400),
+           (40.5, 50.4, 401, 500)],
+    "O3": [(0, 54, 0, 50), (55, 70, 51, 100), (71, 85, 101, 150),
+           (86, 105, 151, 200), (106, 200, 201, 300), (201, 404, 300, 300),
+           (405, 504, 301, 400), (505, 604, 401, 500)],
+}
+
+# HJ 633-2012: breakpoint kontinu untuk IAQI 0, 50, 100, 150, 200, 300, 400, 500.
+# SO2/NO2/CO/O3 memakai nilai 1 jam; SO2 1 jam hanya sampai 800 ug/m3, di
+# atasnya dilanjutkan dengan tabel 24 jam.
+CN_INDEX = [0, 50, 100, 150, 200, 300, 400, 500]
+CN_BREAKPOINTS = {
+    "PM2.5": [0, 35, 75, 115, 150, 250, 350, 500],
+    "PM10": [0, 50, 150, 250, 350, 420, 500, 600],
+    "SO2": [0, 150, 500, 650, 800, 1600, 2100, 2620],
+    "NO2": [0, 100, 200, 700, 1200, 2340, 3090, 3840],
+    "CO": [0, 5, 10, 35, 60, 90, 120, 150],
+    "O3": [0, 160, 200, 300, 400, 800, 1000, 1200],
+}
+
+# HJ 633-2012 tabel harian: SO2/NO2/CO rata-rata 24 jam, O3 maksimum rata-rata
+# 8 jam (tabel hanya sampai IAQI 300; di atasnya indeks dibatasi 300). PM sama
+# dengan tabel di atas. Tabel EPA sudah per periode rata-rata (PM 24 jam, O3/CO
+# 8 jam, SO2/NO2 1 jam) sehingga dipakai apa adanya untuk AQI harian.
+CN_DAILY_BREAKPOINTS = dict(
+    CN_BREAKPOINTS,
+    SO2=[0, 50, 150, 475, 800, 1600, 2100, 2620],
+    NO2=[0, 40, 80, 180, 280, 565, 750, 940],
+    CO=[0, 2, 4, 14, 24, 36, 48, 60],
+    O3=[0, 100, 160, 215, 265, 800],
+)
+
+# Level AQI untuk expander di dashboard
+AQI_LEVELS = {
+    "US": [
+        ("0-50", "Good"),
+        ("51-100", "Moderate"),
+        ("101-150", "Unhealthy for Sensitive Groups"),
+        ("151-200", "Unhealthy"),
+        ("201-300", "Very Unhealthy"),
+        ("301-500", "Hazardous"),
+    ],
+    "CN": [
+        ("0-50", "Excellent (优)"),
+        ("51-100", "Good (良)"),
+        ("101-150", "Lightly Polluted (轻度污染)"),
+        ("151-200", "Moderately Polluted (中度污染)"),
+        ("201-300", "Heavily Polluted (重度污染)"),
+        ("301-500", "Severely Polluted (严重污染)"),
+    ],
+}
+
+
+def _table(rows):
+    return tuple(np.asarray(col, dtype=float) for col in zip(*rows))
+
+
+def _cn_rows(breakpoints):
+    return [(breakpoints[i], breakpoints[i + 1], CN_INDEX[i], CN_INDEX[i + 1])
+            for i in range(len(breakpoints) - 1)]
+
+
+# Tabel dalam bentuk array kolom: (c_low, c_high, i_low, i_high)
+TABLES = {
+    "US": {p: _table(rows) for p, rows in US_BANDS.items()},
+    "CN": {p: _table(_cn_rows(bp)) for p, bp in CN_BREAKPOINTS.items()},
+}
+DAILY_TABLES = {
+    "US": TABLES["US"],
+    "CN": {p: _table(_cn_rows(bp)) for p, bp in CN_DAILY_BREAKPOINTS.items()},
+}
+
+
+def sub_index(values, pollutant, standard="US", daily=False):
+    """Sub-indeks (IAQI) satu polutan untuk seluruh kolom sekaligus.
+
+    `daily=True` memakai tabel harian (nilai rata-rata 24 jam / maksimum 8 jam).
+    """
+    if standard not in STANDARDS:
+        raise ValueError(f"Standar AQI tidak dikenal: {standard!r}")
+    conc = np.asarray(values, dtype=float) * UNIT_FACTORS[standard][pollutant]
+    conc = np.clip(conc, 0.0, None)
+    if standard == "US":
+        scale = 10.0 ** US_DECIMALS[pollutant]
+        # epsilon kecil agar 35.4 * 10 tidak terpotong menjadi 353
+        conc = np.floor(conc * scale + 1e-9) / scale
+
+    c_lo, c_hi, i_lo, i_hi = (DAILY_TABLES if daily else TABLES)[standard][pollutant]
+    band = np.searchsorted(c_hi, conc, side="left")
+    above = band >= len(c_hi)
+    band = np.minimum(band, len(c_hi) - 1)
+    result = (i_hi[band] - i_lo[band]) / (c_hi[band] - c_lo[band]) * (conc - c_lo[band]) + i_lo[band]
+    # Di atas breakpoint tertinggi indeks dibatasi 500
+    result[above] = i_hi[-1]
+    # EPA membulatkan ke integer terdekat, HJ 633 membulatkan ke atas
+    result = np.rint(result) if standard == "US" else np.ceil(result)
+    result[np.isnan(conc)] = np.nan
+    return result
+
+
+def sub_indices(df, standard="US"):
+    """Matriks (n_baris x 6) sub-indeks dengan urutan kolom POLLUTANTS."""
+    return np.column_stack([sub_index(df[p].to_numpy(), p, standard) for p in POLLUTANTS])
+
+
+def compute_aqi(df, standard="US"):
+    """AQI dan polutan dominan (sub-indeks terbesar) per baris.
+
+    Baris tanpa satu pun konsentrasi polutan menghasilkan AQI NaN dan
+    polutan dominan None.
+    """
+    subs = sub_indices(df, standard)
+    all_missing = np.isnan(subs).all(axis=1)
+    filled = np.where(np.isnan(subs), -1.0, subs)
+    dominant_idx = filled.argmax(axis=1)
+    aqi = filled[np.arange(len(filled)), dominant_idx]
+    aqi[all_missing] = np.nan
+    dominant = np.asarray(POLLUTANTS, dtype=object)[dominant_idx]
+    dominant[all_missing] = None
+    return (
+        pd.Series(aqi, index=df.index, name=AQI_COLUMNS[standard]),
+        pd.Series(dominant, index=df.index, name=DOMINANT_COLUMNS[standard]),
+    )
+
+
+def add_aqi_columns(df, standards=STANDARDS):
+    """Tambahkan kolom AQI dan polutan dominan untuk setiap standar (in place)."""
+    for standard in standards:
+        aqi, dominant = compute_aqi(df, standard)
+        df[aqi.name] = aqi
+        df[dominant.name] = dominant
+    return df
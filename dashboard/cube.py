@@ -0,0 +1,135 @@
+"""Cube agregat (sum & count) yang dibangun sekali saat ingest.
+
+Semua tampilan groupby di dashboard adalah rata-rata per dimensi kalender,
+stasiun atau musim dengan filter stasiun/musim. Karena sum dan count bersifat
+aditif, cube cukup disimpan sebagai beberapa cuboid kecil; setiap tampilan
+diturunkan dari cuboid terkecil yang memuat dimensinya, tanpa menyentuh data
+per jam.
+
+Cuboid "wind" menyimpan histogram 2D arah angin (16 arah) × kelas kecepatan
+angin per stasiun × musim × tahun: count = jumlah jam per sel (wind rose) dan
+sum/count = rata-rata polutan per sel. Kelas kecepatan dihitung dari WSPM
+dengan binning tervektorisasi (np.searchsorted); jam tanpa arah/kecepatan
+angin tidak masuk cuboid ini.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from aqi import POLLUTANTS
+from storage import SPEED_BINS, SPEED_EDGES, STORE_DIR, to_compact
+
+FEATURES = POLLUTANTS + ["TEMP", "PRES", "DEWP", "WSPM", "AQI_True", "AQI_CN"]
+
+# Filter dashboard (station, season) selalu ada di setiap cuboid
+CUBOIDS = {
+    "month": ["station", "season", "year", "month"],
+    "day": ["station", "season", "day"],
+    "hour": ["station", "season", "hour"],
+    "wind": ["station", "season", "year", "wd", "speed_bin"],
+}
+CUBE_DIR = "_cube"  # awalan "_" diabaikan oleh pembaca dataset Parquet
+
+
+def _sum_col(feature):
+    return f"{feature}__sum"
+
+
+def _count_col(feature):
+    return f"{feature}__count"
+
+
+def _value_columns(features):
+    return [c for f in features for c in (_sum_col(f), _count_col(f))]
+
+
+def speed_bins(wspm):
+    """Kelas kecepatan angin (kategori SPEED_BINS) per baris; NaN tetap kosong."""
+    values = np.asarray(wspm, dtype=np.float64)
+    codes = np.searchsorted(SPEED_EDGES, values, side="right")
+    codes[np.isnan(values)] = -1
+    return pd.Categorical.from_codes(codes, SPEED_BINS)
+
+
+def dimension(df, col):
+    """Kolom dimensi dari data per jam; `speed_bin` diturunkan dari WSPM."""
+    if col == "speed_bin":
+        return pd.Series(speed_bins(df["WSPM"]), index=df.index)
+    return df[col]
+
+
+def _aggregate(df, dims, features):
+    values = pd.DataFrame({col: dimension(df, col) for col in dims})
+    for f in features:
+        x = df[f].astype("float64")
+        values[_sum_col(f)] = x.fillna(0.0)
+        values[_count_col(f)] = x.notna().astype("int64")
+    return values.groupby(dims, observed=True, sort=False).sum().reset_index()
+
+
+def build_cube(df, features=None):
+    """Hitung semua cuboid dari satu DataFrame (boleh hanya satu chunk)."""
+    features = [f for f in (features or FEATURES) if f in df.columns]
+    return {name: _aggregate(df, dims, features) for name, dims in CUBOIDS.items()}
+
+
+def merge_cubes(cubes):
+    """Gabungkan cube parsial (mis. per chunk atau per stasiun) dengan menjumlahkan."""
+    cubes = [c for c in cubes if c]
+    merged = {}
+    for name, dims in CUBOIDS.items():
+        frame = pd.concat([c[name] for c in cubes], ignore_index=True)
+        frame = to_compact(frame)
+        merged[name] = frame.groupby(dims, observed=True).sum().reset_index()
+    return merged
+
+
+def cube_path(root=STORE_DIR):
+    return os.path.join(root, CUBE_DIR)
+
+
+def save_cube(cube, root=STORE_DIR):
+    path = cube_path(root)
+    os.makedirs(path, exist_ok=True)
+    for name, frame in cube.items():
+        frame.to_parquet(os.path.join(path, f"{name}.parquet"), index=False)
+
+
+def cube_exists(root=STORE_DIR):
+    return all(os.path.exists(os.path.join(cube_path(root), f"{name}.parquet")) for name in CUBOIDS)
+
+
+def load_cube(root=STORE_DIR):
+    return {name: pd.read_parquet(os.path.join(cube_path(root), f"{name}.parquet")) for name in CUBOIDS}
+
+
+def _pick_cuboid(dims):
+    # Cuboid terkecil yang memuat semua dimensi yang diminta
+    for name, cuboid_dims in CUBOIDS.items():
+        if set(dims) <= set(cuboid_dims):
+            return name
+    raise ValueError(f"Tidak ada cuboid untuk dimensi {dims}")
+
+
+def rollup(cube, by, features, seasons=None, station=None, stat="mean"):
+    """Rata-rata (atau jumlah jam terukur, `stat="count"`) `features` per `by` untuk pilihan musim/stasiun.
+
+    Setara dengan df[filter].groupby(by)[features].mean() (atau .count()) pada data per jam.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    features = [features] if isinstance(features, str) else list(features)
+    frame = cube[_pick_cuboid(by)]
+
+    mask = pd.Series(True, index=frame.index)
+    if seasons is not None:
+        mask &= frame["season"].isin(seasons)
+    if station is not None:
+        mask &= frame["station"] == station
+    totals = frame.loc[mask].groupby(by, observed=True)[_value_columns(features)].sum()
+
+    result = pd.DataFrame(index=totals.index)
+    for f in features:
+        count = totals[_count_col(f)]
+        result[f] = count if stat == "count" else totals[_sum_col(f)] / count.where(count > 0)
+    return result.reset_index()
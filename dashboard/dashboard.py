@@ -1,65 +1,113 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import numpy as np
 import os
 
+from aqi import AQI_COLUMNS, AQI_LEVELS, DOMINANT_COLUMNS
+from cube import load_cube
+from dataset import Dataset
+from downsample import METHODS as DOWNSAMPLE_METHODS
+from exposure import EXCEEDANCE_AQI, ROLLING_WINDOWS, STANDARD_LABELS, daily_exposure, exceedance_summary
+from figure_cache import FigureCache, to_figure
+from forecast import forecast, load_models, read_model_manifest, skill_table
+from impute import IMPUTE_FEATURES, completeness, gaps_exist, load_gaps
+from ingest import ensure_store, store_ready
+from perf import Tracer
+from prerender import SNAPSHOT_MANIFEST, load_snapshot, read_snapshot_manifest, snapshot_key, snapshot_path
+from sketches import load_sketch
+from spatial import IDW_NEIGHBORS, IdwGrid, StationHours, StationIndex, load_registry
+from storage import data_version, read_manifest
+from tables import (
+    EXPORT_FORMATS, FILTER_OPS, PAGE_SIZES, column_values, count_rows, export_selection, filter_rows, page_rows,
+    sort_rows
+)
+from update import incoming_files, process_incoming
+from views import CHARTS, DOWNSAMPLE_LABELS, FEATURE_NAMES, STATION_COORDINATES, ViewContext, dominant_share, station_ranking
+
 # ======================================================
 # 1. CONFIG & DATA LOADING
 # ======================================================
 st.set_page_config(page_title="Advanced Air Quality Dashboard", layout="wide")
 
-@st.cache_data
-def load_data(file_path):
-    df = pd.read_csv(file_path)
-    df['datetime'] = pd.to_datetime(df['datetime'])
-    # Tambahkan kolom tambahan agar operasi grupby lebih cepat
-    df['year'] = df['datetime'].dt.year
-    df['month'] = df['datetime'].dt.month
-    df['day'] = df['datetime'].dt.day
-    df['hour'] = df['datetime'].dt.hour
-    return df
-
-# Path relatif ke file dalam folder "dashboard"
-file_path = os.path.join(os.path.dirname(__file__), "data_cleaned.csv")
-
-if not os.path.exists(file_path):
-    st.error(f"File {file_path} tidak ditemukan di Streamlit Cloud. Pastikan file ada di GitHub.")
-
-df = load_data(file_path)
-
-# Koordinat manual untuk tiap stasiun
-station_coordinates = {
-    'Aotizhongxin': (39.982, 116.417),
-    'Changping': (40.218, 116.231),
-    'Dingling': (40.290, 116.220),
-    'Dongsi': (39.929, 116.417),
-    'Guanyuan': (39.929, 116.339),
-    'Gucheng': (39.928, 116.184),
-    'Huairou': (40.375, 116.637),
-    'Nongzhanguan': (39.933, 116.473),
-    'Shunyi': (40.128, 116.653),
-    'Tiantan': (39.886, 116.417),
-    'Wanliu': (39.948, 116.287),
-    'Wanshouxigong': (39.878, 116.339)
-}
-df['lat'] = df['station'].map(lambda x: station_coordinates.get(x, (None, None))[0])
-df['lon'] = df['station'].map(lambda x: station_coordinates.get(x, (None, None))[1])
-
-# Nama fitur yang lebih mudah dimengerti
-feature_names = {
-    "PM2.5": "Fine Particulate Matter (PM2.5)",
-    "PM10": "Coarse Particulate Matter (PM10)",
-    "SO2": "Sulfur Dioxide (SO2)",
-    "NO2": "Nitrogen Dioxide (NO2)",
-    "CO": "Carbon Monoxide (CO)",
-    "O3": "Ozone (O3)",
-    "TEMP": "Temperature (°C)",
-    "PRES": "Pressure (hPa)",
-    "DEWP": "Dew Point (°C)",
-    "WSPM": "Wind Speed (m/s)",
-    "AQI_True": "Air Quality Index (AQI)"
-}
+# Path relatif ke store Parquet dalam folder "dashboard"
+store_path = os.path.join(os.path.dirname(__file__), "store")
+
+# Instrumentasi per sesi (panel "Performance" di sidebar); nonaktif secara default
+# kecuali AQI_PERF=1. AQI_PERF_LOG=<path> menambahkan event ke file JSON lines;
+# memori puncak (tracemalloc, seluruh proses) hanya lewat AQI_PERF_MEMORY=1.
+if "tracer" not in st.session_state:
+    st.session_state.tracer = Tracer.from_env()
+tracer = st.session_state.tracer
+st.session_state.setdefault("perf_enabled", tracer.enabled)
+tracer.enabled = st.session_state.perf_enabled
+tracer.new_run()
+
+# Dataset, cube & sketch dimuat sekali per proses dan dibagi ke semua sesi
+# (read-only). Versi tiap artefak dibaca dari manifest store; append data baru
+# hanya menaikkan versi artefak yang berubah sehingga hanya cache itu yang diganti.
+@st.cache_resource(max_entries=1)
+def get_dataset(version):
+    return Dataset.open(store_path)
+
+@st.cache_resource(max_entries=1)
+def get_cube(version):
+    return load_cube(store_path)
+
+# Ringkasan kelengkapan dari indeks gap (kecil); None jika store tanpa imputasi
+@st.cache_resource(max_entries=1)
+def get_completeness(version):
+    return completeness(load_gaps(store_path)) if gaps_exist(store_path) else None
+
+# Tabel harian paparan (rata-rata 24/8 jam, AQI harian) dihitung ulang per versi dataset
+@st.cache_resource(max_entries=1)
+def get_exposure(version):
+    return daily_exposure(get_dataset(version))
+
+# Registry stasiun, BallTree & bobot IDW grid dibangun sekali per proses
+@st.cache_resource
+def get_station_index():
+    return StationIndex(load_registry())
+
+@st.cache_resource
+def get_idw_grid():
+    return IdwGrid(get_station_index())
+
+# Matriks jam × stasiun per fitur, untuk menggeser jam pada permukaan IDW
+@st.cache_resource(max_entries=2)
+def get_station_hours(feature, version):
+    return StationHours(get_dataset(version), feature, get_idw_grid().stations)
+
+# Model prakiraan dimuat sekali per versi model; prakiraan dihitung ulang per versi model & dataset
+@st.cache_resource(max_entries=1)
+def get_forecast_models(model_version):
+    return load_models(store_path, model_version)
+
+@st.cache_resource(max_entries=1)
+def get_forecasts(model_version, version):
+    return forecast(get_dataset(version), get_forecast_models(model_version))
+
+# Store dibangun dari file PRSA mentah di folder "data" jika belum ada: sekali per
+# proses (cache_resource) dan dijaga kunci file antarproses, sehingga sesi pertama
+# yang datang bersamaan tidak membangun store yang sama secara paralel
+@st.cache_resource
+def get_store():
+    return ensure_store(root=store_path)
+
+if not store_ready(store_path):
+    with st.spinner("Store data belum ada, menjalankan ingest dari data mentah..."):
+        try:
+            get_store()
+            if not store_ready(store_path):
+                # Store dihapus setelah dibangun oleh proses ini: bangun ulang
+                get_store.clear()
+                get_store()
+        except FileNotFoundError as e:
+            st.error(f"Store {store_path} tidak ditemukan dan data mentah tidak tersedia: {e}")
+            st.stop()
+
+# Koordinat stasiun & nama fitur yang lebih mudah dimengerti
+station_coordinates = STATION_COORDINATES
+feature_names = FEATURE_NAMES
 
 # ====================================================== 
 # 2. SIDEBAR FILTERS
@@ -70,22 +118,186 @@ selected_feature_key = st.sidebar.selectbox(
     "Select Feature", list(feature_names.keys()),
     format_func=lambda x: feature_names[x]
 )
+
+# Data per jam baru di folder drop-in (data/incoming) di-append tanpa reload penuh
+pending_files = incoming_files()
+if pending_files and st.sidebar.button(f"Load New Data ({len(pending_files)} file)"):
+    # process_incoming memegang kunci file store (antarproses, sama dengan CLI update.py)
+    with st.spinner("Menambahkan data baru..."):
+        new_rows = process_incoming(root=store_path)
+    st.sidebar.success(f"{new_rows} baris baru ditambahkan")
+
+versions = read_manifest(store_path)["versions"]
+with tracer.span("load", artifact="dataset"):
+    dataset = get_dataset(versions["dataset"])
+with tracer.span("load", artifact="cube"):
+    cube = get_cube(versions["cube"])
+with tracer.span("load", artifact="gaps"):
+    data_completeness = get_completeness(versions["dataset"])
+with tracer.span("load", artifact="idw_grid"):
+    station_index = get_station_index()
+    idw_grid = get_idw_grid()
+
+model_manifest = read_model_manifest(store_path)
+model_version = model_manifest["current"] if model_manifest else None
+
+# Prakiraan hanya dihitung/diambil saat tab Forecast dibangun
+def load_forecasts():
+    with tracer.span("load", artifact="forecast"):
+        return get_forecasts(model_version, versions["dataset"])
+
+# Tabel paparan hanya dihitung/diambil saat tab Exposure dibangun
+def load_exposure():
+    with tracer.span("load", artifact="exposure"):
+        return get_exposure(versions["dataset"])
+
+def load_station_hours(feature):
+    with tracer.span("load", artifact="station_hours", feature=feature):
+        return get_station_hours(feature, versions["dataset"])
+
 selected_station = st.sidebar.selectbox(
-    "Select Station", ['All Stations'] + list(df['station'].unique())
+    "Select Station", ['All Stations'] + dataset.stations
 )
 selected_season = st.sidebar.multiselect(
-    "Select Season", df['season'].unique(),
-    default=list(df['season'].unique())
+    "Select Season", dataset.seasons,
+    default=dataset.seasons
 )
+station_filter = None if selected_station == 'All Stations' else selected_station
 
-@st.cache_data
-def filter_data(df, selected_season, selected_station):
-    df_filtered = df[df['season'].isin(selected_season)]
-    if selected_station != 'All Stations':
-        df_filtered = df_filtered[df_filtered['station'] == selected_station]
-    return df_filtered
+# Rentang tanggal dicari dengan binary search pada data yang terurut per (station, datetime)
+data_start, data_end = (pd.Timestamp(t).date() for t in dataset.time_range)
+selected_dates = st.sidebar.date_input(
+    "Select Date Range", value=(data_start, data_end),
+    min_value=data_start, max_value=data_end
+)
+# Saat baru satu tanggal dipilih, date_input mengembalikan tuple berisi satu elemen
+start_date, end_date = (tuple(selected_dates) + (data_end,))[:2]
+date_start = pd.Timestamp(start_date)
+date_end = pd.Timestamp(end_date) + pd.Timedelta(days=1)  # eksklusif
+date_filtered = (start_date, end_date) != (data_start, data_end)
+
+@st.cache_resource(max_entries=len(feature_names))
+def get_sketch(feature, version):
+    return load_sketch(feature, store_path)
+
+def load_feature_sketch(feature):
+    return get_sketch(feature, versions["sketch"].get(feature, versions["sketch_base"]))
+
+# Semua data & figure chart dibangun dari context ini (lihat views.py); agregat
+# di-memo per rerun sehingga tab Overview memakai ulang hasil tab lain
+ctx = ViewContext(
+    dataset, cube, load_feature_sketch, selected_feature_key,
+    station=station_filter, seasons=selected_season,
+    start=date_start if date_filtered else None, end=date_end if date_filtered else None,
+    version=data_version(versions, selected_feature_key), tracer=tracer, completeness=data_completeness,
+    load_exposure=load_exposure, spatial=idw_grid, load_hours=load_station_hours,
+    load_forecasts=load_forecasts if model_version else None
+)
+
+# Figure terserialisasi dibagi semua sesi (LRU + TTL, dibatasi ukuran byte)
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache()
 
-df_filtered = filter_data(df, selected_season, selected_station)
+figure_cache = get_figure_cache()
+
+# Snapshot hasil prerender.py dipakai jika ada dan versinya sama dengan data saat ini
+@st.cache_resource(max_entries=1)
+def get_snapshot_manifest(mtime):
+    return read_snapshot_manifest(store_path)
+
+snapshot_manifest_file = os.path.join(snapshot_path(store_path), SNAPSHOT_MANIFEST)
+snapshot_mtime = os.path.getmtime(snapshot_manifest_file) if os.path.exists(snapshot_manifest_file) else None
+snapshot_entry = None
+if snapshot_mtime is not None and not ctx.date_filtered:
+    snapshot_entry = get_snapshot_manifest(snapshot_mtime)["entries"].get(
+        snapshot_key(selected_feature_key, station_filter, ctx.seasons)
+    )
+    if snapshot_entry is not None and tuple(snapshot_entry["version"]) != ctx.version:
+        snapshot_entry = None
+
+# File snapshot tidak di-cache antar rerun: dibaca paling banyak sekali per rerun
+# saat ada miss, dan payload-nya disimpan di figure cache (dibatasi byte)
+snapshot_payloads = {}
+
+def build_chart(chart, **params):
+    """(sumber, payload JSON): dari snapshot bila tersedia, selain itu dibangun live."""
+    if snapshot_entry is not None and not params:
+        if not snapshot_payloads:
+            snapshot_payloads.update(load_snapshot(snapshot_entry["file"], store_path))
+        payload = snapshot_payloads.get(chart)
+        if payload is not None:
+            return "snapshot", payload
+    with tracer.span("figure", chart=chart):
+        return "miss", CHARTS[chart](ctx, **params).to_json()
+
+def plot_chart(chart, key, container=st, **params):
+    with tracer.span("chart", chart=chart) as span:
+        span["cache"] = "hit"
+
+        def build():
+            span["cache"], payload = build_chart(chart, **params)
+            return payload
+
+        # Saat hit, JSON dari cache langsung dipakai tanpa membangun ulang figure Plotly
+        payload = figure_cache.get_or_build(ctx.cache_key(chart, **params), build)
+        span["payload_bytes"] = len(payload)
+        container.plotly_chart(to_figure(payload), use_container_width=True, key=key)
+
+# Tabel per halaman: hanya halaman aktif & kolom terpilih yang dikirim ke browser
+TABLE_COLUMNS = ["datetime", "station", "season"] + [c for c in feature_names if c in dataset.columns]
+
+def render_table(rows, key):
+    columns = st.multiselect(
+        "Columns", dataset.columns, default=[c for c in TABLE_COLUMNS if c in dataset.columns],
+        key=f"{key}_columns"
+    )
+    if not columns:
+        st.info("Pilih minimal satu kolom.")
+        return
+    sort_col, order_col, filter_col, op_col, value_col = st.columns([2, 1, 2, 1, 2])
+    sort_by = sort_col.selectbox("Sort by", ["(data order)"] + dataset.columns, key=f"{key}_sort")
+    descending = order_col.toggle("Descending", key=f"{key}_desc")
+    filter_by = filter_col.selectbox("Filter", ["(none)"] + dataset.columns, key=f"{key}_filter")
+    filter_op = op_col.selectbox("Op", list(FILTER_OPS), key=f"{key}_op")
+    filter_value = value_col.text_input("Value", key=f"{key}_value")
+
+    with tracer.span("table", table=key) as span:
+        if filter_by != "(none)" and filter_value:
+            try:
+                rows = filter_rows(dataset, rows, filter_by, filter_op, filter_value)
+            except ValueError as e:
+                st.warning(f"Filter diabaikan: {e}")
+        if sort_by != "(data order)":
+            # Urutan hasil sort disimpan per sesi selama seleksi & kolom sort tidak berubah
+            signature = (ctx.cache_key(key), filter_by, filter_op, filter_value, sort_by, descending)
+            cached = st.session_state.get(f"{key}_order")
+            if cached is None or cached[0] != signature:
+                cached = (signature, sort_rows(dataset, rows, sort_by, descending))
+                st.session_state[f"{key}_order"] = cached
+            rows = cached[1]
+        n_rows = count_rows(rows)
+        size_col, page_col, info_col = st.columns([1, 1, 4])
+        page_size = size_col.selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+        n_pages = max(1, -(-n_rows // page_size))
+        page = page_col.number_input("Page", min_value=1, max_value=n_pages, value=1, key=f"{key}_page")
+        page_selection = page_rows(rows, min(page, n_pages), page_size)
+        st.dataframe(dataset.take(page_selection, columns), hide_index=True)
+        span["rows"] = n_rows
+        first = (min(page, n_pages) - 1) * page_size
+        info_col.caption(f"Baris {min(first + 1, n_rows):,}–{min(first + page_size, n_rows):,} dari {n_rows:,}")
+
+    # File ekspor baru dibuat saat diminta, ditulis per potongan baris
+    fmt_col, prepare_col, download_col = st.columns([1, 1, 2])
+    export_format = fmt_col.selectbox("Format", EXPORT_FORMATS, format_func=str.upper, key=f"{key}_format")
+    if prepare_col.button("Prepare download", key=f"{key}_prepare"):
+        with st.spinner("Menyiapkan file..."), tracer.span("export", table=key, format=export_format) as span:
+            data = export_selection(dataset, rows, columns, export_format)
+            span["bytes"] = len(data)
+        download_col.download_button(
+            f"Download {export_format.upper()} ({len(data) / 2**20:.1f} MB)", data,
+            file_name=f"{key}.{export_format}", key=f"{key}_download"
+        )
 
 # ======================================================
 # 3. MAIN LAYOUT & AQI EXPANDER
@@ -94,32 +306,27 @@ st.title("🌍 Advanced Air Quality Dashboard")
 st.markdown("### Exploring Air Quality and Weather Data 2013-2017 in Beijing, China")
 
 # Jika fitur AQI yang dipilih, tampilkan keterangan level AQI (US & China)
-if selected_feature_key == "AQI_True":
+if selected_feature_key in AQI_COLUMNS.values():
     with st.expander("AQI Level Explanations (US & China)", expanded=True):
-        st.markdown("**US AQI Levels:**")
-        st.markdown("""
-- **0-50:** Good  
-- **51-100:** Moderate  
-- **101-150:** Unhealthy for Sensitive Groups  
-- **151-200:** Unhealthy  
-- **201-300:** Very Unhealthy  
-- **301-500:** Hazardous  
-        """)
-
-tabs = st.tabs([
-    "📊 Overview",
-    "📈 Trends",
-    "🏆 Station Rankings",
-    "🌦 Seasonal Patterns",
-    "☁ Weather Impact",
-    "🌍 Geographic Distribution",
-    "📍 Station Details"
-])
+        level_cols = st.columns(2)
+        for col, (standard, title) in zip(level_cols, [("US", "US AQI Levels"), ("CN", "China AQI Levels (HJ 633)")]):
+            col.markdown(f"**{title}:**")
+            col.markdown("\n".join(f"- **{rng}:** {label}  " for rng, label in AQI_LEVELS[standard]))
+        # Standar yang sesuai dengan fitur AQI terpilih
+        standard = next(s for s, col in AQI_COLUMNS.items() if col == selected_feature_key)
+        dominant_col = DOMINANT_COLUMNS[standard]
+        if dominant_col in dataset.columns:
+            shares = dominant_share(ctx, dominant_col)
+            if not shares.empty:
+                st.markdown(
+                    f"**Polutan dominan ({standard}):** " +
+                    ", ".join(f"{p} {share:.0%}" for p, share in shares.head(3).items())
+                )
 
 # ======================================================
-# 4. TAB 0: OVERVIEW
+# 4. VIEW: OVERVIEW
 # ======================================================
-with tabs[0]:
+def render_overview():
     st.subheader("📊 Overview: One Chart from Each Tab")
     st.markdown(
         "Di bawah ini adalah ringkasan singkat. "
@@ -132,35 +339,12 @@ with tabs[0]:
     # (1) Trends (contoh: Monthly Trend)
     with row1_col1:
         st.markdown("**Trends (Monthly)**")
-        agg_monthly = df_filtered.groupby('month')[selected_feature_key].mean().reset_index()
-        fig_monthly = px.line(
-            agg_monthly, x='month', y=selected_feature_key,
-            title=f'Monthly Trend of {feature_names.get(selected_feature_key)}',
-            markers=True,
-            labels={'month': 'Month', selected_feature_key: feature_names.get(selected_feature_key)}
-        )
-        fig_monthly.update_xaxes(range=[1, 12])
-        st.plotly_chart(fig_monthly, use_container_width=True, key="overview_monthly")
+        plot_chart("monthly_trend", "overview_monthly")
 
     # (2) Station Rankings (contoh: bar chart)
     with row1_col2:
         st.markdown("**Station Rankings**")
-        agg_station = df_filtered.groupby('station')[selected_feature_key].mean().reset_index()
-        agg_station = agg_station.sort_values(by=selected_feature_key, ascending=False)
-
-        fig_rank = px.bar(
-            agg_station, x='station', y=selected_feature_key,
-            title=f'Ranking of {feature_names.get(selected_feature_key)} Across Stations',
-            text=selected_feature_key, color=selected_feature_key,
-            color_continuous_scale='Viridis'
-        )
-        fig_rank.update_layout(
-            xaxis_title="Station",
-            yaxis_title=feature_names.get(selected_feature_key),
-            xaxis={'categoryorder': 'total descending'},
-            coloraxis_colorbar=dict(title=feature_names.get(selected_feature_key))
-        )
-        st.plotly_chart(fig_rank, use_container_width=True, key="overview_station_rank")
+        plot_chart("station_rank_bar", "overview_station_rank")
 
     # ---------- Row 2 ----------
     row2_col1, row2_col2 = st.columns(2)
@@ -168,30 +352,12 @@ with tabs[0]:
     # (3) Seasonal Patterns (contoh: box chart)
     with row2_col1:
         st.markdown("**Seasonal Patterns**")
-        fig_seasonal = px.box(
-            df_filtered, x='season', y=selected_feature_key, color='season',
-            title=f'Seasonal Distribution of {feature_names.get(selected_feature_key)}'
-        )
-        fig_seasonal.update_layout(xaxis_title="Season")
-        st.plotly_chart(fig_seasonal, use_container_width=True, key="overview_seasonal")
+        plot_chart("seasonal_box", "overview_seasonal")
 
     # (4) Weather Impact (contoh: average TEMP, DEWP, WSPM by season)
     with row2_col2:
         st.markdown("**Weather Impact**")
-        agg_weather = df_filtered.groupby('season')[['TEMP', 'DEWP', 'WSPM']].mean().reset_index()
-        fig_weather = go.Figure()
-        for col in ['TEMP', 'DEWP', 'WSPM']:
-            fig_weather.add_trace(
-                go.Scatter(
-                    x=agg_weather['season'], y=agg_weather[col],
-                    mode='lines+markers', name=feature_names.get(col)
-                )
-            )
-        fig_weather.update_layout(
-            title="Average Weather Conditions by Season (TEMP, DEWP, WSPM)",
-            xaxis_title="Season", yaxis_title="Value"
-        )
-        st.plotly_chart(fig_weather, use_container_width=True, key="overview_weather")
+        plot_chart("weather_by_season", "overview_weather")
 
     # ---------- Row 3 ----------
     row3_col1, row3_col2 = st.columns(2)
@@ -199,321 +365,281 @@ with tabs[0]:
     # (5) Geographic Distribution (contoh ringkas)
     with row3_col1:
         st.markdown("**Geographic Distribution**")
-
-        # Contoh custom color scale ala AQI (0-500)
-        aqi_colorscale = [
-            [0.0, "green"],
-            [0.2, "yellow"],
-            [0.4, "orange"],
-            [0.6, "red"],
-            [0.8, "purple"],
-            [1.0, "maroon"]
-        ]
-
-        df_geo = df_filtered.dropna(subset=['lat', 'lon'])
-        df_geo = df_geo.groupby('station').agg({
-            selected_feature_key: 'mean',
-            'lat': 'first',
-            'lon': 'first'
-        }).reset_index()
-
-        fig_map = px.scatter_geo(
-            df_geo,
-            lat='lat', lon='lon',
-            color=selected_feature_key, size=selected_feature_key,
-            color_continuous_scale=aqi_colorscale,
-            range_color=[0, 500],  # Ubah jika data di luar 0-500
-            size_max=15,
-            projection="natural earth",
-            hover_name='station',
-            title=f'Geographic Distribution of {feature_names.get(selected_feature_key)}'
-        )
-        fig_map.update_layout(
-            margin={"r":0, "t":30, "l":0, "b":0},
-            coloraxis_colorbar=dict(title=feature_names.get(selected_feature_key))
-        )
-        st.plotly_chart(fig_map, use_container_width=True, key="overview_geo")
+        plot_chart("geo_overview", "overview_geo")
 
     # (6) Station Details (ringkas)
     with row3_col2:
         st.markdown("**Station Details**")
         if selected_station != "All Stations":
-            station_data = df[df['station'] == selected_station]
-            fig_station = px.line(
-                station_data, x='datetime', y=selected_feature_key,
-                title=f"{feature_names.get(selected_feature_key)} Over Time at {selected_station}",
-                markers=True,
-                labels={'datetime': 'Time', selected_feature_key: feature_names.get(selected_feature_key)}
-            )
-            st.plotly_chart(fig_station, use_container_width=True, key="overview_station_details")
+            plot_chart("station_series_preview", "overview_station_details")
         else:
             st.info("Pilih stasiun tertentu dari sidebar untuk melihat detail di sini.")
 
 # ======================================================
-# 5. TAB 1: TRENDS
+# 5. VIEW: TRENDS
 # ======================================================
-with tabs[1]:
+def render_trends():
     st.subheader("📈 Trends in Air Quality")
 
     trend_cols = st.columns(2)
-    
-    # Hourly
-    agg_hourly = df_filtered.groupby('hour')[selected_feature_key].mean().reset_index()
-    fig_hourly = px.line(
-        agg_hourly, x='hour', y=selected_feature_key,
-        title=f'Hourly Trend of {feature_names.get(selected_feature_key)}', markers=True,
-        labels={'hour': 'Hour', selected_feature_key: feature_names.get(selected_feature_key)}
-    )
-    fig_hourly.update_xaxes(range=[0, 23])
-    trend_cols[0].plotly_chart(fig_hourly, use_container_width=True, key="trends_hourly")
-    
-    # Daily
-    agg_daily = df_filtered.groupby('day')[selected_feature_key].mean().reset_index()
-    fig_daily = px.line(
-        agg_daily, x='day', y=selected_feature_key,
-        title=f'Daily Trend of {feature_names.get(selected_feature_key)}', markers=True,
-        labels={'day': 'Day', selected_feature_key: feature_names.get(selected_feature_key)}
-    )
-    fig_daily.update_xaxes(range=[1, 31])
-    trend_cols[1].plotly_chart(fig_daily, use_container_width=True, key="trends_daily")
-    
+    plot_chart("hourly_trend", "trends_hourly", trend_cols[0])
+    plot_chart("daily_trend", "trends_daily", trend_cols[1])
+
     trend_cols = st.columns(2)
-    # Monthly
-    agg_monthly = df_filtered.groupby('month')[selected_feature_key].mean().reset_index()
-    fig_monthly = px.line(
-        agg_monthly, x='month', y=selected_feature_key,
-        title=f'Monthly Trend of {feature_names.get(selected_feature_key)}', markers=True,
-        labels={'month': 'Month', selected_feature_key: feature_names.get(selected_feature_key)}
-    )
-    fig_monthly.update_xaxes(range=[1, 12])
-    trend_cols[0].plotly_chart(fig_monthly, use_container_width=True, key="trends_monthly")
-    
-    # Yearly
-    agg_yearly = df_filtered.groupby('year')[selected_feature_key].mean().reset_index()
-    fig_yearly = px.line(
-        agg_yearly, x='year', y=selected_feature_key,
-        title=f'Yearly Trend of {feature_names.get(selected_feature_key)}', markers=True,
-        labels={'year': 'Year', selected_feature_key: feature_names.get(selected_feature_key)}
-    )
-    trend_cols[1].plotly_chart(fig_yearly, use_container_width=True, key="trends_yearly")
+    plot_chart("monthly_trend", "trends_monthly", trend_cols[0])
+    plot_chart("yearly_trend", "trends_yearly", trend_cols[1])
 
 # ======================================================
-# 6. TAB 2: STATION RANKINGS
+# 6. VIEW: STATION RANKINGS
 # ======================================================
-with tabs[2]:
+def render_station_rankings():
     st.subheader("🏆 Air Quality Index (AQI) Rankings by Station")
-    agg_station = df_filtered.groupby('station')[selected_feature_key].mean().reset_index()
-    agg_station = agg_station.sort_values(by=selected_feature_key, ascending=False)
-    
-    fig_rank = px.bar(
-        agg_station, x='station', y=selected_feature_key,
-        title=f'Ranking of {feature_names.get(selected_feature_key)} Across Stations',
-        text=selected_feature_key, color=selected_feature_key,
-        color_continuous_scale='Viridis'
-    )
-    fig_rank.update_layout(
-        xaxis_title="Station", 
-        yaxis_title=feature_names.get(selected_feature_key),
-        xaxis={'categoryorder': 'total descending'},
-        coloraxis_colorbar=dict(title=feature_names.get(selected_feature_key))
-    )
-    st.plotly_chart(fig_rank, use_container_width=True, key="station_rankings_bar")
-    
-    agg_trend = df_filtered.groupby(['station', 'year'])[selected_feature_key].mean().reset_index()
-    fig_trend = px.line(
-        agg_trend, x='year', y=selected_feature_key, color='station',
-        title=f'Trend of {feature_names.get(selected_feature_key)} Over Time'
-    )
-    fig_trend.update_layout(
-        yaxis_title=feature_names.get(selected_feature_key),
-        xaxis=dict(tickmode='linear', tick0=agg_trend['year'].min(), dtick=1)
-    )
-    st.plotly_chart(fig_trend, use_container_width=True, key="station_rankings_line")
+    plot_chart("station_rank_bar", "station_rankings_bar")
+    plot_chart("station_trend", "station_rankings_line")
 
     st.subheader("📋 Detailed Rankings Table")
-    agg_station['Rank'] = agg_station[selected_feature_key].rank(ascending=False).astype(int)
+    agg_station = station_ranking(ctx)
+    agg_station['Rank'] = agg_station[selected_feature_key].rank(ascending=False, method='first').astype(int)
     agg_station = agg_station.set_index('Rank')
     agg_station = agg_station.rename(columns={selected_feature_key: feature_names.get(selected_feature_key)})
     st.dataframe(agg_station.style.background_gradient(cmap="viridis"))
 
+    if data_completeness is not None:
+        st.subheader("🧩 Data Completeness")
+        st.caption("Jam kosong sudah diisi saat ingest: gap pendek diinterpolasi, gap panjang memakai profil musiman per jam.")
+        plot_chart("station_completeness", "station_completeness")
+
 # ======================================================
-# 7. TAB 3: SEASONAL PATTERNS
+# 7. VIEW: SEASONAL PATTERNS
 # ======================================================
-with tabs[3]:
+def render_seasonal_patterns():
     st.subheader("🌦 Seasonal Patterns of Air Quality")
-    fig_seasonal = px.box(
-        df_filtered, x='season', y=selected_feature_key, color='season',
-        title=f'Seasonal Distribution of {feature_names.get(selected_feature_key)}'
-    )
-    fig_seasonal.update_layout(xaxis_title="Season")
-    st.plotly_chart(fig_seasonal, use_container_width=True, key="seasonal_box")
+    plot_chart("seasonal_box", "seasonal_box")
 
     st.subheader("📈 Seasonal Trends")
     seasonal_cols = st.columns(2)
-    agg_seasonal_year = df_filtered.groupby(['season', 'year'])[selected_feature_key].mean().reset_index()
-    fig_seasonal_trend = px.line(
-        agg_seasonal_year, x='year', y=selected_feature_key, color='season',
-        title=f'Trend of {feature_names.get(selected_feature_key)} by Season'
-    )
-    fig_seasonal_trend.update_layout(
-        yaxis_title=feature_names.get(selected_feature_key), 
-        xaxis_title="Year"
-    )
-    seasonal_cols[0].plotly_chart(fig_seasonal_trend, use_container_width=True, key="seasonal_trend_line")
-    
-    agg_seasonal_station = df_filtered.groupby(['season', 'station'])[selected_feature_key].mean().reset_index()
-    fig_seasonal_bar = px.bar(
-        agg_seasonal_station, x='station', y=selected_feature_key, color='season',
-        title=f'{feature_names.get(selected_feature_key)} by Season in Every Station'
-    )
-    fig_seasonal_bar.update_layout(
-        yaxis_title=feature_names.get(selected_feature_key), 
-        xaxis_title="Station"
-    )
-    seasonal_cols[1].plotly_chart(fig_seasonal_bar, use_container_width=True, key="seasonal_bar")
+    plot_chart("seasonal_trend", "seasonal_trend_line", seasonal_cols[0])
+    plot_chart("seasonal_station_bar", "seasonal_bar", seasonal_cols[1])
 
 # ======================================================
-# 8. TAB 4: WEATHER IMPACT
+# 8. VIEW: WEATHER IMPACT
 # ======================================================
-with tabs[4]:
+def render_weather_impact():
     st.subheader("☁ Weather Impact on Air Quality")
     weather_cols = st.columns(2)
-    
-    # TEMP, DEWP, WSPM by season
-    agg_weather = df_filtered.groupby('season')[['TEMP', 'DEWP', 'WSPM']].mean().reset_index()
-    fig_weather = go.Figure()
-    for col in ['TEMP', 'DEWP', 'WSPM']:
-        fig_weather.add_trace(
-            go.Scatter(
-                x=agg_weather['season'], y=agg_weather[col],
-                mode='lines+markers', name=feature_names.get(col)
-            )
-        )
-    fig_weather.update_layout(
-        title="Average Weather Conditions by Season (TEMP, DEWP, WSPM)",
-        xaxis_title="Season", yaxis_title="Value"
-    )
-    weather_cols[0].plotly_chart(fig_weather, use_container_width=True, key="weather_impact_lines")
-    
-    # PRES by season
-    agg_pressure = df_filtered.groupby('season')['PRES'].mean().reset_index()
-    fig_pressure = px.line(
-        agg_pressure, x='season', y='PRES',
-        title="Average Pressure by Season", markers=True,
-        labels={'PRES': feature_names.get('PRES')}
-    )
-    fig_pressure.update_layout(
-        xaxis_title="Season", 
-        yaxis_title=feature_names.get('PRES')
-    )
-    weather_cols[1].plotly_chart(fig_pressure, use_container_width=True, key="weather_impact_pressure")
-    
-    # TEMP, DEWP, WSPM by station
-    agg_weather_station = df_filtered.groupby('station')[['TEMP', 'DEWP', 'WSPM']].mean().reset_index()
-    fig_weather_station = go.Figure()
-    for col in ['TEMP', 'DEWP', 'WSPM']:
-        fig_weather_station.add_trace(
-            go.Scatter(
-                x=agg_weather_station['station'], y=agg_weather_station[col],
-                mode='lines+markers', name=feature_names.get(col)
-            )
-        )
-    fig_weather_station.update_layout(
-        title="Average Weather Conditions by Station (TEMP, DEWP, WSPM)",
-        xaxis_title="Station", yaxis_title="Value"
-    )
-    weather_cols[0].plotly_chart(fig_weather_station, use_container_width=True, key="weather_station_lines")
-    
-    # PRES by station
-    agg_pressure_station = df_filtered.groupby('station')['PRES'].mean().reset_index()
-    fig_pressure_station = px.line(
-        agg_pressure_station, x='station', y='PRES',
-        title="Average Pressure by Station", markers=True,
-        labels={'PRES': feature_names.get('PRES')}
-    )
-    fig_pressure_station.update_layout(
-        xaxis_title="Station", 
-        yaxis_title=feature_names.get('PRES')
-    )
-    weather_cols[1].plotly_chart(fig_pressure_station, use_container_width=True, key="weather_station_pressure")
+    plot_chart("weather_by_season", "weather_impact_lines", weather_cols[0])
+    plot_chart("pressure_by_season", "weather_impact_pressure", weather_cols[1])
+    plot_chart("weather_by_station", "weather_station_lines", weather_cols[0])
+    plot_chart("pressure_by_station", "weather_station_pressure", weather_cols[1])
+
+    # Histogram arah × kecepatan angin dari cuboid "wind" (tanpa memindai baris)
+    st.subheader("🧭 Wind Direction & Speed")
+    wind_cols = st.columns(2)
+    plot_chart("wind_rose", "weather_wind_rose", wind_cols[0])
+    plot_chart("pollutant_wind_rose", "weather_pollutant_wind", wind_cols[1])
 
 # ======================================================
-# 9. TAB 5: GEOGRAPHIC DISTRIBUTION (ADVANCED MAP)
+# 9. VIEW: GEOGRAPHIC DISTRIBUTION (ADVANCED MAP)
 # ======================================================
-with tabs[5]:
+def render_geographic_distribution():
     st.subheader("🌍 Geographic Distribution of Air Quality (Advanced Map)")
-    
-    # Contoh custom color scale ala AQI (0-500)
-    aqi_colorscale = [
-        [0.0, "green"],
-        [0.2, "yellow"],
-        [0.4, "orange"],
-        [0.6, "red"],
-        [0.8, "purple"],
-        [1.0, "maroon"]
-    ]
-
-    df_geo = df_filtered.dropna(subset=['lat', 'lon'])
-    df_geo = df_geo.groupby('station').agg({
-        selected_feature_key: 'mean',
-        'lat': 'first',
-        'lon': 'first'
-    }).reset_index()
-
-    # Gunakan scatter_map untuk peta interaktif
-    fig_map = px.scatter_map(
-        df_geo,
-        lat="lat",
-        lon="lon",
-        color=selected_feature_key,
-        size=selected_feature_key,
-        color_continuous_scale=aqi_colorscale,
-        range_color=[0, 500],
-        size_max=15,
-        zoom=8,
-        map_style="open-street-map",
-        hover_name="station",
-        title=f'Geographic Distribution of {feature_names.get(selected_feature_key)} by Station (map)'
-    )
-    fig_map.update_layout(
-        margin={"r":0, "t":30, "l":0, "b":0},
-        coloraxis_colorbar=dict(title=feature_names.get(selected_feature_key))
+    plot_chart("station_map", "advanced_map")
+
+    # Permukaan IDW: bobot grid dihitung sekali, tiap jam cukup satu perkalian matriks-vektor
+    st.subheader("🗺 Interpolated Surface")
+    st.caption(
+        f"Inverse distance weighting dari {IDW_NEIGHBORS} stasiun terdekat per sel "
+        f"({idw_grid.shape[0]}×{idw_grid.shape[1]} sel, {len(idw_grid.stations)} stasiun di registry)."
     )
-    st.plotly_chart(fig_map, use_container_width=True, key="advanced_map")
+    surface_mode = st.radio("Surface", ["Mean of selection", "Single hour"], horizontal=True, key="idw_mode")
+    if surface_mode == "Single hour":
+        first, last = (pd.Timestamp(t) for t in dataset.time_range)
+        if ctx.date_filtered:
+            first, last = max(first, date_start), min(last, date_end - pd.Timedelta(hours=1))
+        hour = st.slider(
+            "Hour", min_value=first.to_pydatetime(), max_value=last.to_pydatetime(),
+            value=last.to_pydatetime(), step=pd.Timedelta(hours=1).to_pytimedelta(),
+            format="YYYY-MM-DD HH:00", key="idw_hour"
+        )
+        plot_chart("idw_surface", "idw_surface_hour", hour=pd.Timestamp(hour))
+    else:
+        plot_chart("idw_surface", "idw_surface_mean")
 
 # ======================================================
-# 10. TAB 6: STATION DETAILS
+# 10. VIEW: STATION DETAILS
 # ======================================================
-with tabs[6]:
+def render_station_details():
     st.subheader("📍 Station Details")
-    if selected_station != "All Stations":
-        # Ambil data untuk stasiun terpilih
-        station_data = df[df['station'] == selected_station]
+    # Baris stasiun terpilih (dalam rentang tanggal sidebar); ringkasan dihitung
+    # dari array kolom tanpa membuat DataFrame seluruh baris
+    station_rows = ctx.rows(by_season=False) if selected_station != "All Stations" else None
+    if station_rows is not None and count_rows(station_rows) == 0:
+        st.info("Tidak ada data untuk stasiun ini pada rentang tanggal yang dipilih.")
+    elif station_rows is not None:
         st.markdown(f"### Detail untuk stasiun: **{selected_station}**")
         st.markdown(f"**Koordinat:** {station_coordinates.get(selected_station, ('N/A', 'N/A'))}")
-        st.markdown(f"**Total Data Record:** {len(station_data)}")
+        if selected_station in station_index.stations:
+            nearest = ", ".join(f"{name} ({km:.1f} km)" for name, km in station_index.nearest(selected_station))
+            st.markdown(f"**Stasiun terdekat:** {nearest}")
+        st.markdown(f"**Total Data Record:** {count_rows(station_rows)}")
         st.markdown(
             f"**Rata-rata {feature_names.get(selected_feature_key)}:** "
-            f"{station_data[selected_feature_key].mean():.2f}"
+            f"{np.nanmean(column_values(dataset, selected_feature_key, station_rows)):.2f}"
         )
+        if data_completeness is not None and selected_feature_key in IMPUTE_FEATURES:
+            # Dari indeks gap (seluruh histori stasiun), tanpa memindai ulang baris
+            gap = data_completeness.set_index(["station", "feature"]).loc[(selected_station, selected_feature_key)]
+            st.markdown(
+                f"**Kelengkapan {selected_feature_key}:** {gap['completeness']:.1f}% terukur "
+                f"({gap['interpolated']:.0f} jam diinterpolasi, {gap['profile']:.0f} jam dari profil musiman, "
+                f"{gap['missing']:.0f} jam kosong)"
+            )
         
-        # Grafik time series untuk stasiun terpilih
-        fig_station = px.line(
-            station_data, x='datetime', y=selected_feature_key,
-            title=f"{feature_names.get(selected_feature_key)} Over Time at {selected_station}",
-            markers=True,
-            labels={'datetime': 'Time', selected_feature_key: feature_names.get(selected_feature_key)}
+        # Grafik time series untuk stasiun terpilih. Mempersempit rentang waktu
+        # ("zoom") membuat data di-downsample ulang dengan resolusi lebih halus.
+        station_times = column_values(dataset, 'datetime', station_rows)
+        t_min = pd.Timestamp(station_times.min()).to_pydatetime()
+        t_max = pd.Timestamp(station_times.max()).to_pydatetime()
+        range_col, method_col = st.columns([3, 1])
+        visible_range = range_col.slider(
+            "Visible Time Range", min_value=t_min, max_value=t_max,
+            value=(t_min, t_max), format="YYYY-MM-DD", key="station_details_range"
+        )
+        downsample_method = method_col.selectbox(
+            "Downsampling", list(DOWNSAMPLE_METHODS),
+            format_func=DOWNSAMPLE_LABELS.get,
+            key="station_details_method"
+        )
+        # Slider memilih tanggal (inklusif); batas akhir dibuat eksklusif untuk indeks
+        plot_chart(
+            "station_series", "station_details_chart",
+            start=pd.Timestamp(visible_range[0]), end=pd.Timestamp(visible_range[1]) + pd.Timedelta(days=1),
+            method=downsample_method
         )
-        st.plotly_chart(fig_station, use_container_width=True, key="station_details_chart")
         
-        # Tampilkan tabel ringkasan data stasiun
-        st.dataframe(station_data.sort_values('datetime').reset_index(drop=True))
+        # Tabel data stasiun per halaman
+        render_table(station_rows, "station_table")
     else:
         st.info("Silakan pilih stasiun tertentu dari sidebar untuk melihat detail.")
 
 # ======================================================
-# 11. SHOW RAW DATA OPTION
+# 11. VIEW: EXPOSURE & EXCEEDANCE
+# ======================================================
+def render_exposure():
+    st.subheader("🚨 Exposure & Exceedance Days")
+    standard = st.radio(
+        "AQI Standard", list(STANDARD_LABELS), format_func=STANDARD_LABELS.get,
+        horizontal=True, key="exposure_standard"
+    )
+    st.caption(
+        f"AQI harian memakai rata-rata 24 jam (PM2.5, PM10) dan maksimum rata-rata 8 jam (O3, CO); "
+        f"satu hari dihitung melampaui ambang jika AQI hariannya di atas {EXCEEDANCE_AQI}."
+    )
+    plot_chart("exceedance_ranking", "exposure_ranking", standard=standard)
+    plot_chart("exceedance_calendar", "exposure_calendar", standard=standard)
+
+    st.subheader("📋 Exceedance Rankings")
+    days = ctx.exposure_days()
+    rankings = exceedance_summary(days, "US")[["station", "days", "exceedance_days", "exceedance_share"]].merge(
+        exceedance_summary(days, "CN")[["station", "exceedance_days", "exceedance_share"]],
+        on="station", suffixes=(" (US)", " (CN)")
+    )
+    st.dataframe(rankings.set_index("station").style.format(precision=1).background_gradient(cmap="Reds"))
+
+    if station_filter is not None:
+        st.subheader("⏱ Rolling Averages")
+        pollutants = list(ROLLING_WINDOWS)
+        pollutant = st.selectbox(
+            "Pollutant", pollutants, key="exposure_pollutant",
+            index=pollutants.index(selected_feature_key) if selected_feature_key in pollutants else 0
+        )
+        plot_chart("station_rolling", "exposure_rolling", pollutant=pollutant)
+    else:
+        st.info("Pilih stasiun di sidebar untuk melihat rata-rata bergerak 24/8 jam.")
+
+# ======================================================
+# 12. VIEW: FORECAST
+# ======================================================
+def render_forecast():
+    st.subheader("🔮 24-Hour Forecast")
+    if model_version is None:
+        st.info("Model prakiraan belum dilatih. Operator dapat melatihnya dengan "
+                "`python dashboard/forecast.py --workers 4` (beberapa menit).")
+    else:
+        model_entry = model_manifest["versions"][model_version]
+        target = st.radio("Target", ["AQI_True", "PM2.5"], format_func=lambda t: feature_names.get(t, t),
+                          horizontal=True, key="forecast_target")
+        st.caption(
+            f"Model HistGradientBoosting per stasiun, dilatih {model_entry['trained_at']}; prakiraan dihitung "
+            f"dari jam terakhir di data. Filter musim & tanggal tidak berlaku untuk prakiraan."
+        )
+        if model_entry["data_version"] != versions["dataset"]:
+            st.caption("Data baru sudah ditambahkan sejak model dilatih; prakiraan tetap memakai data terbaru sebagai input.")
+        plot_chart("forecast_overview", "forecast_overview", target=target, model_version=model_version)
+        if station_filter is not None:
+            plot_chart("forecast_series", "forecast_series", target=target, model_version=model_version)
+        else:
+            st.info("Pilih stasiun di sidebar untuk melihat prakiraan beserta observasi terakhirnya.")
+
+        st.subheader("🎯 Holdout Accuracy")
+        skill = skill_table(model_entry)
+        skill = skill[skill["target"] == target].drop(columns="target").set_index("station")
+        st.caption("MAE rata-rata horizon 1-24 jam pada hari-hari terakhir yang tidak dipakai melatih model, "
+                   "dibandingkan persistensi (nilai jam terakhir); skill = % perbaikan terhadap persistensi.")
+        st.dataframe(skill.style.format(precision=1).background_gradient(cmap="Greens", subset=["skill"]))
+
+# ======================================================
+# 13. VIEW REGISTRY
+# ======================================================
+# Hanya view yang aktif yang dihitung & dirender (st.tabs menjalankan semua isi tab
+# di setiap rerun), jadi latensi interaksi sebanding dengan chart yang terlihat
+VIEWS = {
+    "overview": ("📊 Overview", render_overview),
+    "trends": ("📈 Trends", render_trends),
+    "station_rankings": ("🏆 Station Rankings", render_station_rankings),
+    "seasonal_patterns": ("🌦 Seasonal Patterns", render_seasonal_patterns),
+    "weather_impact": ("☁ Weather Impact", render_weather_impact),
+    "geographic_distribution": ("🌍 Geographic Distribution", render_geographic_distribution),
+    "station_details": ("📍 Station Details", render_station_details),
+    "exposure": ("🚨 Exposure", render_exposure),
+    "forecast": ("🔮 Forecast", render_forecast),
+}
+active_view = st.radio(
+    "View", list(VIEWS), format_func=lambda v: VIEWS[v][0],
+    horizontal=True, key="active_view", label_visibility="collapsed"
+)
+with tracer.span("view", view=active_view):
+    VIEWS[active_view][1]()
+
+# ======================================================
+# 14. SHOW RAW DATA OPTION
 # ======================================================
 if st.sidebar.checkbox("Show Raw Data"):
     st.subheader("📝 Raw Data")
-    st.dataframe(df_filtered)
+    render_table(ctx.rows(), "raw_table")
+
+# ======================================================
+# 15. PERFORMANCE PANEL
+# ======================================================
+st.sidebar.toggle("Performance", key="perf_enabled")
+if tracer.enabled:
+    cache_stats = figure_cache.stats()
+    tracer.event("figure_cache", **cache_stats)
+    with st.sidebar.expander("Performance", expanded=True):
+        if tracer.memory:
+            st.caption("peak_mb: perkiraan (tracemalloc mencakup alokasi semua sesi di proses ini)")
+        run_events = pd.DataFrame(tracer.run_events())
+        if not run_events.empty:
+            spans = run_events.dropna(subset=["ms"]) if "ms" in run_events else run_events.iloc[:0]
+            st.metric("View render (ms)", f"{spans.loc[spans['name'] == 'view', 'ms'].sum():,.1f}")
+            shown = [c for c in ["name", "ms", "peak_mb", "view", "chart", "cache", "payload_bytes",
+                                 "artifact", "by", "source", "rows"] if c in spans]
+            st.dataframe(spans[shown], hide_index=True)
+        st.caption(
+            f"Figure cache: {cache_stats['entries']} entri, {cache_stats['bytes'] / 2**20:.1f} MB, "
+            f"hit {cache_stats['hits']} / miss {cache_stats['misses']} ({cache_stats['hit_rate']:.0%})"
+        )
+        st.download_button(
+            "Download log (JSON lines)", tracer.to_jsonl(), file_name="aqi-dashboard-perf.jsonl",
+            mime="application/x-ndjson"
+        )
@@ -0,0 +1,192 @@
+"""Dataset read-only yang dibagi oleh semua sesi dalam satu proses.
+
+Tabel dibaca dari snapshot Arrow yang di-memory-map (plus segmen delta hasil
+append), masing-masing terurut per (station, datetime). Kolom dikonversi ke
+NumPy sekali saja (lalu dikunci read-only); selama hanya ada satu segmen,
+array menunjuk langsung ke memory map tanpa salinan (kecuali kode kategori
+yang punya nilai kosong). Setelah append, kolom disalin sekali per proses
+sampai `update.py --compact` mengembalikan satu snapshot. Indeks sekunder
+dibangun saat dibuka:
+
+- rentang baris [start, stop) tiap stasiun (satu per segmen),
+- bitmap (np.packbits) per musim,
+- rentang waktu dicari dengan binary search pada datetime tiap stasiun.
+
+Filter stasiun/musim/tanggal menjadi operasi slicing, tanpa hashing
+DataFrame dan tanpa salinan per kombinasi filter.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from impute import IMPUTE_FEATURES, OBSERVED_COLUMN, observed_mask
+from storage import STORE_DIR, arrow_path, open_arrow, read_manifest, sort_by_station_time, write_arrow
+
+
+def _read_only(array):
+    array.flags.writeable = False
+    return array
+
+
+def _to_datetime64(value):
+    return None if value is None else np.datetime64(pd.Timestamp(value), "ns")
+
+
+class Dataset:
+    def __init__(self, tables):
+        tables = [tables] if isinstance(tables, pa.Table) else list(tables)
+        # Snapshot lama (belum terurut) diurutkan di memori
+        tables = [t if self._is_sorted(t) else sort_by_station_time(t).combine_chunks() for t in tables]
+        schema = tables[0].schema
+        self.table = pa.concat_tables([t.select(schema.names).cast(schema) for t in tables]).unify_dictionaries()
+        self.columns = self.table.column_names
+        self.num_rows = self.table.num_rows
+        self._arrays = {}
+        self._categories = {}
+
+        # Rentang baris per stasiun dari batas perubahan kode stasiun. Segmen delta
+        # berisi data yang lebih baru, jadi urutan rentang = urutan waktu.
+        station_codes = self.codes("station")
+        bounds = np.concatenate(([0], np.flatnonzero(np.diff(station_codes)) + 1, [self.num_rows]))
+        self.station_offsets = {}
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            name = self.categories("station")[station_codes[start]]
+            self.station_offsets.setdefault(name, []).append((int(start), int(stop)))
+        self.stations = sorted(self.station_offsets)
+
+        season_codes = self.codes("season")
+        self.season_bitmaps = {}
+        for i, name in enumerate(self.categories("season")):
+            mask = season_codes == i
+            if mask.any():
+                self.season_bitmaps[name] = _read_only(np.packbits(mask))
+        self.seasons = list(self.season_bitmaps)
+
+        datetimes = self.array("datetime")
+        self.time_range = (datetimes.min(), datetimes.max()) if self.num_rows else (None, None)
+
+    @staticmethod
+    def _is_sorted(table):
+        station = table["station"].combine_chunks()
+        codes = station.indices.to_numpy()
+        names = station.dictionary.to_pylist()
+        if names != sorted(names) or np.any(np.diff(codes) < 0):
+            return False
+        datetimes = table["datetime"].to_numpy()
+        same_station = np.diff(codes) == 0
+        return not np.any(np.diff(datetimes)[same_station] < np.timedelta64(0))
+
+    @classmethod
+    def open(cls, root=STORE_DIR):
+        if not os.path.exists(arrow_path(root)) or read_manifest(root) is None:
+            write_arrow(root)
+        return cls(open_arrow(root))
+
+    def _is_dictionary(self, name):
+        return pa.types.is_dictionary(self.table.schema.field(name).type)
+
+    def _chunk(self, name):
+        # Satu segmen: buffer langsung dari memory map. Begitu ada segmen delta,
+        # kolom digabung (disalin) per proses sampai `update.py --compact`
+        # melebur delta kembali menjadi satu snapshot.
+        column = self.table[name]
+        return column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+
+    def categories(self, name):
+        if name not in self._categories:
+            self._categories[name] = self._chunk(name).dictionary.to_pylist()
+        return self._categories[name]
+
+    def codes(self, name):
+        """Kode integer kolom kategori (-1 untuk nilai kosong)."""
+        key = (name, "codes")
+        if key not in self._arrays:
+            indices = self._chunk(name).indices
+            # fill_null selalu menyalin; hanya kolom yang punya nilai kosong dibayar
+            if indices.null_count:
+                indices = indices.fill_null(-1)
+            self._arrays[key] = _read_only(indices.to_numpy(zero_copy_only=False))
+        return self._arrays[key]
+
+    def array(self, name):
+        """Kolom non-kategori sebagai array NumPy read-only (dikonversi sekali)."""
+        if name not in self._arrays:
+            self._arrays[name] = _read_only(self._chunk(name).to_numpy(zero_copy_only=False))
+        return self._arrays[name]
+
+    def observed(self, feature, rows=slice(None)):
+        """Mask baris `rows` yang nilai `feature`-nya terukur (bukan kosong, bukan hasil imputasi).
+
+        Store tanpa imputasi tidak punya kolom bitmask; di sana semua nilai terisi terukur.
+        """
+        mask = ~np.isnan(self.array(feature)[rows])
+        if OBSERVED_COLUMN in self.columns and feature in IMPUTE_FEATURES:
+            mask &= observed_mask(self.array(OBSERVED_COLUMN)[rows], feature)
+        return mask
+
+    def row_ranges(self, station=None, start=None, end=None):
+        """Rentang baris [a, b) untuk stasiun & waktu [start, end) via binary search."""
+        if station is None:
+            ranges = [r for name in self.stations for r in self.station_offsets[name]]
+        elif station in self.station_offsets:
+            ranges = list(self.station_offsets[station])
+        else:
+            return []
+        start, end = _to_datetime64(start), _to_datetime64(end)
+        if start is None and end is None:
+            return ranges
+
+        datetimes = self.array("datetime")
+        result = []
+        for a, b in ranges:
+            lo = a + np.searchsorted(datetimes[a:b], start, "left") if start is not None else a
+            hi = a + np.searchsorted(datetimes[a:b], end, "left") if end is not None else b
+            if lo < hi:
+                result.append((int(lo), int(hi)))
+        return result
+
+    def _season_bits(self, seasons, a, b):
+        # Buka hanya byte bitmap yang mencakup baris [a, b)
+        first, last = a // 8, (b + 7) // 8
+        bits = np.zeros(last - first, dtype=np.uint8)
+        for season in seasons:
+            if season in self.season_bitmaps:
+                bits |= self.season_bitmaps[season][first:last]
+        return np.unpackbits(bits)[a - first * 8:b - first * 8].astype(bool)
+
+    def rows(self, seasons=None, station=None, start=None, end=None):
+        """Indeks baris terpilih, atau slice jika hasilnya satu rentang utuh."""
+        ranges = []
+        for a, b in self.row_ranges(station, start, end):
+            # Gabungkan rentang yang bersebelahan (mis. semua stasiun tanpa filter waktu)
+            if ranges and ranges[-1][1] == a:
+                ranges[-1] = (ranges[-1][0], b)
+            else:
+                ranges.append((a, b))
+        all_seasons = seasons is None or set(self.seasons) <= set(seasons)
+        if all_seasons and len(ranges) == 1:
+            return slice(*ranges[0])
+
+        parts = []
+        for a, b in ranges:
+            if all_seasons:
+                parts.append(np.arange(a, b))
+            else:
+                parts.append(a + np.flatnonzero(self._season_bits(seasons, a, b)))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def frame(self, columns=None, seasons=None, station=None, start=None, end=None):
+        """DataFrame berisi baris & kolom terpilih saja."""
+        return self.take(self.rows(seasons, station, start, end), columns)
+
+    def take(self, rows, columns=None):
+        """DataFrame untuk indeks/slice baris `rows` dan kolom `columns` saja."""
+        data = {}
+        for name in columns or self.columns:
+            if self._is_dictionary(name):
+                data[name] = pd.Categorical.from_codes(self.codes(name)[rows], self.categories(name))
+            else:
+                data[name] = self.array(name)[rows]
+        return pd.DataFrame(data)
@@ -0,0 +1,89 @@
+"""Downsampling time series di sisi server sebelum dikirim ke Plotly.
+
+Dua metode tersedia:
+- LTTB (Largest-Triangle-Three-Buckets): mempertahankan bentuk visual kurva.
+- Min-max: menyimpan titik minimum & maksimum per bucket waktu (per "piksel"),
+  sehingga puncak polusi tidak pernah hilang.
+
+Jumlah titik keluaran dibatasi `n_out` berapa pun panjang data masukan.
+"""
+import numpy as np
+
+METHODS = ("lttb", "minmax")
+
+
+def _clean(x, y):
+    x = np.asarray(x)
+    y = np.asarray(y, dtype="float64")
+    keep = ~np.isnan(y)
+    return x[keep], y[keep]
+
+
+def _as_float(x):
+    # datetime64 -> angka (ns) agar bisa dipakai dalam perhitungan luas segitiga
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype("int64").astype("float64")
+    return x.astype("float64")
+
+
+def lttb_indices(x, y, n_out):
+    """Indeks titik terpilih LTTB; x harus terurut naik dan y tanpa NaN."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    xf = _as_float(x)
+
+    # Titik pertama & terakhir selalu dipakai; sisanya dibagi n_out - 2 bucket
+    # [edges[i], edges[i + 1]). Bucket setelah yang terakhir adalah titik akhir.
+    every = (n - 2) / (n_out - 2)
+    edges = np.minimum(np.floor(np.arange(n_out) * every).astype(np.int64) + 1, n)
+    # Rata-rata bucket berikutnya (titik "c") untuk semua bucket sekaligus
+    csum_x = np.concatenate(([0.0], np.cumsum(xf)))
+    csum_y = np.concatenate(([0.0], np.cumsum(y)))
+    starts, ends = edges[1:-1], edges[2:]
+    avg_x = (csum_x[ends] - csum_x[starts]) / (ends - starts)
+    avg_y = (csum_y[ends] - csum_y[starts]) / (ends - starts)
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        bx, by = xf[lo:hi], y[lo:hi]
+        area = np.abs((xf[a] - avg_x[i]) * (by - y[a]) - (xf[a] - bx) * (avg_y[i] - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(x, y, n_buckets):
+    """Indeks titik min & max per bucket waktu dengan lebar sama."""
+    n = len(y)
+    if n <= 2 * n_buckets:
+        return np.arange(n)
+    xf = _as_float(x)
+    span = xf[-1] - xf[0]
+    if span > 0:
+        bucket = np.minimum(((xf - xf[0]) / span * n_buckets).astype(np.int64), n_buckets - 1)
+    else:
+        bucket = np.zeros(n, dtype=np.int64)
+
+    # Urutkan per (bucket, y): elemen pertama tiap bucket = min, terakhir = max
+    order = np.lexsort((y, bucket))
+    sorted_bucket = bucket[order]
+    boundary = np.flatnonzero(np.diff(sorted_bucket)) + 1
+    first = np.concatenate(([0], boundary))
+    last = np.concatenate((boundary - 1, [n - 1]))
+    return np.unique(np.concatenate((order[first], order[last])))
+
+
+def downsample(x, y, n_out=2000, method="lttb"):
+    """Kembalikan (x, y) dengan paling banyak n_out titik (NaN dibuang)."""
+    if method not in METHODS:
+        raise ValueError(f"Metode downsampling tidak dikenal: {method!r}")
+    x, y = _clean(x, y)
+    if method == "lttb":
+        idx = lttb_indices(x, y, n_out)
+    else:
+        idx = minmax_indices(x, y, max(n_out // 2, 1))
+    return x[idx], y[idx]
@@ -0,0 +1,198 @@
+"""Analitik paparan: rata-rata bergerak 24/8 jam dan hari melampaui ambang AQI.
+
+Deret per jam semua stasiun diambil dari dataset (terurut per stasiun & waktu)
+sebagai satu array panjang. Hanya jam terukur yang dipakai: nilai hasil
+imputasi (lihat `Dataset.observed`) dianggap kosong, sehingga syarat cakupan
+75% dihitung dari observasi asli. Rata-rata bergerak dihitung dengan jumlah kumulatif,
+mean(i) = (S[i] - S[lo]) / (N[i] - N[lo]), dengan awal jendela `lo` dicari lewat
+binary search pada kunci (stasiun, jam), sehingga jendela tidak pernah melewati
+batas stasiun maupun jam yang hilang. Ringkasan harian per stasiun (rata-rata
+24 jam, maksimum 1 jam, maksimum rata-rata 8 jam) diperoleh dengan
+`ufunc.reduceat` pada batas hari, lalu AQI harian US EPA & HJ 633 dihitung dari
+ringkasan itu. Tidak ada loop Python per baris, sehingga tabel harian cukup
+murah untuk dihitung ulang setiap kali data diperbarui.
+"""
+import numpy as np
+import pandas as pd
+
+from aqi import DAILY_TABLES, STANDARDS, UNIT_FACTORS, sub_index
+
+ROLLING_WINDOWS = {"PM2.5": 24, "PM10": 24, "O3": 8, "CO": 8}
+# Rata-rata dianggap sah jika minimal 75% jam dalam jendela/hari terukur
+MIN_COVERAGE = 0.75
+EXCEEDANCE_AQI = 100
+STANDARD_LABELS = {"US": "US EPA", "CN": "China HJ 633"}
+
+# Ringkasan harian yang menjadi input AQI harian tiap standar
+DAILY_INPUTS = {
+    "US": {"PM2.5": "PM2.5_24h", "PM10": "PM10_24h", "SO2": "SO2_1h_max", "NO2": "NO2_1h_max",
+           "CO": "CO_8h_max", "O3": "O3_8h_max"},
+    "CN": {"PM2.5": "PM2.5_24h", "PM10": "PM10_24h", "SO2": "SO2_24h", "NO2": "NO2_24h",
+           "CO": "CO_24h", "O3": "O3_8h_max"},
+}
+HOUR = np.timedelta64(1, "h")
+
+
+def aqi_column(standard):
+    return f"AQI_{standard}"
+
+
+def exceed_column(standard):
+    return f"exceed_{standard}"
+
+
+def series_ranges(dataset, station=None):
+    """[(posisi stasiun, a, b)] rentang baris deret per jam, terurut per (stasiun, waktu).
+
+    Posisi mengikuti `dataset.stations` (urut nama), bukan kode kamus stasiun:
+    setelah segmen delta digabung, kode kamus mengikuti urutan kemunculan.
+    """
+    stations = dataset.stations if station is None else [station]
+    return [(i, a, b) for i, name in enumerate(stations) for a, b in dataset.station_offsets.get(name, [])]
+
+
+def _range_rows(ranges):
+    if not ranges:
+        return np.empty(0, dtype=np.int64)
+    if all(a == prev_b for (_, _, prev_b), (_, a, _) in zip(ranges, ranges[1:])):
+        return slice(ranges[0][1], ranges[-1][2])
+    return np.concatenate([np.arange(a, b) for _, a, b in ranges])
+
+
+def series_rows(dataset, station=None):
+    """Baris deret per jam terurut per (stasiun, waktu), termasuk segmen delta.
+
+    Berupa slice (tanpa salinan) jika rentang semua stasiun bersambung.
+    """
+    return _range_rows(series_ranges(dataset, station))
+
+
+def observed_values(dataset, feature, rows):
+    """Nilai float64 `feature` pada `rows`; jam kosong/hasil imputasi menjadi NaN."""
+    values = dataset.array(feature)[rows].astype(np.float64)
+    values[~dataset.observed(feature, rows)] = np.nan
+    return values
+
+
+def hour_keys(datetimes, stations, pad=max(ROLLING_WINDOWS.values())):
+    """Kunci monoton (stasiun, jam) dan tanggal awalnya.
+
+    `stations` adalah posisi stasiun per baris (tidak menurun, lihat
+    `series_ranges`). Jam dihitung dari tengah malam hari pertama dan jarak
+    antar stasiun adalah kelipatan 24 jam yang lebih besar dari `pad`,
+    sehingga `keys // 24` juga merupakan kunci (stasiun, hari).
+    """
+    base = datetimes.min().astype("datetime64[D]")
+    hours = (datetimes - base) // HOUR
+    span = -(-(int(hours.max()) + pad + 1) // 24) * 24
+    return stations.astype(np.int64) * span + hours, base, span
+
+
+def rolling_mean(values, keys, window, min_coverage=MIN_COVERAGE):
+    """Rata-rata `window` jam terakhir (termasuk jam ini) per baris via jumlah kumulatif.
+
+    `values` float64; `keys` kunci jam monoton dari `hour_keys`.
+    """
+    valid = ~np.isnan(values)
+    # S[0] = N[0] = 0 sehingga jendela yang dimulai di baris pertama tetap benar
+    sums = np.zeros(len(values) + 1)
+    np.cumsum(np.where(valid, values, 0.0), out=sums[1:])
+    counts = np.zeros(len(values) + 1, dtype=np.int32)
+    np.cumsum(valid, out=counts[1:])
+    lo = np.searchsorted(keys, keys - (window - 1), "left")
+    n = counts[1:] - counts[lo]
+    mean = sums[1:]
+    mean -= sums[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean /= n
+    mean[n < np.ceil(window * min_coverage)] = np.nan
+    return mean
+
+
+def rolling_series(dataset, station, pollutant):
+    """(datetime, rata-rata bergerak) satu stasiun untuk jendela standar polutan."""
+    rows = series_rows(dataset, station)
+    times = dataset.array("datetime")[rows]
+    keys, _, _ = hour_keys(times, np.zeros(len(times), dtype=np.int64))
+    return times, rolling_mean(observed_values(dataset, pollutant, rows), keys, ROLLING_WINDOWS[pollutant])
+
+
+def _day_mean(values, starts):
+    valid = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(valid, values, 0.0), starts)
+    counts = np.add.reduceat(valid.astype(np.int64), starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = sums / counts
+    mean[counts < np.ceil(24 * MIN_COVERAGE)] = np.nan
+    return mean
+
+
+def daily_exposure(dataset):
+    """Tabel harian per stasiun: ringkasan polutan, AQI harian & flag lampau ambang tiap standar."""
+    ranges = series_ranges(dataset)
+    rows = _range_rows(ranges)
+    times = dataset.array("datetime")[rows]
+    stations = np.repeat([i for i, _, _ in ranges], [b - a for _, a, b in ranges])
+    keys, base, span = hour_keys(times, stations)
+
+    # Batas hari: kunci (stasiun, hari) berganti (deret sudah terurut per stasiun & waktu)
+    day_keys = keys // 24
+    starts = np.flatnonzero(np.concatenate(([True], day_keys[1:] != day_keys[:-1])))
+    del day_keys
+
+    # Satu polutan dikonversi pada satu waktu agar memori puncak tetap kecil
+    def values(p):
+        return observed_values(dataset, p, rows)
+
+    columns = {f"{p}_24h": _day_mean(values(p), starts) for p in ["PM2.5", "PM10", "SO2", "NO2", "CO"]}
+    for p in ["SO2", "NO2"]:
+        columns[f"{p}_1h_max"] = np.fmax.reduceat(values(p), starts)
+    for p in ["CO", "O3"]:
+        columns[f"{p}_8h_max"] = np.fmax.reduceat(rolling_mean(values(p), keys, ROLLING_WINDOWS[p]), starts)
+
+    daily = pd.DataFrame({
+        "station": pd.Categorical.from_codes(stations[starts], dataset.stations),
+        "date": base + (keys[starts] % span) // 24,
+        "season": pd.Categorical.from_codes(dataset.codes("season")[rows][starts], dataset.categories("season")),
+        **columns,
+    })
+    for standard in STANDARDS:
+        subs = np.column_stack([sub_index(daily[col].to_numpy(), p, standard, daily=True)
+                                for p, col in DAILY_INPUTS[standard].items()])
+        # fmax mengabaikan NaN; hari tanpa satu pun sub-indeks tetap NaN
+        daily[aqi_column(standard)] = np.fmax.reduce(subs, axis=1)
+        daily[exceed_column(standard)] = daily[aqi_column(standard)] > EXCEEDANCE_AQI
+    return daily
+
+
+def filter_daily(daily, seasons=None, station=None, start=None, end=None):
+    """Baris tabel harian untuk filter dashboard (`end` eksklusif)."""
+    mask = np.ones(len(daily), dtype=bool)
+    if seasons is not None:
+        mask &= daily["season"].isin(seasons).to_numpy()
+    if station is not None:
+        mask &= (daily["station"] == station).to_numpy()
+    if start is not None:
+        mask &= (daily["date"] >= start).to_numpy()
+    if end is not None:
+        mask &= (daily["date"] < end).to_numpy()
+    return daily[mask]
+
+
+def exceedance_summary(daily, standard):
+    """Per stasiun: hari dengan AQI harian, hari lampau ambang, persentase & rata-rata AQI harian."""
+    aqi = aqi_column(standard)
+    grouped = daily.groupby("station", observed=True)
+    summary = pd.DataFrame({
+        "days": grouped[aqi].count(),
+        "exceedance_days": grouped[exceed_column(standard)].sum(),
+        "mean_daily_aqi": grouped[aqi].mean(),
+    })
+    summary["exceedance_share"] = summary["exceedance_days"] / summary["days"] * 100
+    return summary.sort_values("exceedance_days", ascending=False).reset_index()
+
+
+def threshold(pollutant, standard):
+    """Konsentrasi (satuan data, ug/m3) dengan sub-indeks harian = EXCEEDANCE_AQI."""
+    _, c_hi, _, i_hi = DAILY_TABLES[standard][pollutant]
+    return c_hi[np.searchsorted(i_hi, EXCEEDANCE_AQI)] / UNIT_FACTORS[standard][pollutant]
@@ -0,0 +1,115 @@
+"""Cache LRU untuk figure Plotly yang sudah diserialisasi (JSON).
+
+Satu cache dibagi oleh semua sesi dalam satu proses. Kunci berisi id chart,
+filter yang sudah dinormalisasi dan versi data (lihat `ViewContext.cache_key`),
+sehingga kombinasi populer (mis. AQI_True / semua stasiun / semua musim) cukup
+dibangun sekali. Entri dibatasi total ukuran (byte) dengan eviksi LRU dan
+kedaluwarsa setelah TTL. Build untuk kunci yang sama dijalankan sekali saja
+walau diminta banyak sesi bersamaan; sesi lain menunggu hasilnya.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+
+MAX_BYTES = 64 * 2**20
+TTL_SECONDS = 60 * 60
+
+
+class FigureCache:
+    def __init__(self, max_bytes=MAX_BYTES, ttl=TTL_SECONDS, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (payload, size, expires_at)
+        self._pending = {}  # key -> threading.Event untuk build yang sedang berjalan
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, key):
+        # Dipanggil dengan lock dipegang
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        payload, size, expires_at = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.bytes -= size
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def get(self, key):
+        with self._lock:
+            payload = self._lookup(key)
+            if payload is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return payload
+
+    def put(self, key, payload):
+        size = len(payload.encode())
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (payload, size, self._clock() + self.ttl)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def get_or_build(self, key, build):
+        """Payload JSON untuk `key`; `build()` (-> str) dipanggil hanya saat miss."""
+        while True:
+            with self._lock:
+                payload = self._lookup(key)
+                if payload is not None:
+                    self.hits += 1
+                    return payload
+                pending = self._pending.get(key)
+                if pending is None:
+                    self.misses += 1
+                    pending = self._pending[key] = threading.Event()
+                    owner = True
+                else:
+                    owner = False
+            if not owner:
+                # Sesi lain sedang membangun kunci ini; tunggu lalu cek ulang
+                pending.wait()
+                continue
+            try:
+                payload = build()
+                self.put(key, payload)
+                return payload
+            finally:
+                with self._lock:
+                    del self._pending[key]
+                pending.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries), "bytes": self.bytes, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def to_figure(payload):
+    """Figure dari payload cache tanpa validasi ulang (payload berasal dari figure valid)."""
+    return go.Figure(json.loads(payload), _validate=False)
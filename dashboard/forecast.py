@@ -0,0 +1,305 @@
+"""Prakiraan AQI_True & PM2.5 24 jam ke depan per stasiun.
+
+Fitur dibangun dari deret per jam satu stasiun (grid per jam hasil ingest)
+dengan operasi shift/rolling tervektorisasi: lag target, rata-rata bergerak,
+polutan & cuaca jam ini, perubahan tekanan/titik embun 24 jam, vektor angin,
+serta siklus jam & hari dalam tahun. Untuk tiap stasiun × target dilatih satu
+HistGradientBoostingRegressor per horizon jangkar (HORIZONS) pada data sebelum
+HOLDOUT_DAYS hari terakhir; prakiraan per jam 1-24 diinterpolasi linear di
+antara horizon jangkar.
+
+Stasiun dilatih paralel dalam process pool (dataset dibuka sekali per worker).
+Model hanya dilatih pada jam yang target-nya terukur (bukan hasil imputasi) dan
+disimpan dengan joblib di `store/_models/<versi>/` bersama metrik holdout (MAE
+model vs persistensi, juga hanya pada jam terukur); `_models/manifest.json` menunjuk versi terkini dan versi
+lama dibersihkan setelah KEEP_VERSIONS. Pelatihan hanya lewat CLI ini (operator),
+tidak dari dashboard.
+
+    python dashboard/forecast.py [--stations Dongsi,Tiantan] [--workers 4]
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import HistGradientBoostingRegressor
+
+from aqi import POLLUTANTS
+from dataset import Dataset
+from impute import OBSERVED_COLUMN, observed_mask
+from storage import STORE_DIR, WIND_DIRECTIONS, new_version, read_manifest
+
+TARGETS = ["AQI_True", "PM2.5"]
+# Horizon (jam) yang punya model sendiri; jam lain diinterpolasi
+HORIZONS = [1, 2, 3, 6, 12, 18, 24]
+FORECAST_HOURS = 24
+LAGS = [0, 1, 2, 3, 6, 12, 24, 48]
+ROLLING_HOURS = [6, 24]
+EXOGENOUS = ["PM10", "SO2", "NO2", "CO", "O3", "TEMP", "PRES", "DEWP", "RAIN", "WSPM"]
+# Jumlah jam riwayat yang dibutuhkan satu baris fitur
+HISTORY_HOURS = max(LAGS + ROLLING_HOURS) + 1
+HOLDOUT_DAYS = 60
+GBM_PARAMS = {"max_iter": 60, "learning_rate": 0.2, "early_stopping": False}
+
+MODEL_DIR = "_models"
+MODEL_MANIFEST = "manifest.json"
+# Naikkan jika fitur atau isi bundle model berubah; model format lama diabaikan
+MODEL_FORMAT = 3
+KEEP_VERSIONS = 2
+INPUT_COLUMNS = ["datetime", "wd"] + list(dict.fromkeys(TARGETS + EXOGENOUS))
+# Kolom ukur yang harus terukur agar nilai target dianggap observasi asli
+TARGET_INPUTS = {"AQI_True": POLLUTANTS, "PM2.5": ["PM2.5"]}
+
+# Dataset per proses worker (dimuat sekali oleh initializer)
+_worker = {}
+
+
+def station_frame(dataset, station, start=None):
+    """Deret per jam satu stasiun (index datetime) di grid per jam yang lengkap."""
+    columns = INPUT_COLUMNS + ([OBSERVED_COLUMN] if OBSERVED_COLUMN in dataset.columns else [])
+    frame = dataset.take(dataset.rows(None, station, start), columns).set_index("datetime")
+    frame = frame[~frame.index.duplicated(keep="last")]
+    return frame.asfreq("h") if len(frame) else frame
+
+
+def lag_features(frame):
+    """Matriks fitur (satu baris per jam) dari deret per jam satu stasiun."""
+    features = {}
+    for target in TARGETS:
+        values = frame[target].astype(np.float32)
+        for lag in LAGS:
+            features[f"{target}_lag{lag}"] = values.shift(lag)
+        for window in ROLLING_HOURS:
+            features[f"{target}_mean{window}"] = values.rolling(window, min_periods=1).mean()
+        features[f"{target}_max24"] = values.rolling(24, min_periods=1).max()
+    for col in EXOGENOUS:
+        features[col] = frame[col].astype(np.float32)
+    features["PRES_diff24"] = features["PRES"].diff(24)
+    features["DEWP_diff24"] = features["DEWP"].diff(24)
+    # Arah angin (16 arah, 22.5° per arah) sebagai vektor berbobot kecepatan
+    codes = pd.Categorical(frame["wd"], categories=WIND_DIRECTIONS).codes
+    angle = np.where(codes >= 0, np.radians(codes * 22.5), np.nan)
+    features["wind_u"] = np.sin(angle) * features["WSPM"]
+    features["wind_v"] = np.cos(angle) * features["WSPM"]
+    hour = 2 * np.pi * frame.index.hour / 24
+    day = 2 * np.pi * frame.index.dayofyear / 365.25
+    features.update(hour_sin=np.sin(hour), hour_cos=np.cos(hour), day_sin=np.sin(day), day_cos=np.cos(day))
+    return pd.DataFrame(features, index=frame.index).astype(np.float32)
+
+
+def observed_target(frame, target):
+    """Mask jam dengan nilai target terukur (tidak kosong & tidak dari input hasil imputasi)."""
+    observed = frame[target].notna().to_numpy()
+    if OBSERVED_COLUMN in frame:
+        # Jam yang disisipkan asfreq tidak punya bitmask: dianggap tidak terukur
+        bits = frame[OBSERVED_COLUMN].fillna(0).to_numpy(np.uint16)
+        for feature in TARGET_INPUTS[target]:
+            observed &= observed_mask(bits, feature)
+    return observed
+
+
+def horizon_targets(frame, target):
+    """Nilai target h jam ke depan untuk setiap horizon jangkar (kolom = HORIZONS)."""
+    values = frame[target].astype(np.float32)
+    return pd.concat({h: values.shift(-h) for h in HORIZONS}, axis=1)
+
+
+def _fit(X, y):
+    return HistGradientBoostingRegressor(**GBM_PARAMS).fit(X, y)
+
+
+def train_station(dataset, station, holdout_days=HOLDOUT_DAYS):
+    """Model & metrik holdout satu stasiun untuk semua target dan horizon jangkar.
+
+    Model dilatih pada data sebelum `holdout_days` hari terakhir dan dinilai
+    pada hari-hari itu, jadi metrik yang disimpan berlaku untuk model yang dipakai.
+    Jam yang target-nya hasil imputasi tidak ikut dilatih maupun dinilai, agar
+    model tidak belajar meniru interpolasi gap.
+    """
+    frame = station_frame(dataset, station)
+    X = lag_features(frame)
+    # Riwayat pendek (< 2× holdout) dilatih seluruhnya tanpa metrik holdout
+    split = len(X) - holdout_days * 24 if len(X) > 2 * holdout_days * 24 else len(X)
+    bundle = {"models": {}, "metrics": {}}
+    for target in TARGETS:
+        Y = horizon_targets(frame, target)
+        current = X[f"{target}_lag0"].to_numpy()
+        # Baris tanpa target (akhir deret/target kosong) tidak ikut dilatih maupun dinilai
+        valid = Y.notna().to_numpy() & ~np.isnan(current)[:, None]
+        measured = observed_target(frame, target)
+        models, mae, persistence = [], [], []
+        for i, h in enumerate(HORIZONS):
+            y = Y[h].to_numpy()
+            # Target h jam ke depan harus terukur agar baris ikut dilatih & dinilai
+            scored = np.zeros(len(X), dtype=bool)
+            scored[:len(X) - h] = measured[h:]
+            train = np.flatnonzero(valid[:split, i] & scored[:split])
+            test = split + np.flatnonzero(valid[split:, i] & scored[split:])
+            models.append(_fit(X.iloc[train], y[train]))
+            if len(test):
+                mae.append(float(np.abs(models[-1].predict(X.iloc[test]) - y[test]).mean()))
+                persistence.append(float(np.abs(current[test] - y[test]).mean()))
+            else:
+                mae.append(None)
+                persistence.append(None)
+        bundle["models"][target] = models
+        bundle["metrics"][target] = {"mae": mae, "persistence_mae": persistence}
+    bundle.update(station=station, features=list(X.columns), rows=int(len(X)))
+    return bundle
+
+
+def models_path(root=STORE_DIR):
+    return os.path.join(root, MODEL_DIR)
+
+
+def read_model_manifest(root=STORE_DIR):
+    path = os.path.join(models_path(root), MODEL_MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    return manifest if manifest.get("format") == MODEL_FORMAT else None
+
+
+def _write_model_manifest(manifest, root):
+    path = os.path.join(models_path(root), MODEL_MANIFEST)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(f"{path}.tmp", path)
+
+
+def _model_file(station):
+    return f"{station}.joblib"
+
+
+def _init_worker(root):
+    _worker["dataset"] = Dataset.open(root)
+
+
+def _train(args):
+    station, out_dir, holdout_days = args
+    start = time.perf_counter()
+    bundle = train_station(_worker["dataset"], station, holdout_days)
+    bundle.update(format=MODEL_FORMAT, horizons=HORIZONS, targets=TARGETS, sklearn=sklearn.__version__)
+    joblib.dump(bundle, os.path.join(out_dir, _model_file(station)), compress=3)
+    return station, {"file": _model_file(station), "metrics": bundle["metrics"], "rows": bundle["rows"],
+                     "seconds": round(time.perf_counter() - start, 2)}
+
+
+def train(root=STORE_DIR, stations=None, workers=1, holdout_days=HOLDOUT_DAYS):
+    """Latih model stasiun (paralel; default semua) sebagai versi baru; kembalikan entri manifest versinya."""
+    _init_worker(root)
+    stations = _worker["dataset"].stations if stations is None else list(stations)
+    version = str(new_version())
+    out_dir = os.path.join(models_path(root), version)
+    os.makedirs(out_dir)
+    tasks = [(s, out_dir, holdout_days) for s in stations]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(root,)) as pool:
+            entries = dict(pool.map(_train, tasks))
+    else:
+        entries = dict(map(_train, tasks))
+
+    # Melatih sebagian stasiun: model stasiun lain dibawa dari versi terkini
+    manifest = read_model_manifest(root) or {"format": MODEL_FORMAT, "versions": {}}
+    if manifest["versions"]:
+        current = manifest["current"]
+        for station, info in manifest["versions"][current]["stations"].items():
+            if station not in entries:
+                shutil.copy2(os.path.join(models_path(root), current, info["file"]), out_dir)
+                entries[station] = info
+
+    # Versi baru baru terlihat setelah manifest ditulis; versi lama dibersihkan
+    manifest["versions"][version] = {
+        "data_version": read_manifest(root)["versions"]["dataset"],
+        "trained_at": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "sklearn": sklearn.__version__, "horizons": HORIZONS, "stations": entries,
+    }
+    manifest["current"] = version
+    for old in sorted(manifest["versions"], key=int)[:-KEEP_VERSIONS]:
+        del manifest["versions"][old]
+        shutil.rmtree(os.path.join(models_path(root), old), ignore_errors=True)
+    _write_model_manifest(manifest, root)
+    return manifest["versions"][version]
+
+
+def load_models(root=STORE_DIR, version=None):
+    """{stasiun: bundle model} untuk versi terkini (atau `version`); {} jika belum ada."""
+    manifest = read_model_manifest(root)
+    if manifest is None:
+        return {}
+    version = version or manifest["current"]
+    entry = manifest["versions"][version]
+    return {station: joblib.load(os.path.join(models_path(root), version, info["file"]))
+            for station, info in entry["stations"].items()}
+
+
+def forecast(dataset, models):
+    """Prakiraan per jam 1-24 dari jam terakhir tiap stasiun.
+
+    Kolom: station, target, origin, horizon, datetime, prediction, mae (MAE
+    holdout model, diinterpolasi antar horizon jangkar).
+    """
+    hours = np.arange(1, FORECAST_HOURS + 1)
+    times = dataset.array("datetime")
+    parts = []
+    for station, bundle in models.items():
+        if not dataset.station_offsets.get(station):
+            continue
+        # Cukup riwayat HISTORY_HOURS jam terakhir untuk satu baris fitur
+        last = pd.Timestamp(max(times[b - 1] for _, b in dataset.station_offsets[station]))
+        frame = station_frame(dataset, station, last - pd.Timedelta(hours=HISTORY_HOURS))
+        X = lag_features(frame)[bundle["features"]].iloc[[-1]]
+        for target, models_ in bundle["models"].items():
+            anchors = np.array([m.predict(X)[0] for m in models_])
+            mae = np.array([np.nan if v is None else v for v in bundle["metrics"][target]["mae"]])
+            parts.append(pd.DataFrame({
+                "station": station, "target": target, "origin": last, "horizon": hours,
+                "datetime": last + pd.to_timedelta(hours, unit="h"),
+                "prediction": np.maximum(np.interp(hours, bundle["horizons"], anchors), 0.0),
+                "mae": np.interp(hours, bundle["horizons"], mae),
+            }))
+    if not parts:
+        return None
+    return pd.concat(parts, ignore_index=True)
+
+
+def skill_table(manifest_entry):
+    """Per stasiun × target: MAE holdout rata-rata semua horizon, model vs persistensi."""
+    rows = []
+    for station, info in manifest_entry["stations"].items():
+        for target, metrics in info["metrics"].items():
+            mae = [v for v in metrics["mae"] if v is not None]
+            persistence = [v for v in metrics["persistence_mae"] if v is not None]
+            rows.append({"station": station, "target": target,
+                         "mae": np.mean(mae) if mae else np.nan,
+                         "persistence_mae": np.mean(persistence) if persistence else np.nan})
+    table = pd.DataFrame(rows, columns=["station", "target", "mae", "persistence_mae"])
+    table["skill"] = (1 - table["mae"] / table["persistence_mae"]) * 100
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latih model prakiraan AQI_True & PM2.5 per stasiun")
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--stations", help="stasiun dipisah koma (default: semua)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="jumlah proses paralel")
+    parser.add_argument("--holdout-days", type=int, default=HOLDOUT_DAYS,
+                        help="hari terakhir untuk metrik holdout")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    entry = train(args.store, stations=args.stations.split(",") if args.stations else None,
+                  workers=args.workers, holdout_days=args.holdout_days)
+    print(skill_table(entry).round(2).to_string(index=False))
+    print(f"Model versi {read_model_manifest(args.store)['current']} ({len(entry['stations'])} stasiun) "
+          f"selesai dalam {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
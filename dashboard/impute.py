@@ -0,0 +1,308 @@
+"""Deteksi gap & imputasi deret per jam tiap stasiun.
+
+Baris satu stasiun diletakkan di grid per jam yang teratur (jam yang tidak ada
+di file disisipkan sebagai baris kosong). Untuk setiap kolom ukur, nilai kosong
+dikelompokkan menjadi run (awal, panjang):
+
+- run pendek (≤ MAX_INTERP_HOURS) yang diapit nilai terukur diisi interpolasi
+  linear terhadap waktu,
+- run lain diisi profil musiman-per-jam stasiun (rata-rata per musim × jam),
+- jam yang profilnya pun kosong tetap kosong (metode "missing").
+
+Semua langkah berupa operasi array per kolom (tanpa loop per baris). Run
+disimpan sebagai indeks gap ringkas (run-length) di `store/_gaps/` bersama
+panjang grid per stasiun, sehingga kelengkapan data per stasiun bisa dihitung
+tanpa memindai ulang dataset. Selain itu setiap baris membawa bitmask
+`observed` (bit i = IMPUTE_FEATURES[i] terukur) agar konsumen bisa
+mengecualikan nilai hasil imputasi.
+
+File stasiun bisa diproses per chunk (`hold_position`): ekor chunk yang
+masih berada di dalam gap pendek ditahan dan digabung dengan chunk berikutnya,
+sehingga hasilnya sama dengan membaca file utuh.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from aqi import POLLUTANTS
+from storage import SEASONS, STORE_DIR
+
+IMPUTE_FEATURES = POLLUTANTS + ["TEMP", "PRES", "DEWP", "RAIN", "WSPM"]
+MAX_INTERP_HOURS = 6
+GAP_METHODS = ["interpolated", "profile", "missing"]
+GAP_DIR = "_gaps"
+OBSERVED_COLUMN = "observed"
+RUN_COLUMNS = ["station", "feature", "start", "hours", "method"]
+CALENDAR_COLUMNS = ["year", "month", "day", "hour"]
+HOUR = pd.Timedelta(hours=1)
+
+
+def value_runs(mask):
+    """(awal, panjang) setiap run True pada mask boolean."""
+    edges = np.diff(np.concatenate(([False], mask, [False])).astype(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    return starts, np.flatnonzero(edges == -1) - starts
+
+
+def run_positions(starts, lengths):
+    """Semua posisi yang dicakup run (awal, panjang), berurutan."""
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + offsets
+
+
+def to_hourly_grid(raw, start=None):
+    """Sisipkan baris kosong untuk jam yang hilang pada data mentah satu stasiun.
+
+    Kolom kalender & station baris sisipan diisi dari grid; `start` memaksa grid
+    dimulai lebih awal (mis. satu jam setelah data terakhir di store).
+    """
+    times = pd.to_datetime(raw[CALENDAR_COLUMNS])
+    first = times.min() if start is None else min(pd.Timestamp(start), times.min())
+    grid = pd.date_range(first, times.max(), freq="h")
+    if len(grid) == len(raw) and times.is_monotonic_increasing:
+        return raw
+    station = raw["station"].iloc[0]
+    frame = raw.set_index(times.to_numpy())
+    frame = frame[~frame.index.duplicated(keep="last")].reindex(grid)
+    frame["station"] = station
+    for col in CALENDAR_COLUMNS:
+        frame[col] = getattr(grid, col)
+    return frame.reset_index(drop=True)
+
+
+def season_hour_keys(frame):
+    """Indeks profil (kode musim × 24 + jam) per baris."""
+    codes = pd.Categorical(frame["season"], categories=SEASONS).codes.astype(np.int64)
+    return codes * 24 + frame["hour"].to_numpy(np.int64)
+
+
+def seasonal_hourly_profile(values, keys):
+    """Rata-rata nilai terukur per (musim, jam); NaN untuk sel tanpa observasi."""
+    observed = ~np.isnan(values) & (keys >= 0)
+    size = len(SEASONS) * 24
+    sums = np.bincount(keys[observed], values[observed], minlength=size)
+    counts = np.bincount(keys[observed], minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
+
+
+def profile_totals(frame):
+    """{fitur: [jumlah, cacah]} nilai terukur per (musim, jam); aditif antar chunk."""
+    keys = season_hour_keys(frame)
+    size = len(SEASONS) * 24
+    totals = {}
+    for feature in IMPUTE_FEATURES:
+        if feature not in frame:
+            continue
+        values = frame[feature].to_numpy(np.float64)
+        observed = ~np.isnan(values) & (keys >= 0)
+        totals[feature] = np.stack([np.bincount(keys[observed], values[observed], minlength=size),
+                                    np.bincount(keys[observed], minlength=size)])
+    return totals
+
+
+def totals_profiles(totals):
+    """Profil musiman-per-jam dari `profile_totals` yang sudah dijumlahkan."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {feature: sums / counts for feature, (sums, counts) in totals.items()}
+
+
+def observed_bits(frame):
+    """Bitmask uint16 per baris: bit i menyala jika IMPUTE_FEATURES[i] terukur."""
+    bits = np.zeros(len(frame), np.uint16)
+    for i, feature in enumerate(IMPUTE_FEATURES):
+        if feature in frame:
+            bits |= frame[feature].notna().to_numpy().astype(np.uint16) << i
+    return bits
+
+
+def observed_mask(bits, feature):
+    """Mask boolean nilai `feature` yang terukur dari bitmask `observed`."""
+    return (bits >> IMPUTE_FEATURES.index(feature)) & 1 == 1
+
+
+def hold_position(frame, max_interp=MAX_INTERP_HOURS):
+    """Posisi awal ekor chunk yang harus ditahan agar tidak ada gap pendek terpotong.
+
+    Untuk tiap fitur, run kosong di ujung chunk yang masih ≤ `max_interp` jam
+    bisa menjadi run interior pendek setelah chunk berikutnya dibaca. Posisi p
+    dipilih sedekat mungkin ke ujung sehingga tidak ada run pendek yang
+    melintasi p; run panjang boleh terpotong karena diisi profil apa pun
+    panjang akhirnya. Baris p - 1 ikut ditahan sebagai jangkar interpolasi.
+    Mengembalikan len(frame) jika tidak ada yang perlu ditahan.
+    """
+    features = [f for f in IMPUTE_FEATURES if f in frame]
+    n = len(frame)
+    if not features or n == 0:
+        return n
+    missing = np.isnan(frame[features].to_numpy(np.float64))
+    # Panjang run kosong yang berakhir di setiap posisi
+    positions = np.arange(n)[:, None]
+    last_observed = np.maximum.accumulate(np.where(missing, -1, positions), axis=0)
+    run_length = positions - last_observed
+    trailing = run_length[-1]
+    p = n - trailing[trailing <= max_interp].max(initial=0)
+    if p == n:
+        return n
+    cuts = ~(missing[:-1] & missing[1:] & (run_length[:-1] <= max_interp)).any(axis=1)
+    ok = np.flatnonzero(cuts[:p])
+    # Tidak ada posisi aman: tahan seluruh chunk
+    return int(ok[-1]) + 1 if len(ok) else 0
+
+
+def cube_profiles(cube, station):
+    """Profil musiman-per-jam stasiun dari cuboid "hour" (untuk batch append)."""
+    hour = cube["hour"]
+    hour = hour[hour["station"] == station]
+    keys = season_hour_keys(hour)
+    profiles = {}
+    for feature in IMPUTE_FEATURES:
+        if f"{feature}__sum" not in hour:
+            continue
+        sums = np.bincount(keys, hour[f"{feature}__sum"].to_numpy(float), minlength=len(SEASONS) * 24)
+        counts = np.bincount(keys, hour[f"{feature}__count"].to_numpy(float), minlength=len(SEASONS) * 24)
+        if not counts.any():
+            # Stasiun baru tanpa histori: pakai profil dari batch itu sendiri
+            continue
+        with np.errstate(invalid="ignore", divide="ignore"):
+            profiles[feature] = sums / counts
+    return profiles
+
+
+def impute_gaps(frame, profiles=None, max_interp=MAX_INTERP_HOURS):
+    """Isi gap kolom ukur satu stasiun (sudah di grid per jam & terurut) secara in-place.
+
+    `profiles` (fitur -> array profil) dipakai jika ada; fitur lain memakai
+    profil dari frame itu sendiri. Mengembalikan DataFrame run gap:
+    station, feature, start, hours, method.
+    """
+    profiles = profiles or {}
+    keys = season_hour_keys(frame)
+    times = frame["datetime"].to_numpy()
+    n = len(frame)
+    parts = []
+    for feature in IMPUTE_FEATURES:
+        if feature not in frame:
+            continue
+        values = frame[feature].to_numpy(np.float64, copy=True)
+        missing = np.isnan(values)
+        if not missing.any():
+            continue
+        starts, lengths = value_runs(missing)
+        interior = (starts > 0) & (starts + lengths < n)
+        short = interior & (lengths <= max_interp)
+
+        # Run pendek: interpolasi linear pada posisi grid (= waktu, karena grid per jam)
+        if short.any():
+            observed = np.flatnonzero(~missing)
+            pos = run_positions(starts[short], lengths[short])
+            values[pos] = np.interp(pos, observed, values[observed])
+
+        # Run panjang/di tepi: profil musiman-per-jam (dari observasi asli saja)
+        method = np.where(short, 0, 1).astype(np.int8)
+        if (~short).any():
+            profile = profiles.get(feature)
+            if profile is None:
+                profile = seasonal_hourly_profile(np.where(missing, np.nan, values), keys)
+            pos = run_positions(starts[~short], lengths[~short])
+            values[pos] = profile[keys[pos]]
+            unfilled = np.add.reduceat(np.isnan(values[pos]).astype(np.int64),
+                                       np.cumsum(lengths[~short]) - lengths[~short])
+            method[np.flatnonzero(~short)[unfilled > 0]] = 2
+
+        frame[feature] = values.astype(frame[feature].dtype, copy=False)
+        parts.append(pd.DataFrame({
+            "feature": feature, "start": times[starts],
+            "hours": lengths.astype(np.int32), "method": np.asarray(GAP_METHODS)[method],
+        }))
+    runs = pd.concat(parts, ignore_index=True) if parts else empty_runs()
+    return runs.assign(station=frame["station"].iloc[0] if n else None)[RUN_COLUMNS]
+
+
+def empty_runs():
+    return pd.DataFrame({
+        "station": pd.Series(dtype=object), "feature": pd.Series(dtype=object),
+        "start": pd.Series(dtype="datetime64[ns]"), "hours": pd.Series(dtype=np.int32),
+        "method": pd.Series(dtype=object),
+    })
+
+
+def grid_extent(frame):
+    """Satu baris cakupan grid (awal, akhir, jumlah jam) untuk indeks gap."""
+    return pd.DataFrame({
+        "station": [frame["station"].iloc[0]], "start": [frame["datetime"].iloc[0]],
+        "end": [frame["datetime"].iloc[-1]], "hours": [len(frame)],
+    })
+
+
+def clip_runs(runs, start, end):
+    """Potong run ke rentang waktu [start, end); run di luar rentang dibuang."""
+    run_end = runs["start"] + runs["hours"].astype(np.int64) * HOUR
+    clipped_start = runs["start"].clip(lower=start)
+    hours = (run_end.clip(upper=end) - clipped_start) // HOUR
+    return runs.assign(start=clipped_start, hours=hours.astype(np.int32))[hours > 0]
+
+
+def join_runs(runs):
+    """Gabungkan run bersambung fitur yang sama (run panjang yang terpotong batas chunk).
+
+    Metode gabungan adalah yang paling lemah (interpolated < profile < missing).
+    """
+    if runs.empty:
+        return runs
+    runs = runs.sort_values(["station", "feature", "start"], ignore_index=True)
+    end = runs["start"] + runs["hours"].astype(np.int64) * HOUR
+    same = (runs["station"] == runs["station"].shift()) & (runs["feature"] == runs["feature"].shift())
+    group = (~(same & (runs["start"] == end.shift()))).cumsum()
+    method = pd.Categorical(runs["method"], categories=GAP_METHODS, ordered=True)
+    joined = runs.assign(method=method).groupby(group).agg(
+        station=("station", "first"), feature=("feature", "first"), start=("start", "first"),
+        hours=("hours", "sum"), method=("method", "max"),
+    )
+    return joined.astype({"hours": np.int32, "method": object}).reset_index(drop=True)[RUN_COLUMNS]
+
+
+def merge_gap_indexes(indexes):
+    """Gabungkan indeks gap parsial; run & cakupan grid bersifat aditif."""
+    indexes = [g for g in indexes if g is not None]
+    return {
+        "runs": pd.concat([g["runs"] for g in indexes], ignore_index=True),
+        "grid": pd.concat([g["grid"] for g in indexes], ignore_index=True),
+    }
+
+
+def gaps_path(root=STORE_DIR):
+    return os.path.join(root, GAP_DIR)
+
+
+def save_gaps(gaps, root=STORE_DIR):
+    path = gaps_path(root)
+    os.makedirs(path, exist_ok=True)
+    runs = gaps["runs"].astype({"station": "category", "feature": "category", "method": "category"})
+    runs.to_parquet(os.path.join(path, "runs.parquet"), index=False)
+    gaps["grid"].to_parquet(os.path.join(path, "grid.parquet"), index=False)
+
+
+def gaps_exist(root=STORE_DIR):
+    return all(os.path.exists(os.path.join(gaps_path(root), f"{name}.parquet")) for name in ("runs", "grid"))
+
+
+def load_gaps(root=STORE_DIR):
+    path = gaps_path(root)
+    return {name: pd.read_parquet(os.path.join(path, f"{name}.parquet")) for name in ("runs", "grid")}
+
+
+def completeness(gaps):
+    """Ringkasan per stasiun × fitur: jam grid, jam per metode & persentase terukur."""
+    hours = gaps["grid"].groupby("station", observed=True)["hours"].sum()
+    runs = gaps["runs"].astype({"station": str, "feature": str, "method": str})
+    filled = runs.pivot_table(index=["station", "feature"], columns="method", values="hours",
+                              aggfunc="sum", fill_value=0)
+    index = pd.MultiIndex.from_product([hours.index.astype(str), IMPUTE_FEATURES], names=["station", "feature"])
+    table = filled.reindex(index=index, columns=GAP_METHODS, fill_value=0).astype(np.int64)
+    table = table.rename_axis(columns=None).reset_index()
+    table.insert(2, "hours", table["station"].map(hours).to_numpy(np.int64))
+    table.insert(3, "observed", table["hours"] - table[GAP_METHODS].sum(axis=1))
+    table["completeness"] = table["observed"] / table["hours"] * 100
+    return table
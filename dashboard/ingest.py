@@ -0,0 +1,257 @@
+"""Ingest data mentah PRSA menjadi dataset bersih.
+
+Setiap file stasiun dibaca per chunk (memori terbatas), diletakkan di grid per
+jam lalu gap nilai kosongnya diisi (lihat impute.py) sebelum AQI dihitung;
+opsional satu proses per file stasiun. Profil musiman-per-jam dihitung dalam
+lintasan pertama atas file, dan ekor chunk yang masih di dalam gap pendek
+ditahan sampai chunk berikutnya. `--no-impute` melewati imputasi. Hasilnya ditulis ke store Parquet (default, lihat storage.py) beserta indeks
+gap, atau digabung menjadi satu data_cleaned.csv.
+
+    python dashboard/ingest.py --workers 4 --chunksize 50000
+    python dashboard/ingest.py --format csv
+    python dashboard/ingest.py --no-impute
+"""
+import argparse
+import glob
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from aqi import add_aqi_columns
+from cube import build_cube, cube_exists, merge_cubes, save_cube
+from impute import (
+    HOUR, OBSERVED_COLUMN, clip_runs, grid_extent, hold_position, impute_gaps, join_runs, merge_gap_indexes,
+    observed_bits, profile_totals, save_gaps, to_hourly_grid, totals_profiles,
+)
+from sketches import build_sketches, merge_sketches, save_sketches, sketches_exist
+from storage import STORE_DIR, read_manifest, replace_store, store_exists, store_lock, write_arrow, write_chunk
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RAW_DIR = os.path.join(BASE_DIR, "..", "data")
+RAW_PATTERN = "PRSA_Data_*.csv"
+OUTPUT_PATH = os.path.join(BASE_DIR, "data_cleaned.csv")
+CHUNKSIZE = 50_000
+
+# Indeks = bulan (1-12); indeks 0 tidak dipakai
+SEASON_BY_MONTH = np.array([
+    None,
+    "Winter", "Winter", "Spring", "Spring", "Spring", "Summer",
+    "Summer", "Summer", "Autumn", "Autumn", "Autumn", "Winter",
+], dtype=object)
+
+
+def clean_chunk(chunk, aqi=True):
+    chunk = chunk.drop(columns=["No"], errors="ignore")
+    chunk.insert(0, "datetime", pd.to_datetime(chunk[["year", "month", "day", "hour"]]))
+    chunk["season"] = SEASON_BY_MONTH[chunk["month"].to_numpy()]
+    if aqi:
+        add_aqi_columns(chunk)
+    return chunk
+
+
+def _impute_frame(frame, profiles=None, a=0, b=None):
+    """Imputasi frame di grid per jam; kembalikan baris [a, b) beserta run gap-nya."""
+    frame = frame.copy()
+    frame[OBSERVED_COLUMN] = observed_bits(frame)
+    runs = impute_gaps(frame, profiles)
+    times = frame["datetime"]
+    b = len(frame) if b is None else b
+    runs = clip_runs(runs, times.iloc[a], times.iloc[b - 1] + HOUR)
+    frame = frame.iloc[a:b].reset_index(drop=True)
+    add_aqi_columns(frame)
+    return frame, runs
+
+
+def clean_station(raw, start=None, profiles=None):
+    """Deret bersih satu stasiun di grid per jam dengan gap terisi.
+
+    AQI dihitung dari nilai yang sudah diimputasi. Mengembalikan frame dan
+    indeks gap ({"runs", "grid"}) stasiun tersebut.
+    """
+    frame, runs = _impute_frame(clean_chunk(to_hourly_grid(raw, start), aqi=False), profiles)
+    return frame, {"runs": runs, "grid": grid_extent(frame)}
+
+
+def iter_imputed_chunks(path, chunksize=CHUNKSIZE):
+    """Chunk bersih satu file stasiun dengan gap terisi, memori sebatas satu chunk.
+
+    Lintasan pertama menjumlahkan profil musiman-per-jam; lintasan kedua
+    meletakkan tiap chunk di grid yang melanjutkan chunk sebelumnya. Ekor yang
+    ditahan (`hold_position`) digabung ke chunk berikutnya sehingga hasilnya
+    sama dengan membaca file utuh. Indeks gap ikut chunk terakhir.
+    """
+    totals = {}
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        for feature, total in profile_totals(clean_chunk(chunk, aqi=False)).items():
+            totals[feature] = totals[feature] + total if feature in totals else total
+    profiles = totals_profiles(totals)
+
+    held, skip, start = None, 0, None
+    pending, runs, first, rows = None, [], None, 0
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        grid = clean_chunk(to_hourly_grid(chunk, start), aqi=False)
+        start = grid["datetime"].iloc[-1] + HOUR
+        frame = grid if held is None else pd.concat([held, grid], ignore_index=True)
+        # Baris [0, skip) sudah dikirim (jangkar); [p - 1, n) ditahan untuk chunk berikutnya
+        p = hold_position(frame)
+        if p > skip:
+            if pending is not None:
+                yield pending, None
+            pending, part_runs = _impute_frame(frame, profiles, skip, p)
+            runs.append(part_runs)
+            first = pending["datetime"].iloc[0] if first is None else first
+            rows += len(pending)
+        held, skip = (frame.iloc[p - 1:], 1) if p >= 1 else (frame, skip)
+
+    if held is not None and len(held) > skip:
+        part, part_runs = _impute_frame(held, profiles, skip)
+        pending = part if pending is None else pd.concat([pending, part], ignore_index=True)
+        runs.append(part_runs)
+        first = part["datetime"].iloc[0] if first is None else first
+        rows += len(part)
+    if pending is not None:
+        grid = grid_extent(pending).assign(start=first, hours=rows)
+        yield pending, {"runs": join_runs(pd.concat(runs, ignore_index=True)), "grid": grid}
+
+
+def iter_clean_chunks(path, chunksize=CHUNKSIZE, impute=True):
+    """Chunk bersih satu file stasiun (dengan imputasi: indeks gap ikut chunk terakhir)."""
+    if impute:
+        yield from iter_imputed_chunks(path, chunksize)
+        return
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        yield clean_chunk(chunk), None
+
+
+def ingest_file(path, out_path, chunksize=CHUNKSIZE, impute=True):
+    """Tulis versi bersih satu file stasiun ke out_path, chunk demi chunk."""
+    rows = 0
+    for i, (chunk, _) in enumerate(iter_clean_chunks(path, chunksize, impute)):
+        chunk.to_csv(out_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        rows += len(chunk)
+    return rows
+
+
+def ingest_file_to_store(path, root, chunksize=CHUNKSIZE, impute=True):
+    """Tulis versi bersih satu file ke store Parquet, chunk demi chunk.
+
+    Mengembalikan jumlah baris serta cube agregat, sketch histogram dan indeks
+    gap (None tanpa imputasi) parsial untuk file tersebut.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    rows, cubes, sketches, gaps = 0, [], [], None
+    for i, (chunk, chunk_gaps) in enumerate(iter_clean_chunks(path, chunksize, impute)):
+        rows += write_chunk(chunk, root, f"{stem}-{i:04d}")
+        cubes.append(build_cube(chunk))
+        sketches.append(build_sketches(chunk))
+        gaps = chunk_gaps if chunk_gaps is not None else gaps
+    return rows, merge_cubes(cubes), merge_sketches(sketches), gaps
+
+
+def raw_files(raw_dir=RAW_DIR):
+    return sorted(glob.glob(os.path.join(raw_dir, RAW_PATTERN)))
+
+
+def _checked_raw_files(raw_dir):
+    paths = raw_files(raw_dir)
+    if not paths:
+        raise FileNotFoundError(f"Tidak ada file {RAW_PATTERN} di {raw_dir}")
+    return paths
+
+
+def _run(func, paths, outputs, chunksize, workers, impute=True):
+    n = len(paths)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(func, paths, outputs, [chunksize] * n, [impute] * n))
+    return [func(p, out, chunksize, impute) for p, out in zip(paths, outputs)]
+
+
+def ingest_store(raw_dir=RAW_DIR, root=STORE_DIR, chunksize=CHUNKSIZE, workers=1, impute=True):
+    """Bangun store Parquet, cube, sketch, indeks gap & snapshot Arrow, lalu ganti store lama sekaligus.
+
+    Memegang `store_lock` selama build, jadi tidak bertabrakan dengan append
+    atau build lain yang memakai folder sementara yang sama.
+    """
+    with store_lock(root):
+        return _build_store(raw_dir, root, chunksize, workers, impute)
+
+
+def store_ready(root=STORE_DIR):
+    return (store_exists(root) and cube_exists(root) and sketches_exist(root)
+            and read_manifest(root) is not None)
+
+
+def ensure_store(raw_dir=RAW_DIR, root=STORE_DIR):
+    """Bangun store jika belum lengkap; dicek ulang setelah kunci didapat.
+
+    Proses yang menunggu kunci selagi proses lain membangun store tidak
+    membangunnya lagi. Mengembalikan True jika store baru dibangun.
+    """
+    with store_lock(root):
+        if store_ready(root):
+            return False
+        _build_store(raw_dir, root)
+        return True
+
+
+def _build_store(raw_dir=RAW_DIR, root=STORE_DIR, chunksize=CHUNKSIZE, workers=1, impute=True):
+    paths = _checked_raw_files(raw_dir)
+    tmp_root = f"{root}.tmp"
+    shutil.rmtree(tmp_root, ignore_errors=True)
+    results = _run(ingest_file_to_store, paths, [tmp_root] * len(paths), chunksize, workers, impute)
+    save_cube(merge_cubes([cube for _, cube, _, _ in results]), tmp_root)
+    save_sketches(merge_sketches([sketches for _, _, sketches, _ in results]), tmp_root)
+    if impute:
+        save_gaps(merge_gap_indexes([gaps for _, _, _, gaps in results]), tmp_root)
+    write_arrow(tmp_root)
+    replace_store(tmp_root, root)
+    return sum(rows for rows, _, _, _ in results)
+
+
+def ingest(raw_dir=RAW_DIR, out_path=OUTPUT_PATH, chunksize=CHUNKSIZE, workers=1, impute=True):
+    paths = _checked_raw_files(raw_dir)
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(out_path))) as tmp:
+        parts = [os.path.join(tmp, f"part-{i:03d}.csv") for i in range(len(paths))]
+        rows = sum(_run(ingest_file, paths, parts, chunksize, workers, impute))
+
+        # Gabungkan file part secara streaming; header hanya dari part pertama
+        tmp_out = os.path.join(tmp, "combined.csv")
+        with open(tmp_out, "wb") as dst:
+            for i, part in enumerate(parts):
+                with open(part, "rb") as src:
+                    if i > 0:
+                        src.readline()
+                    shutil.copyfileobj(src, dst)
+        os.replace(tmp_out, out_path)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bangun dataset bersih dari file PRSA mentah")
+    parser.add_argument("--raw-dir", default=RAW_DIR)
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    parser.add_argument("--output", default=None,
+                        help=f"folder store (default {STORE_DIR}) atau file CSV (default {OUTPUT_PATH})")
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="jumlah proses paralel (satu file stasiun per proses)")
+    parser.add_argument("--no-impute", dest="impute", action="store_false",
+                        help="jangan isi gap; nilai kosong dibiarkan apa adanya")
+    args = parser.parse_args()
+    if args.format == "parquet":
+        output = args.output or STORE_DIR
+        rows = ingest_store(args.raw_dir, output, args.chunksize, args.workers, args.impute)
+    else:
+        output = args.output or OUTPUT_PATH
+        rows = ingest(args.raw_dir, output, args.chunksize, args.workers, args.impute)
+    print(f"{rows} baris ditulis ke {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Instrumentasi ringan untuk jalur panas dashboard.
+
+`Tracer.span(name, **fields)` mengukur durasi (dan opsional memori puncak via
+tracemalloc) sebuah blok; field tambahan (mis. status cache, ukuran payload)
+bisa diisi di dalam blok lewat dict yang dikembalikan `with`. Setiap span
+menjadi satu event yang disimpan di memori (dibatasi) dan, jika `sink` diisi,
+ditambahkan ke file JSON lines. Saat tracer nonaktif, `span` mengembalikan
+context manager no-op bersama sehingga biayanya hanya satu pemeriksaan flag.
+
+tracemalloc berlaku untuk seluruh proses, jadi pelacakan memori hanya bisa
+dinyalakan operator lewat AQI_PERF_MEMORY=1 saat server dijalankan (tidak per
+sesi) dan tidak pernah dimatikan selama proses hidup. Karena sesi lain ikut
+mengalokasi memori, `peak_mb` adalah perkiraan kasar untuk span tersebut.
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+# Variabel lingkungan: aktifkan panel/tracer secara default, path log JSON lines
+# & pelacakan memori tracemalloc (seluruh proses, khusus operator)
+ENABLE_ENV = "AQI_PERF"
+LOG_ENV = "AQI_PERF_LOG"
+MEMORY_ENV = "AQI_PERF_MEMORY"
+MAX_EVENTS = 5000
+
+_sink_lock = threading.Lock()
+
+
+class _NoopSpan:
+    def __enter__(self):
+        # Field yang diisi di dalam blok dibuang
+        return {}
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    def __init__(self, tracer, name, fields):
+        self.tracer = tracer
+        self.fields = fields
+        self.fields["name"] = name
+
+    def __enter__(self):
+        if self.tracer.memory:
+            self.tracer._memory_enter(self)
+        self.start = time.perf_counter()
+        return self.fields
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fields["ms"] = round((time.perf_counter() - self.start) * 1000, 3)
+        if self.tracer.memory:
+            self.fields["peak_mb"] = round(self.tracer._memory_exit(self) / 2**20, 3)
+        if exc_type is not None:
+            self.fields["error"] = exc_type.__name__
+        self.tracer._emit(self.fields)
+        return False
+
+
+class Tracer:
+    def __init__(self, enabled=False, memory=False, sink=None, max_events=MAX_EVENTS):
+        self.enabled = enabled
+        self.memory = memory
+        self.sink = sink
+        self.run = 0
+        self.events = deque(maxlen=max_events)
+        self._stack = []
+
+    @classmethod
+    def from_env(cls):
+        return cls(enabled=_env_flag(ENABLE_ENV), memory=_env_flag(MEMORY_ENV), sink=os.environ.get(LOG_ENV))
+
+    def new_run(self):
+        """Tandai awal rerun baru; event berikutnya memakai nomor run ini."""
+        self.run += 1
+        return self.run
+
+    def span(self, name, **fields):
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name, fields)
+
+    def event(self, name, **fields):
+        if self.enabled:
+            self._emit(dict(fields, name=name))
+
+    def run_events(self, run=None):
+        run = self.run if run is None else run
+        return [e for e in self.events if e["run"] == run]
+
+    def to_jsonl(self, events=None):
+        return "".join(json.dumps(e, default=str) + "\n" for e in (self.events if events is None else events))
+
+    def _emit(self, fields):
+        fields["run"] = self.run
+        fields["ts"] = time.time()
+        self.events.append(fields)
+        if self.sink:
+            line = json.dumps(fields, default=str) + "\n"
+            with _sink_lock, open(self.sink, "a") as f:
+                f.write(line)
+
+    # Memori puncak per span: peak tracemalloc di-reset saat masuk span dan
+    # diteruskan ke span induk saat keluar, sehingga span bersarang tetap benar.
+    def _memory_enter(self, span):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            self._stack[-1].peak = max(self._stack[-1].peak, peak)
+        tracemalloc.reset_peak()
+        span.base = span.peak = current
+        self._stack.append(span)
+
+    def _memory_exit(self, span):
+        _, peak = tracemalloc.get_traced_memory()
+        span.peak = max(span.peak, peak)
+        self._stack.pop()
+        if self._stack:
+            self._stack[-1].peak = max(self._stack[-1].peak, span.peak)
+        tracemalloc.reset_peak()
+        return span.peak - span.base
+
+
+def _env_flag(name):
+    return os.environ.get(name, "") not in ("", "0")
+
+
+# Tracer nonaktif untuk kode yang dipanggil di luar dashboard (benchmark, prerender)
+NULL_TRACER = Tracer()
@@ -0,0 +1,187 @@
+"""Pre-render semua view dashboard menjadi snapshot statis terkompresi.
+
+Setiap kombinasi fitur × stasiun × himpunan musim (tanpa filter tanggal)
+dihitung headless oleh fungsi chart di `views` dalam process pool, lalu semua figure
+kombinasi itu ditulis sebagai satu file JSON gzip di `store/_snapshots/`.
+Manifest mencatat file & versi data tiap kombinasi; dashboard memakai snapshot
+hanya jika versinya masih sama dengan data saat ini. Chart yang di dashboard
+selalu dipanggil dengan parameter (LIVE_CHARTS) tidak di-render.
+
+    python dashboard/prerender.py [--features AQI_True,PM2.5] [--season-sets all,single] [--workers 4]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import plotly.io as pio
+
+from cube import load_cube
+from dataset import Dataset
+from impute import completeness, gaps_exist, load_gaps
+from sketches import load_sketch
+from spatial import IdwGrid, StationIndex, load_registry
+from storage import STORE_DIR, data_version, read_manifest
+from views import CHARTS, FEATURE_NAMES, VIEW_CHARTS, ViewContext, view_charts
+
+SNAPSHOT_DIR = "_snapshots"
+SNAPSHOT_MANIFEST = "manifest.json"
+SEASON_SETS = ("all", "single", "pairs")
+# Chart yang selalu dibangun live dengan parameter (rentang tanggal, standar,
+# polutan, versi model) sehingga snapshot-nya tidak akan pernah terpakai
+LIVE_CHARTS = {"station_series", "station_rolling", "exceedance_ranking", "exceedance_calendar",
+               "forecast_overview", "forecast_series"}
+
+# Dataset & cube per proses worker (dimuat sekali oleh initializer)
+_worker = {}
+
+
+def snapshot_path(root=STORE_DIR):
+    return os.path.join(root, SNAPSHOT_DIR)
+
+
+def snapshot_key(feature, station, seasons):
+    return f"{feature}|{station or '*'}|{','.join(seasons)}"
+
+
+def season_sets(seasons, kinds=("all", "single")):
+    """Himpunan musim yang di-render: semua musim, satu musim, dan/atau pasangan musim."""
+    sets = []
+    if "all" in kinds:
+        sets.append(list(seasons))
+    if "single" in kinds:
+        sets += [[s] for s in seasons]
+    if "pairs" in kinds:
+        sets += [[a, b] for i, a in enumerate(seasons) for b in seasons[i + 1:]]
+    return sets
+
+
+def combinations(dataset, features=None, stations=None, kinds=("all", "single")):
+    """Daftar (feature, station, seasons); station None = semua stasiun."""
+    features = features or list(FEATURE_NAMES)
+    stations = [None] + (dataset.stations if stations is None else list(stations))
+    return [(f, s, seasons) for f in features for s in stations for seasons in season_sets(dataset.seasons, kinds)]
+
+
+def _init_worker(root):
+    _worker["root"] = root
+    _worker["dataset"] = Dataset.open(root)
+    _worker["cube"] = load_cube(root)
+    _worker["versions"] = read_manifest(root)["versions"]
+    _worker["sketches"] = {}
+    _worker["completeness"] = completeness(load_gaps(root)) if gaps_exist(root) else None
+    _worker["spatial"] = IdwGrid(StationIndex(load_registry()))
+
+
+def _load_sketch(feature):
+    sketches = _worker["sketches"]
+    if feature not in sketches:
+        sketches[feature] = load_sketch(feature, _worker["root"])
+    return sketches[feature]
+
+
+def snapshot_charts(view, ctx):
+    """Chart `view` yang di-render ke snapshot (tanpa LIVE_CHARTS)."""
+    return [c for c in view_charts(view, ctx) if c not in LIVE_CHARTS]
+
+
+def render_combination(combination, out_dir, html=False):
+    """Bangun semua chart satu kombinasi dan tulis snapshot-nya; kembalikan entri manifest."""
+    feature, station, seasons = combination
+    version = data_version(_worker["versions"], feature)
+    ctx = ViewContext(_worker["dataset"], _worker["cube"], _load_sketch, feature,
+                      station=station, seasons=seasons, version=version,
+                      completeness=_worker["completeness"], spatial=_worker["spatial"])
+    charts = dict.fromkeys(c for view in VIEW_CHARTS for c in snapshot_charts(view, ctx))
+    figures = {c: CHARTS[c](ctx) for c in charts}
+
+    key = snapshot_key(feature, station, ctx.seasons)
+    name = hashlib.sha1(key.encode()).hexdigest()[:16]
+    with gzip.open(os.path.join(out_dir, f"{name}.json.gz"), "wt", encoding="utf-8") as f:
+        json.dump({c: fig.to_json() for c, fig in figures.items()}, f)
+    if html:
+        # Satu halaman HTML per view untuk hosting statis (plotly.js dari CDN)
+        for view in VIEW_CHARTS:
+            if not snapshot_charts(view, ctx):
+                continue
+            parts = [pio.to_html(figures[c], full_html=False, include_plotlyjs="cdn" if i == 0 else False)
+                     for i, c in enumerate(snapshot_charts(view, ctx))]
+            page = f'<html><head><meta charset="utf-8"></head><body>{"".join(parts)}</body></html>'
+            with gzip.open(os.path.join(out_dir, f"{name}-{view}.html.gz"), "wt", encoding="utf-8") as f:
+                f.write(page)
+    return key, {"file": f"{name}.json.gz", "version": list(version)}
+
+
+def _render(args):
+    return render_combination(*args)
+
+
+def prerender(root=STORE_DIR, features=None, stations=None, kinds=("all", "single"), workers=1, html=False):
+    """Render semua kombinasi ke folder sementara lalu ganti snapshot lama sekaligus."""
+    out_dir = snapshot_path(root)
+    tmp_dir = f"{out_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    _init_worker(root)
+    combos = combinations(_worker["dataset"], features, stations, kinds)
+    tasks = [(c, tmp_dir, html) for c in combos]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(root,)) as pool:
+            entries = dict(pool.map(_render, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+    else:
+        entries = dict(map(_render, tasks))
+
+    with open(os.path.join(tmp_dir, SNAPSHOT_MANIFEST), "w") as f:
+        json.dump({"entries": entries}, f, indent=1)
+    old_dir = f"{out_dir}.old"
+    if os.path.exists(out_dir):
+        os.replace(out_dir, old_dir)
+    os.replace(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return len(entries)
+
+
+def read_snapshot_manifest(root=STORE_DIR):
+    path = os.path.join(snapshot_path(root), SNAPSHOT_MANIFEST)
+    if not os.path.exists(path):
+        return {"entries": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_snapshot(filename, root=STORE_DIR):
+    """Payload JSON per chart ({chart: figure JSON}) dari satu file snapshot."""
+    with gzip.open(os.path.join(snapshot_path(root), filename), "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render view dashboard menjadi snapshot statis")
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--features", help="fitur dipisah koma (default: semua fitur)")
+    parser.add_argument("--stations", help="stasiun dipisah koma (default: semua); 'All Stations' selalu ikut")
+    parser.add_argument("--season-sets", default="all,single",
+                        help=f"jenis himpunan musim dipisah koma: {', '.join(SEASON_SETS)}")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="jumlah proses paralel")
+    parser.add_argument("--html", action="store_true", help="tulis juga halaman HTML per view")
+    args = parser.parse_args()
+    kinds = args.season_sets.split(",")
+    unknown = set(kinds) - set(SEASON_SETS)
+    if unknown:
+        parser.error(f"jenis himpunan musim tidak dikenal: {', '.join(sorted(unknown))}")
+    n = prerender(
+        args.store,
+        features=args.features.split(",") if args.features else None,
+        stations=args.stations.split(",") if args.stations else None,
+        kinds=kinds, workers=args.workers, html=args.html,
+    )
+    print(f"{n} kombinasi ditulis ke {snapshot_path(args.store)}")
+
+
+if __name__ == "__main__":
+    main()
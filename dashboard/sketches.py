@@ -0,0 +1,130 @@
+"""Sketch histogram untuk statistik box plot tanpa memindai data per jam.
+
+Setiap fitur didiskretisasi ke grid tetap (resolusi sama dengan presisi data
+PRSA, mis. 1 ug/m3 atau 0.1 °C) dan dihitung per stasiun × musim × tahun.
+Karena grid-nya sama untuk semua chunk, sketch bersifat mergeable: gabungan
+filter apa pun cukup menjumlahkan count, lalu kuartil, whisker (Tukey 1.5 IQR)
+dan sampel outlier dibaca dari histogram kumulatif.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from storage import STORE_DIR, to_compact
+
+GROUP_COLUMNS = ["station", "season", "year"]
+
+# (batas bawah, batas atas, lebar bin); nilai di luar rentang dijepit ke tepi
+SKETCH_SPECS = {
+    "PM2.5": (0, 1000, 1),
+    "PM10": (0, 1000, 1),
+    "SO2": (0, 600, 1),
+    "NO2": (0, 500, 1),
+    "CO": (0, 12000, 10),
+    "O3": (0, 1500, 1),
+    "TEMP": (-30, 50, 0.1),
+    "PRES": (960, 1060, 0.1),
+    "DEWP": (-50, 40, 0.1),
+    "WSPM": (0, 30, 0.1),
+    "AQI_True": (0, 500, 1),
+    "AQI_CN": (0, 500, 1),
+}
+SKETCH_DIR = "_sketch"
+MAX_OUTLIERS = 100
+
+
+def _to_bins(values, feature):
+    lo, hi, width = SKETCH_SPECS[feature]
+    n_bins = int(round((hi - lo) / width))
+    bins = np.rint((values.astype("float64") - lo) / width)
+    return np.clip(bins, 0, n_bins).astype("int32")
+
+
+def bin_values(bins, feature):
+    lo, _, width = SKETCH_SPECS[feature]
+    return lo + np.asarray(bins, dtype="float64") * width
+
+
+def build_sketches(df, features=None):
+    """Histogram per (station, season, year, bin) untuk setiap fitur."""
+    features = [f for f in (features or SKETCH_SPECS) if f in df.columns]
+    sketches = {}
+    for f in features:
+        valid = df[f].notna()
+        frame = df.loc[valid, GROUP_COLUMNS].copy()
+        frame["bin"] = _to_bins(df.loc[valid, f].to_numpy(), f)
+        sketches[f] = (
+            frame.groupby(GROUP_COLUMNS + ["bin"], observed=True, sort=False)
+            .size().rename("count").reset_index()
+        )
+    return sketches
+
+
+def merge_sketches(sketch_list):
+    sketch_list = [s for s in sketch_list if s]
+    merged = {}
+    for f in dict.fromkeys(f for s in sketch_list for f in s):
+        frame = to_compact(pd.concat([s[f] for s in sketch_list if f in s], ignore_index=True))
+        merged[f] = frame.groupby(GROUP_COLUMNS + ["bin"], observed=True)["count"].sum().reset_index()
+    return merged
+
+
+def sketch_path(root=STORE_DIR):
+    return os.path.join(root, SKETCH_DIR)
+
+
+def save_sketches(sketches, root=STORE_DIR):
+    path = sketch_path(root)
+    os.makedirs(path, exist_ok=True)
+    for f, frame in sketches.items():
+        frame.to_parquet(os.path.join(path, f"{f}.parquet"), index=False)
+
+
+def sketches_exist(root=STORE_DIR):
+    return all(os.path.exists(os.path.join(sketch_path(root), f"{f}.parquet")) for f in SKETCH_SPECS)
+
+
+def load_sketch(feature, root=STORE_DIR):
+    return pd.read_parquet(os.path.join(sketch_path(root), f"{feature}.parquet"))
+
+
+def _quantile(values, cum, total, q):
+    # Nilai bin pertama yang count kumulatifnya mencapai q * total
+    return values[np.searchsorted(cum, q * total, side="left")]
+
+
+def histogram_box(values, counts, max_outliers=MAX_OUTLIERS):
+    """Statistik box plot dari histogram (values terurut naik)."""
+    cum = np.cumsum(counts)
+    total = cum[-1]
+    q1, median, q3 = (_quantile(values, cum, total, q) for q in (0.25, 0.5, 0.75))
+    iqr = q3 - q1
+    inside = (values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)
+    outlier_values = np.repeat(values[~inside], counts[~inside])
+    if len(outlier_values) > max_outliers:
+        # Sampel deterministik yang tersebar merata di seluruh outlier
+        take = np.linspace(0, len(outlier_values) - 1, max_outliers).astype(np.int64)
+        outlier_values = outlier_values[take]
+    return {
+        "q1": q1, "median": median, "q3": q3,
+        "lowerfence": values[inside].min(), "upperfence": values[inside].max(),
+        "mean": float(np.dot(values, counts) / total),
+        "count": int(total), "outliers": outlier_values,
+    }
+
+
+def box_stats(sketch, feature, by="season", seasons=None, station=None, max_outliers=MAX_OUTLIERS):
+    """Statistik box plot per nilai `by` untuk pilihan musim/stasiun."""
+    mask = pd.Series(True, index=sketch.index)
+    if seasons is not None:
+        mask &= sketch["season"].isin(seasons)
+    if station is not None:
+        mask &= sketch["station"] == station
+    hist = sketch.loc[mask].groupby([by, "bin"], observed=True)["count"].sum()
+
+    stats = {}
+    for key, group in hist.groupby(level=0, observed=True):
+        bins = group.index.get_level_values("bin").to_numpy()
+        stats[key] = histogram_box(bin_values(bins, feature), group.to_numpy(), max_outliers)
+    return stats
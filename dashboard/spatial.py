@@ -0,0 +1,147 @@
+"""Registry stasiun, indeks spasial & interpolasi IDW di grid wilayah stasiun.
+
+Koordinat stasiun dibaca dari file registry CSV (kolom station, lat, lon;
+default `dashboard/stations.csv`, bisa diganti lewat variabel lingkungan
+AQI_STATIONS), sehingga jumlah stasiun tidak dibatasi dict di kode. Registry
+diindeks dengan BallTree (metrik haversine) untuk query tetangga terdekat.
+
+Permukaan interpolasi memakai inverse distance weighting: tiap sel grid
+dibobot 1/d^p terhadap K stasiun terdekat. Bobot dihitung sekali sebagai
+matriks sparse sel × stasiun; evaluasi satu irisan waktu cukup satu perkalian
+matriks-vektor, W @ [nilai, valid], sehingga stasiun tanpa nilai pada jam itu
+otomatis dikeluarkan dengan menormalkan ulang bobot. Deret per jam semua
+stasiun disusun sekali per fitur & versi data sebagai matriks jam × stasiun,
+jadi menggeser jam hanya mengambil satu baris matriks.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.neighbors import BallTree
+
+from storage import BASE_DIR
+
+REGISTRY_ENV = "AQI_STATIONS"
+REGISTRY_FILE = os.path.join(BASE_DIR, "stations.csv")
+REGISTRY_COLUMNS = ["station", "lat", "lon"]
+EARTH_RADIUS_KM = 6371.0
+
+IDW_NEIGHBORS = 8
+IDW_POWER = 2
+# Jarak minimum agar sel yang berimpit dengan stasiun tidak membagi dengan nol
+MIN_DISTANCE_KM = 0.1
+# Jumlah sel pada sisi terpanjang grid & margin di sekitar stasiun terluar (derajat)
+GRID_CELLS = 100
+GRID_PADDING_DEG = 0.1
+HOUR = np.timedelta64(1, "h")
+
+
+def registry_path():
+    return os.environ.get(REGISTRY_ENV) or REGISTRY_FILE
+
+
+def load_registry(path=None):
+    """Registry stasiun (station, lat, lon); baris ganda memakai entri terakhir."""
+    path = path or registry_path()
+    registry = pd.read_csv(path, dtype={"station": str})
+    missing = set(REGISTRY_COLUMNS) - set(registry.columns)
+    if missing:
+        raise ValueError(f"Registry stasiun {path} tidak memuat kolom {', '.join(sorted(missing))}")
+    registry = registry.dropna(subset=REGISTRY_COLUMNS).drop_duplicates("station", keep="last")
+    return registry[REGISTRY_COLUMNS].reset_index(drop=True)
+
+
+def registry_coordinates(registry):
+    """{stasiun: (lat, lon)} dari registry."""
+    return {s: (lat, lon) for s, lat, lon in registry.itertuples(index=False)}
+
+
+class StationIndex:
+    """BallTree (haversine) atas koordinat registry stasiun."""
+
+    def __init__(self, registry):
+        self.stations = registry["station"].tolist()
+        self.lat = registry["lat"].to_numpy(np.float64)
+        self.lon = registry["lon"].to_numpy(np.float64)
+        self.tree = BallTree(np.radians(np.column_stack([self.lat, self.lon])), metric="haversine")
+
+    def query(self, lat, lon, k=IDW_NEIGHBORS):
+        """(jarak km, posisi stasiun) k stasiun terdekat untuk tiap titik, terurut dari yang terdekat."""
+        points = np.radians(np.column_stack([np.ravel(lat), np.ravel(lon)]))
+        dist, pos = self.tree.query(points, k=min(k, len(self.stations)))
+        return dist * EARTH_RADIUS_KM, pos
+
+    def nearest(self, station, k=3):
+        """[(stasiun, jarak km)] k stasiun lain terdekat dari `station`."""
+        i = self.stations.index(station)
+        dist, pos = self.query(self.lat[i], self.lon[i], k + 1)
+        return [(self.stations[p], float(d)) for p, d in zip(pos[0], dist[0]) if p != i][:k]
+
+
+def grid_bounds(index, padding=GRID_PADDING_DEG):
+    """(lat_min, lat_max, lon_min, lon_max) cakupan stasiun registry plus margin."""
+    return (index.lat.min() - padding, index.lat.max() + padding,
+            index.lon.min() - padding, index.lon.max() + padding)
+
+
+class IdwGrid:
+    """Grid lat/lon dengan matriks bobot IDW sparse (sel × stasiun) yang dihitung sekali."""
+
+    def __init__(self, index, bounds=None, cells=GRID_CELLS, k=IDW_NEIGHBORS, power=IDW_POWER):
+        self.stations = index.stations
+        self.station_lat = index.lat
+        self.station_lon = index.lon
+        lat_min, lat_max, lon_min, lon_max = bounds or grid_bounds(index)
+        step = max(lat_max - lat_min, lon_max - lon_min) / cells
+        self.lat = np.arange(lat_min, lat_max + step / 2, step)
+        self.lon = np.arange(lon_min, lon_max + step / 2, step)
+        lat, lon = np.meshgrid(self.lat, self.lon, indexing="ij")
+        dist, pos = index.query(lat, lon, k)
+        weights = np.maximum(dist, MIN_DISTANCE_KM) ** -float(power)
+        n_cells, k = pos.shape
+        # Satu baris CSR per sel berisi tepat k bobot tetangganya
+        self.weights = sparse.csr_matrix(
+            (weights.ravel(), pos.ravel(), np.arange(0, n_cells * k + 1, k)),
+            shape=(n_cells, len(self.stations)),
+        )
+
+    @property
+    def shape(self):
+        return len(self.lat), len(self.lon)
+
+    def align(self, values):
+        """Series nilai per nama stasiun -> array urutan registry (NaN jika tidak ada)."""
+        return values.reindex(self.stations).to_numpy(np.float64)
+
+    def evaluate(self, values):
+        """Permukaan interpolasi (lat × lon) dari nilai per stasiun (urutan registry, NaN = kosong)."""
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        num, den = (self.weights @ np.column_stack([np.where(valid, values, 0.0), valid])).T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (num / den).reshape(self.shape)
+
+
+class StationHours:
+    """Nilai satu fitur per jam untuk semua stasiun registry (matriks jam × stasiun)."""
+
+    def __init__(self, dataset, feature, stations):
+        times = dataset.array("datetime")
+        self.start, self.end = (np.datetime64(t, "h") for t in dataset.time_range)
+        self.stations = list(stations)
+        positions = {name: i for i, name in enumerate(self.stations)}
+        # Kode stasiun dataset -> kolom matriks (-1 = tidak ada di registry)
+        lookup = np.array([positions.get(name, -1) for name in dataset.categories("station")] + [-1])
+        columns = lookup[dataset.codes("station")]
+        keep = columns >= 0
+        hours = (times[keep] - self.start) // HOUR
+        self.values = np.full((int((self.end - self.start) // HOUR) + 1, len(self.stations)), np.nan, np.float32)
+        self.values[hours, columns[keep]] = dataset.array(feature)[keep]
+
+    def at(self, hour):
+        """Nilai semua stasiun pada satu jam (NaN di luar rentang data)."""
+        i = (np.datetime64(hour, "h") - self.start) // HOUR
+        if not 0 <= i < len(self.values):
+            return np.full(len(self.stations), np.nan)
+        return self.values[i]
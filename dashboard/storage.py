@@ -0,0 +1,253 @@
+"""Penyimpanan kolumnar (Parquet) untuk dataset bersih.
+
+Dataset dipartisi per stasiun/tahun (hive: station=.../year=...) dengan
+tipe data ringkas, sehingga loader cukup membaca kolom yang dibutuhkan
+tanpa parsing CSV dan tanpa menghitung ulang kolom kalender.
+"""
+import contextlib
+import fcntl
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from aqi import POLLUTANTS
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR = os.path.join(BASE_DIR, "store")
+PARTITION_COLUMNS = ["station", "year"]
+# Snapshot Arrow IPC (tanpa kompresi) yang dibaca lewat memory map
+ARROW_FILE = os.path.join("_arrow", "dataset.arrow")
+# Daftar segmen Arrow, datetime terakhir per stasiun & versi tiap artefak
+MANIFEST_FILE = "_manifest.json"
+
+SEASONS = ["Spring", "Summer", "Autumn", "Winter"]
+WIND_DIRECTIONS = ["N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE",
+                   "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW"]
+# Batas kelas kecepatan angin (m/s, kira-kira skala Beaufort 0-4) dan labelnya
+SPEED_EDGES = [0.5, 1.5, 3.0, 5.5, 8.0]
+SPEED_BINS = ["<0.5", "0.5-1.5", "1.5-3", "3-5.5", "5.5-8", ">=8"]
+
+# Kategori dengan nilai tetap; stasiun mengikuti data yang ada
+CATEGORIES = {
+    "season": SEASONS,
+    "wd": WIND_DIRECTIONS,
+    "speed_bin": SPEED_BINS,
+    "Dominant_Pollutant": POLLUTANTS,
+    "Dominant_Pollutant_CN": POLLUTANTS,
+}
+FLOAT_COLUMNS = POLLUTANTS + ["TEMP", "PRES", "DEWP", "RAIN", "WSPM", "AQI_True", "AQI_CN"]
+INT_COLUMNS = {"year": "int16", "month": "int8", "day": "int8", "hour": "int8", "observed": "uint16"}
+
+PARTITIONING = ds.HivePartitioning.discover(
+    schema=pa.schema([("station", pa.dictionary(pa.int32(), pa.string())), ("year", pa.int16())]),
+)
+
+
+def to_compact(df):
+    """Ubah tipe kolom ke bentuk ringkas: kategori, float32, int8/int16."""
+    df = df.copy()
+    if "datetime" in df.columns and not pd.api.types.is_datetime64_any_dtype(df["datetime"]):
+        df["datetime"] = pd.to_datetime(df["datetime"])
+    for col, categories in CATEGORIES.items():
+        if col in df.columns:
+            df[col] = pd.Categorical(df[col], categories=categories)
+    if "station" in df.columns:
+        df["station"] = df["station"].astype("category")
+    for col in FLOAT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("float32")
+    for col, dtype in INT_COLUMNS.items():
+        if col in df.columns:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def write_chunk(df, root, basename):
+    """Tulis satu chunk ke partisi station/year; basename harus unik per chunk."""
+    table = pa.Table.from_pandas(to_compact(df), preserve_index=False)
+    pq.write_to_dataset(
+        table, root, partition_cols=PARTITION_COLUMNS,
+        basename_template=f"{basename}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    return len(df)
+
+
+def replace_store(tmp_root, root=STORE_DIR):
+    """Ganti store lama dengan store baru yang sudah selesai ditulis."""
+    old = f"{root}.old"
+    if os.path.exists(root):
+        os.replace(root, old)
+    os.replace(tmp_root, root)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def store_exists(root=STORE_DIR):
+    return os.path.isdir(root) and any(name.startswith("station=") for name in os.listdir(root))
+
+
+def open_dataset(root=STORE_DIR):
+    return ds.dataset(root, format="parquet", partitioning=PARTITIONING)
+
+
+def arrow_path(root=STORE_DIR):
+    return os.path.join(root, ARROW_FILE)
+
+
+def sort_by_station_time(table):
+    """Urutkan tabel per (station, datetime) dengan kamus stasiun terurut abjad.
+
+    Dengan urutan ini baris tiap stasiun bersebelahan dan kode stasiun naik,
+    sehingga filter stasiun/rentang waktu cukup berupa slicing.
+    """
+    station = table["station"].combine_chunks()
+    names = np.asarray(station.dictionary.to_pylist(), dtype=object)
+    rank = np.argsort(np.argsort(names))
+    codes = rank[station.indices.to_numpy()].astype("int32")
+    sorted_station = pa.DictionaryArray.from_arrays(pa.array(codes), pa.array(np.sort(names).tolist()))
+    table = table.set_column(table.schema.get_field_index("station"), "station", sorted_station)
+    order = np.lexsort((table["datetime"].to_numpy(), codes))
+    return table.take(order)
+
+
+def _nan_for_null(table):
+    """Ganti null pada kolom float dengan NaN.
+
+    Kolom dengan null tidak bisa dikonversi ke NumPy tanpa salinan; NaN
+    bermakna sama bagi pembaca (Dataset.array) dan tetap bisa di-memory-map.
+    """
+    for i, field in enumerate(table.schema):
+        if pa.types.is_floating(field.type) and table.column(i).null_count:
+            column = pc.fill_null(table.column(i), pa.scalar(np.nan, field.type))
+            table = table.set_column(i, field, column)
+    return table
+
+
+def _write_ipc(table, path):
+    table = _nan_for_null(table)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def _last_datetimes(table):
+    """Datetime terakhir per stasiun (ISO string) untuk manifest."""
+    frame = table.select(["station", "datetime"]).to_pandas()
+    last = frame.groupby("station", observed=True)["datetime"].max()
+    return {station: ts.isoformat() for station, ts in last.items()}
+
+
+def lock_path(root=STORE_DIR):
+    # Di samping folder store (bukan di dalamnya) karena replace_store mengganti foldernya
+    return f"{os.path.normpath(root)}.lock"
+
+
+@contextlib.contextmanager
+def store_lock(root=STORE_DIR):
+    """Kunci eksklusif antarproses (flock) untuk semua penulisan store.
+
+    Dipakai ingest, append & compact, baik dari CLI maupun dashboard, sehingga
+    hanya satu penulis yang membaca-menggabung-menulis artefak store pada satu waktu.
+    Tidak re-entrant: jangan dipanggil bersarang untuk store yang sama.
+    """
+    path = lock_path(root)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def new_version():
+    # Token unik (bukan counter) agar build ulang store tidak memakai ulang versi lama
+    return time.time_ns()
+
+
+def data_version(versions, feature):
+    """Versi artefak yang memengaruhi chart `feature`: (dataset, cube, sketch fitur)."""
+    return (versions["dataset"], versions["cube"], versions["sketch"].get(feature, versions["sketch_base"]))
+
+
+def manifest_path(root=STORE_DIR):
+    return os.path.join(root, MANIFEST_FILE)
+
+
+def read_manifest(root=STORE_DIR):
+    path = manifest_path(root)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_manifest(manifest, root=STORE_DIR):
+    tmp = f"{manifest_path(root)}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, manifest_path(root))
+
+
+def write_arrow(root=STORE_DIR):
+    """Tulis seluruh store Parquet sebagai satu file Arrow IPC terurut.
+
+    Kamus kategori disatukan agar file bisa di-memory-map dan dibaca tanpa
+    salinan oleh banyak proses sekaligus (berbagi page cache OS). Segmen
+    delta hasil append dilebur ke snapshot ini (kompaksi) dan manifest direset.
+    """
+    table = open_dataset(root).to_table().unify_dictionaries().combine_chunks()
+    table = sort_by_station_time(table).combine_chunks()
+    path = arrow_path(root)
+    _write_ipc(table, path)
+
+    previous = read_manifest(root) or {}
+    for segment in previous.get("segments", [])[1:]:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(os.path.join(root, segment))
+    token = new_version()
+    # Versi sketch per fitur; fitur tanpa entri memakai "sketch_base"
+    versions = previous.get("versions", {"cube": token, "sketch_base": token, "sketch": {}})
+    versions["dataset"] = token
+    write_manifest({
+        "segments": [ARROW_FILE],
+        "last_datetime": _last_datetimes(table),
+        "versions": versions,
+    }, root)
+    return path
+
+
+def append_arrow_segment(table, root=STORE_DIR, out=None):
+    """Tambahkan tabel baru (sudah bersih) sebagai segmen delta Arrow terpisah.
+
+    Biayanya sebanding dengan ukuran tabel baru; snapshot utama tidak ditulis ulang.
+    Segmen ditulis di bawah `out` (default `root`, mis. folder staging append);
+    manifest yang sudah diperbarui dikembalikan tanpa ditulis.
+    """
+    manifest = read_manifest(root)
+    segment = os.path.join("_arrow", f"delta-{len(manifest['segments']):06d}.arrow")
+    _write_ipc(sort_by_station_time(table).combine_chunks(), os.path.join(out or root, segment))
+    manifest["segments"].append(segment)
+    manifest["last_datetime"].update(_last_datetimes(table))
+    return manifest
+
+
+def open_arrow(root=STORE_DIR):
+    """Buka snapshot Arrow (plus segmen delta) lewat memory map.
+
+    Buffer kolom tidak disalin; file sengaja tidak ditutup karena mapping
+    harus tetap hidup selama buffer tabel dipakai.
+    """
+    manifest = read_manifest(root)
+    segments = manifest["segments"] if manifest else [ARROW_FILE]
+    return [pa.ipc.open_file(pa.memory_map(os.path.join(root, seg), "r")).read_all() for seg in segments]
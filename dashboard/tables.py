@@ -0,0 +1,110 @@
+"""Tabel data per halaman untuk Raw Data & Station Details.
+
+Yang dikirim ke browser hanya satu halaman dengan kolom terpilih. Filter
+nilai dan sort dihitung di server pada array kolom (dataset sudah terurut per
+stasiun & waktu, jadi tanpa sort halaman cukup berupa slicing), dan ekspor
+CSV/Parquet ditulis per potongan baris langsung dari tabel Arrow tanpa membuat
+DataFrame seluruh seleksi.
+"""
+import io
+import operator
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+PAGE_SIZES = [25, 50, 100, 250]
+EXPORT_CHUNK_ROWS = 50_000
+EXPORT_FORMATS = ("csv", "parquet")
+
+FILTER_OPS = {
+    "=": operator.eq, "≠": operator.ne,
+    ">": operator.gt, "≥": operator.ge, "<": operator.lt, "≤": operator.le,
+}
+# Kolom kategori hanya bisa dibandingkan sama/tidak sama
+CATEGORY_OPS = ("=", "≠")
+
+
+def as_indices(rows):
+    if isinstance(rows, slice):
+        return np.arange(rows.start, rows.stop)
+    return np.asarray(rows)
+
+
+def count_rows(rows):
+    return rows.stop - rows.start if isinstance(rows, slice) else len(rows)
+
+
+def column_values(dataset, name, rows):
+    """Nilai kolom untuk baris terpilih (kode integer untuk kolom kategori)."""
+    if dataset._is_dictionary(name):
+        return dataset.codes(name)[rows]
+    return dataset.array(name)[rows]
+
+
+def parse_value(dataset, column, text):
+    """Ubah teks input filter ke nilai yang sebanding dengan array kolom."""
+    text = text.strip()
+    if dataset._is_dictionary(column):
+        categories = dataset.categories(column)
+        if text not in categories:
+            raise ValueError(f"{text!r} bukan nilai {column} ({', '.join(map(str, categories[:8]))}, ...)")
+        return categories.index(text)
+    values = dataset.array(column)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return np.datetime64(pd.Timestamp(text), "ns")
+    return float(text)
+
+
+def filter_rows(dataset, rows, column, op, text):
+    """Baris dalam `rows` yang memenuhi `column op nilai` (NaN/kosong tidak pernah lolos)."""
+    if dataset._is_dictionary(column) and op not in CATEGORY_OPS:
+        raise ValueError(f"Kolom {column} hanya mendukung {' / '.join(CATEGORY_OPS)}")
+    value = parse_value(dataset, column, text)
+    values = column_values(dataset, column, rows)
+    mask = FILTER_OPS[op](values, value)
+    if dataset._is_dictionary(column):
+        mask &= values >= 0
+    return as_indices(rows)[mask]
+
+
+def sort_rows(dataset, rows, column, descending=False):
+    """Urutan baris menurut `column`; nilai kosong selalu di akhir, seri tetap stabil."""
+    values = column_values(dataset, column, rows)
+    missing = values < 0 if dataset._is_dictionary(column) else pd.isna(values)
+    keys = values.view("int64") if np.issubdtype(values.dtype, np.datetime64) else values
+    if descending:
+        # Urut naik pada array terbalik lalu dibalik: turun dengan seri tetap stabil,
+        # tanpa menegasikan kunci (meluap untuk uint16/int8)
+        order = (len(keys) - 1 - np.argsort(keys[::-1], kind="stable"))[::-1]
+    else:
+        order = np.argsort(keys, kind="stable")
+    order = np.concatenate((order[~missing[order]], order[missing[order]]))
+    return as_indices(rows)[order]
+
+
+def page_rows(rows, number, size):
+    """Baris untuk halaman ke-`number` (mulai 1)."""
+    start = (number - 1) * size
+    if isinstance(rows, slice):
+        return slice(min(rows.start + start, rows.stop), min(rows.start + start + size, rows.stop))
+    return rows[start:start + size]
+
+
+def export_selection(dataset, rows, columns, fmt="csv", chunk_rows=EXPORT_CHUNK_ROWS):
+    """Tulis seluruh seleksi ke CSV/Parquet per potongan baris; kembalikan bytes."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format ekspor tidak dikenal: {fmt!r}")
+    table = dataset.table.select(columns)
+    sink = io.BytesIO()
+    writer = (pacsv.CSVWriter(sink, table.schema) if fmt == "csv"
+              else pq.ParquetWriter(sink, table.schema, compression="zstd"))
+    with writer:
+        for start in range(0, count_rows(rows), chunk_rows):
+            chunk = page_rows(rows, start // chunk_rows + 1, chunk_rows)
+            part = table.slice(chunk.start, chunk.stop - chunk.start) if isinstance(chunk, slice) \
+                else table.take(pa.array(chunk))
+            writer.write_table(part)
+    return sink.getvalue()
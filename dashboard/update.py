@@ -0,0 +1,225 @@
+"""Append observasi per jam baru tanpa membangun ulang seluruh store.
+
+File baru (format sama dengan file PRSA mentah) diletakkan di folder drop-in
+`data/incoming/`. Untuk setiap batch hanya baris baru yang dibersihkan
+(datetime, season, AQI), lalu:
+
+- jika store dibangun dengan imputasi, diletakkan di grid per jam yang
+  melanjutkan jam terakhir tiap stasiun dan gap-nya diisi (profil panjang
+  diambil dari cube), lalu run gap-nya ditambahkan ke indeks gap,
+- ditulis sebagai file Parquet baru di partisi station/year,
+- ditambahkan sebagai segmen delta Arrow (snapshot utama tidak ditulis ulang),
+- cube dan sketch diperbarui dengan menjumlahkan agregat delta,
+- versi artefak yang berubah di manifest dinaikkan sehingga dashboard hanya
+  mengganti cache yang terdampak.
+
+Semua penulisan memegang `store_lock` (flock antarproses pada `store.lock`),
+sehingga CLI dan tombol di dashboard (atau beberapa worker server) tidak
+pernah menggabungkan artefak yang sama bersamaan.
+
+Satu file = satu batch = satu commit. Semua artefak baru ditulis dulu ke
+folder staging `store/_staging/<token>/`; setelah lengkap diberi penanda
+COMMIT, lalu dipindahkan ke store (os.replace per file) dan manifest ditulis
+terakhir. Jika proses mati di tengah jalan, `recover_appends` (dipanggil di
+awal setiap append) membuang staging tanpa penanda dan menuntaskan staging
+yang sudah ditandai, sehingga batch tidak pernah tertulis dua kali.
+
+Baris data (Parquet & segmen Arrow) sebanding dengan ukuran batch. Namun cube,
+indeks gap dan sketch tiap fitur yang berubah dibaca lalu ditulis ulang utuh
+setiap batch (saat ini ~1 MB, ~0.1 MB & ~0.1 MB per fitur); ukurannya tumbuh
+pelan terhadap panjang histori (cuboid bulan & run gap bertambah per bulan),
+jadi biaya tetap per batch ini ikut naik seiring histori. Gabungkan data baru
+menjadi batch yang tidak terlalu kecil.
+
+    python dashboard/update.py                 # proses data/incoming/*.csv
+    python dashboard/update.py file_baru.csv   # proses file tertentu
+    python dashboard/update.py --compact       # lebur segmen delta ke snapshot
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+
+from cube import build_cube, load_cube, merge_cubes, save_cube
+from impute import CALENDAR_COLUMNS, HOUR, cube_profiles, gaps_exist, load_gaps, merge_gap_indexes, save_gaps
+from ingest import RAW_DIR, clean_chunk, clean_station
+from sketches import build_sketches, load_sketch, merge_sketches, save_sketches
+from storage import (
+    STORE_DIR, append_arrow_segment, new_version, read_manifest, store_lock, to_compact,
+    write_arrow, write_chunk, write_manifest,
+)
+
+INCOMING_DIR = os.path.join(RAW_DIR, "incoming")
+PROCESSED_DIR = "processed"
+STAGING_DIR = "_staging"
+COMMIT_FILE = "COMMIT"
+STAGED_MANIFEST = "manifest.json"
+
+
+def new_rows(raw, manifest):
+    """Bersihkan batch mentah dan buang baris yang sudah ada di store."""
+    delta = clean_chunk(raw).drop_duplicates(["station", "datetime"], keep="last")
+    last = pd.to_datetime(delta["station"].map(manifest["last_datetime"]))
+    # Store bersifat append-only per stasiun: hanya jam setelah data terakhir
+    return delta[last.isna() | (delta["datetime"] > last)].sort_values(["station", "datetime"])
+
+
+def new_imputed_rows(raw, manifest, cube):
+    """Seperti `new_rows`, tetapi tiap stasiun diletakkan di grid per jam dengan gap terisi.
+
+    Grid dimulai satu jam setelah data terakhir stasiun di store. Interpolasi
+    hanya memakai nilai dalam batch; gap di tepi batch diisi profil dari cube.
+    Mengembalikan (delta, indeks gap batch).
+    """
+    times = pd.to_datetime(raw[CALENDAR_COLUMNS])
+    last = pd.to_datetime(raw["station"].map(manifest["last_datetime"]))
+    raw = raw[last.isna() | (times > last)]
+    frames, gaps = [], []
+    for station, group in raw.groupby("station", sort=True):
+        last = manifest["last_datetime"].get(station)
+        frame, station_gaps = clean_station(group, pd.Timestamp(last) + HOUR if last else None,
+                                            cube_profiles(cube, station))
+        frames.append(frame)
+        gaps.append(station_gaps)
+    if not frames:
+        return clean_chunk(raw), None
+    return pd.concat(frames, ignore_index=True), merge_gap_indexes(gaps)
+
+
+def staging_path(root, token):
+    return os.path.join(root, STAGING_DIR, str(token))
+
+
+def _commit_staged(stage, root):
+    """Pindahkan file staging ke store lalu tulis manifest; aman diulang."""
+    for dirpath, _, files in os.walk(stage):
+        for name in files:
+            if dirpath == stage and name in (COMMIT_FILE, STAGED_MANIFEST):
+                continue
+            src = os.path.join(dirpath, name)
+            dst = os.path.join(root, os.path.relpath(src, stage))
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            os.replace(src, dst)
+    with open(os.path.join(stage, STAGED_MANIFEST)) as f:
+        write_manifest(json.load(f), root)
+    shutil.rmtree(stage)
+
+
+def recover_appends(root=STORE_DIR):
+    """Tuntaskan append yang sudah ber-COMMIT dan buang staging yang belum lengkap.
+
+    Harus dipanggil sambil memegang `store_lock`: staging penulis lain yang
+    belum ber-COMMIT akan terhapus.
+    """
+    base = os.path.join(root, STAGING_DIR)
+    if not os.path.isdir(base):
+        return
+    for name in sorted(os.listdir(base)):
+        stage = os.path.join(base, name)
+        if os.path.exists(os.path.join(stage, COMMIT_FILE)):
+            _commit_staged(stage, root)
+        else:
+            shutil.rmtree(stage)
+
+
+def append_rows(raw, root=STORE_DIR):
+    """Tambahkan satu batch (DataFrame format PRSA mentah); kembalikan jumlah baris baru."""
+    with store_lock(root):
+        recover_appends(root)
+        return _append_rows(raw, root)
+
+
+def _append_rows(raw, root):
+    manifest = read_manifest(root)
+    if manifest is None:
+        raise FileNotFoundError(f"Store {root} belum dibangun; jalankan ingest.py terlebih dahulu")
+    cube = load_cube(root)
+    impute = gaps_exist(root)
+    if impute:
+        delta, delta_gaps = new_imputed_rows(raw, manifest, cube)
+    else:
+        delta = new_rows(raw, manifest)
+    if delta.empty:
+        return 0
+
+    # Semua artefak ditulis ke staging dengan path relatif yang sama seperti di store
+    token = new_version()
+    stage = staging_path(root, token)
+    write_chunk(delta, stage, f"append-{token}")
+    save_cube(merge_cubes([cube, build_cube(delta)]), stage)
+    if impute:
+        save_gaps(merge_gap_indexes([load_gaps(root), delta_gaps]), stage)
+
+    delta_sketches = build_sketches(delta)
+    changed = [f for f, frame in delta_sketches.items() if len(frame)]
+    for feature in changed:
+        merged = merge_sketches([{feature: load_sketch(feature, root)}, {feature: delta_sketches[feature]}])
+        save_sketches(merged, stage)
+
+    table = pa.Table.from_pandas(to_compact(delta), preserve_index=False)
+    manifest = append_arrow_segment(table, root, out=stage)
+    versions = manifest["versions"]
+    versions["dataset"] = versions["cube"] = token
+    versions["sketch"].update({f: token for f in changed})
+    with open(os.path.join(stage, STAGED_MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    # Penanda COMMIT ditulis paling akhir: sejak titik ini batch dianggap masuk
+    open(os.path.join(stage, COMMIT_FILE), "w").close()
+    _commit_staged(stage, root)
+    return len(delta)
+
+
+def append_files(paths, root=STORE_DIR):
+    """Append setiap file sebagai satu batch (cube, gap & sketch digabung sekali per file)."""
+    with store_lock(root):
+        recover_appends(root)
+        return sum(_append_rows(pd.read_csv(path), root) for path in paths)
+
+
+def incoming_files(incoming_dir=INCOMING_DIR):
+    return sorted(glob.glob(os.path.join(incoming_dir, "*.csv")))
+
+
+def process_incoming(incoming_dir=INCOMING_DIR, root=STORE_DIR):
+    """Proses semua file di folder drop-in lalu pindahkan ke subfolder processed/.
+
+    Daftar file diambil setelah kunci didapat, jadi file yang sudah diproses
+    penulis lain tidak di-append ulang.
+    """
+    rows = 0
+    with store_lock(root):
+        recover_appends(root)
+        for path in incoming_files(incoming_dir):
+            rows += _append_rows(pd.read_csv(path), root)
+            done_dir = os.path.join(incoming_dir, PROCESSED_DIR)
+            os.makedirs(done_dir, exist_ok=True)
+            shutil.move(path, os.path.join(done_dir, os.path.basename(path)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append data per jam baru ke store")
+    parser.add_argument("files", nargs="*", help="file CSV format PRSA (default: isi folder incoming)")
+    parser.add_argument("--incoming", default=INCOMING_DIR)
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--compact", action="store_true",
+                        help="tulis ulang snapshot Arrow agar semua segmen delta dilebur")
+    args = parser.parse_args()
+    if args.files:
+        rows = append_files(args.files, args.store)
+    else:
+        rows = process_incoming(args.incoming, args.store)
+    print(f"{rows} baris baru ditambahkan ke {args.store}")
+    if args.compact:
+        with store_lock(args.store):
+            recover_appends(args.store)
+            write_arrow(args.store)
+        print("Segmen delta dilebur ke snapshot utama")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,695 @@
+"""Data & figure Plotly untuk setiap chart dashboard, terpisah dari Streamlit.
+
+`ViewContext` memegang dataset, cube dan filter terpilih untuk satu rerun;
+fungsi chart di `CHARTS` membaca agregat dari context (di-memo per context,
+jadi chart yang memakai agregat sama tidak menghitung ulang) lalu membangun
+figure. Karena tidak bergantung pada Streamlit, jalur yang sama bisa diukur
+oleh benchmark secara headless.
+"""
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from cube import dimension, rollup
+from downsample import downsample
+from exposure import (
+    EXCEEDANCE_AQI, ROLLING_WINDOWS, STANDARD_LABELS, aqi_column, exceed_column, exceedance_summary, filter_daily,
+    rolling_series, threshold,
+)
+from perf import NULL_TRACER
+from storage import SPEED_BINS, WIND_DIRECTIONS
+from sketches import GROUP_COLUMNS as SKETCH_GROUP_COLUMNS, box_stats, build_sketches
+from spatial import load_registry, registry_coordinates
+
+# Koordinat tiap stasiun dari registry stasiun (dashboard/stations.csv atau $AQI_STATIONS)
+STATION_COORDINATES = registry_coordinates(load_registry())
+
+# Nama fitur yang lebih mudah dimengerti
+FEATURE_NAMES = {
+    "PM2.5": "Fine Particulate Matter (PM2.5)",
+    "PM10": "Coarse Particulate Matter (PM10)",
+    "SO2": "Sulfur Dioxide (SO2)",
+    "NO2": "Nitrogen Dioxide (NO2)",
+    "CO": "Carbon Monoxide (CO)",
+    "O3": "Ozone (O3)",
+    "TEMP": "Temperature (°C)",
+    "PRES": "Pressure (hPa)",
+    "DEWP": "Dew Point (°C)",
+    "WSPM": "Wind Speed (m/s)",
+    "AQI_True": "Air Quality Index (AQI)",
+    "AQI_CN": "Air Quality Index China (HJ 633)"
+}
+
+WEATHER_FEATURES = ['TEMP', 'DEWP', 'WSPM']
+
+# Contoh custom color scale ala AQI (0-500)
+AQI_COLORSCALE = [
+    [0.0, "green"],
+    [0.2, "yellow"],
+    [0.4, "orange"],
+    [0.6, "red"],
+    [0.8, "purple"],
+    [1.0, "maroon"]
+]
+
+# Batas titik time series yang dikirim ke browser, berapa pun panjang datanya
+MAX_SERIES_POINTS = 2000
+DOWNSAMPLE_LABELS = {"lttb": "LTTB", "minmax": "Min-Max"}
+
+
+class ViewContext:
+    """Dataset, cube & filter (feature, stasiun, musim, rentang tanggal) satu rerun.
+
+    `station=None` berarti semua stasiun; `start`/`end` None berarti seluruh
+    rentang waktu (agregat dibaca dari cube). `load_sketch(feature)` mengembalikan
+    sketch histogram tersimpan untuk fitur tersebut. `version` menandai versi
+    data (dataset/cube/sketch) dan ikut menjadi bagian kunci cache figure.
+    `completeness` adalah ringkasan indeks gap (lihat impute.completeness) atau
+    None jika store dibangun tanpa imputasi; `load_exposure()` mengembalikan
+    tabel harian exposure.daily_exposure dan baru dipanggil saat chart paparan
+    dibangun (None jika tidak tersedia). `spatial` adalah
+    spatial.IdwGrid untuk permukaan interpolasi dan `load_hours(feature)`
+    mengembalikan spatial.StationHours fitur tersebut (keduanya opsional).
+    `load_forecasts()` mengembalikan tabel prakiraan 24 jam forecast.forecast
+    dan baru dipanggil saat chart prakiraan dibangun (None jika model belum
+    dilatih).
+    Filter & agregasi dicatat sebagai span pada `tracer` (lihat perf.py).
+    """
+
+    def __init__(self, dataset, cube, load_sketch, feature, station=None, seasons=None, start=None, end=None,
+                 version=None, tracer=NULL_TRACER, completeness=None, load_exposure=None, spatial=None,
+                 load_hours=None, load_forecasts=None):
+        self.dataset = dataset
+        self.cube = cube
+        self.load_sketch = load_sketch
+        self.feature = feature
+        self.station = station
+        # Urutan musim dinormalisasi (urutan dataset) agar pilihan yang sama
+        # menghasilkan figure & kunci cache yang sama
+        self.seasons = [s for s in dataset.seasons if seasons is None or s in seasons]
+        self.start = start
+        self.end = end
+        self.version = version
+        self.tracer = tracer
+        self.completeness = completeness
+        self.load_exposure = load_exposure
+        self._exposure = None
+        self.spatial = spatial
+        self.load_hours = load_hours
+        self.load_forecasts = load_forecasts
+        self._forecasts = None
+        self.date_filtered = start is not None or end is not None
+        self._aggregates = {}
+        self._box_stats = None
+
+    @property
+    def label(self):
+        return FEATURE_NAMES.get(self.feature)
+
+    @property
+    def station_label(self):
+        return self.station or "All Stations"
+
+    def cache_key(self, chart, **params):
+        """Kunci cache figure: id chart + filter ternormalisasi + versi data + parameter chart."""
+        return (chart, self.feature, self.station, tuple(self.seasons), self.start, self.end,
+                self.version, tuple(sorted(params.items())))
+
+    def rows(self, by_season=True, start=None, end=None, all_stations=False):
+        """Indeks/slice baris terpilih tanpa membuat DataFrame."""
+        return self.dataset.rows(
+            self.seasons if by_season else None, None if all_stations else self.station,
+            self.start if start is None else start, self.end if end is None else end
+        )
+
+    def filter_data(self, columns=None, by_season=True, start=None, end=None, all_stations=False):
+        # Filter stasiun/musim/tanggal berupa slicing pada indeks dataset; tidak ada
+        # hashing DataFrame dan hasilnya tidak disimpan di cache per kombinasi filter
+        with self.tracer.span("filter", columns=len(columns or self.dataset.columns)) as span:
+            frame = self.dataset.take(self.rows(by_season, start, end, all_stations), columns)
+            span["rows"] = len(frame)
+        return frame
+
+    def aggregate(self, by, features=None, stat="mean", all_stations=False):
+        """Rata-rata (atau jumlah jam terukur, `stat="count"`) `features` per `by`.
+
+        `all_stations=True` mengabaikan filter stasiun. Hasil di-memo, jangan diubah in-place.
+        """
+        features = features or self.feature
+        key = (tuple([by] if isinstance(by, str) else by), tuple([features] if isinstance(features, str) else features),
+               stat, all_stations)
+        if key not in self._aggregates:
+            with self.tracer.span("aggregate", by="+".join(key[0]), features="+".join(key[1]),
+                                  source="rows" if self.date_filtered else "cube"):
+                self._aggregates[key] = self._aggregate(by, features, stat, all_stations)
+        return self._aggregates[key]
+
+    def _aggregate(self, by, features, stat, all_stations):
+        station = None if all_stations else self.station
+        if not self.date_filtered:
+            # Rata-rata per dimensi diturunkan dari cube agregat, bukan dari data per jam
+            return rollup(self.cube, by, features, self.seasons, station, stat)
+        # Cube tidak memuat dimensi tanggal penuh; hitung dari baris dalam rentang tanggal
+        by_cols = [by] if isinstance(by, str) else list(by)
+        feature_cols = [features] if isinstance(features, str) else list(features)
+        # Dimensi turunan (speed_bin) dihitung dari kolom sumbernya
+        source_cols = ["WSPM" if c == "speed_bin" else c for c in by_cols]
+        frame = self.filter_data(list(dict.fromkeys(source_cols + feature_cols)), all_stations=all_stations)
+        if "speed_bin" in by_cols:
+            frame["speed_bin"] = dimension(frame, "speed_bin")
+        return getattr(frame.groupby(by, observed=True)[features], stat)().reset_index()
+
+    def exposure_days(self, station=None):
+        """Baris tabel harian paparan untuk filter musim & tanggal context."""
+        if self._exposure is None:
+            self._exposure = self.load_exposure()
+        return filter_daily(self._exposure, self.seasons, station, self.start, self.end)
+
+    def forecast_table(self):
+        """Tabel prakiraan, dimuat lewat `load_forecasts` sekali per context."""
+        if self._forecasts is None:
+            self._forecasts = self.load_forecasts()
+        return self._forecasts
+
+    def box_stats(self):
+        # Kuartil, whisker & sampel outlier dihitung dari sketch histogram di server,
+        # jadi yang dikirim ke browser hanya ringkasan per musim, bukan seluruh baris
+        if self._box_stats is None:
+            with self.tracer.span("aggregate", by="box_stats", features=self.feature,
+                                  source="rows" if self.date_filtered else "sketch"):
+                self._box_stats = self._compute_box_stats()
+        return self._box_stats
+
+    def _compute_box_stats(self):
+        if self.date_filtered:
+            # Sketch dibangun dari baris dalam rentang tanggal saja
+            rows = self.filter_data(SKETCH_GROUP_COLUMNS + [self.feature])
+            sketch = build_sketches(rows, [self.feature]).get(self.feature)
+        else:
+            sketch = self.load_sketch(self.feature)
+        if sketch is None or not len(sketch):
+            return {}
+        return box_stats(sketch, self.feature, seasons=self.seasons, station=self.station)
+
+
+def station_locations(agg):
+    lat = agg['station'].map(lambda x: STATION_COORDINATES.get(x, (None, None))[0])
+    lon = agg['station'].map(lambda x: STATION_COORDINATES.get(x, (None, None))[1])
+    return agg.assign(lat=lat, lon=lon).dropna(subset=['lat', 'lon'])
+
+
+def dominant_share(ctx, dominant_col):
+    """Proporsi polutan dominan pada baris terfilter."""
+    return ctx.filter_data([dominant_col])[dominant_col].value_counts(normalize=True)
+
+
+def _calendar_trend(ctx, by, period, x_range=None):
+    fig = px.line(
+        ctx.aggregate(by), x=by, y=ctx.feature,
+        title=f'{period} Trend of {ctx.label}', markers=True,
+        labels={by: by.capitalize(), ctx.feature: ctx.label}
+    )
+    if x_range:
+        fig.update_xaxes(range=x_range)
+    return fig
+
+
+def hourly_trend(ctx):
+    return _calendar_trend(ctx, 'hour', 'Hourly', [0, 23])
+
+
+def daily_trend(ctx):
+    return _calendar_trend(ctx, 'day', 'Daily', [1, 31])
+
+
+def monthly_trend(ctx):
+    return _calendar_trend(ctx, 'month', 'Monthly', [1, 12])
+
+
+def yearly_trend(ctx):
+    return _calendar_trend(ctx, 'year', 'Yearly')
+
+
+def station_ranking(ctx):
+    """Rata-rata fitur per stasiun, terurut dari yang tertinggi."""
+    return ctx.aggregate('station').sort_values(by=ctx.feature, ascending=False)
+
+
+def station_rank_bar(ctx):
+    fig = px.bar(
+        station_ranking(ctx), x='station', y=ctx.feature,
+        title=f'Ranking of {ctx.label} Across Stations',
+        text=ctx.feature, color=ctx.feature,
+        color_continuous_scale='Viridis'
+    )
+    fig.update_layout(
+        xaxis_title="Station",
+        yaxis_title=ctx.label,
+        xaxis={'categoryorder': 'total descending'},
+        coloraxis_colorbar=dict(title=ctx.label)
+    )
+    return fig
+
+
+def station_trend(ctx):
+    agg_trend = ctx.aggregate(['station', 'year'])
+    fig = px.line(
+        agg_trend, x='year', y=ctx.feature, color='station',
+        title=f'Trend of {ctx.label} Over Time'
+    )
+    fig.update_layout(
+        yaxis_title=ctx.label,
+        xaxis=dict(tickmode='linear', tick0=agg_trend['year'].min(), dtick=1)
+    )
+    return fig
+
+
+def seasonal_box(ctx):
+    stats = ctx.box_stats()
+    fig = go.Figure()
+    colors = px.colors.qualitative.Plotly
+    for i, season in enumerate(s for s in ctx.seasons if s in stats):
+        box = stats[season]
+        color = colors[i % len(colors)]
+        fig.add_trace(go.Box(
+            x=[season], q1=[box['q1']], median=[box['median']], q3=[box['q3']],
+            lowerfence=[box['lowerfence']], upperfence=[box['upperfence']], mean=[box['mean']],
+            name=season, legendgroup=season, marker_color=color
+        ))
+        fig.add_trace(go.Scatter(
+            x=[season] * len(box['outliers']), y=box['outliers'], mode='markers',
+            name=season, legendgroup=season, showlegend=False,
+            marker=dict(color=color, size=4), hovertemplate='%{y}<extra>outlier</extra>'
+        ))
+    fig.update_layout(
+        title=f'Seasonal Distribution of {ctx.label}',
+        xaxis_title="Season", yaxis_title=ctx.label,
+        legend_title_text='season'
+    )
+    return fig
+
+
+def seasonal_trend(ctx):
+    fig = px.line(
+        ctx.aggregate(['season', 'year']), x='year', y=ctx.feature, color='season',
+        title=f'Trend of {ctx.label} by Season'
+    )
+    fig.update_layout(yaxis_title=ctx.label, xaxis_title="Year")
+    return fig
+
+
+def seasonal_station_bar(ctx):
+    fig = px.bar(
+        ctx.aggregate(['season', 'station']), x='station', y=ctx.feature, color='season',
+        title=f'{ctx.label} by Season in Every Station'
+    )
+    fig.update_layout(yaxis_title=ctx.label, xaxis_title="Station")
+    return fig
+
+
+def _weather_lines(ctx, by):
+    agg = ctx.aggregate(by, WEATHER_FEATURES)
+    fig = go.Figure()
+    for col in WEATHER_FEATURES:
+        fig.add_trace(go.Scatter(
+            x=agg[by], y=agg[col], mode='lines+markers', name=FEATURE_NAMES.get(col)
+        ))
+    fig.update_layout(
+        title=f"Average Weather Conditions by {by.capitalize()} (TEMP, DEWP, WSPM)",
+        xaxis_title=by.capitalize(), yaxis_title="Value"
+    )
+    return fig
+
+
+def _pressure_line(ctx, by):
+    fig = px.line(
+        ctx.aggregate(by, 'PRES'), x=by, y='PRES',
+        title=f"Average Pressure by {by.capitalize()}", markers=True,
+        labels={'PRES': FEATURE_NAMES.get('PRES')}
+    )
+    fig.update_layout(xaxis_title=by.capitalize(), yaxis_title=FEATURE_NAMES.get('PRES'))
+    return fig
+
+
+def weather_by_season(ctx):
+    return _weather_lines(ctx, 'season')
+
+
+def pressure_by_season(ctx):
+    return _pressure_line(ctx, 'season')
+
+
+def weather_by_station(ctx):
+    return _weather_lines(ctx, 'station')
+
+
+def pressure_by_station(ctx):
+    return _pressure_line(ctx, 'station')
+
+
+def wind_rose(ctx):
+    """Frekuensi jam per arah × kelas kecepatan angin (cuboid "wind")."""
+    hours = ctx.aggregate(['wd', 'speed_bin'], 'WSPM', stat='count')
+    hours = hours.assign(share=hours['WSPM'] / hours['WSPM'].sum() * 100)
+    fig = go.Figure()
+    colors = px.colors.sequential.Viridis
+    for i, speed in enumerate(SPEED_BINS):
+        cell = hours[hours['speed_bin'] == speed]
+        fig.add_trace(go.Barpolar(
+            r=cell['share'], theta=cell['wd'], name=f"{speed} m/s",
+            marker_color=colors[int(i * (len(colors) - 1) / (len(SPEED_BINS) - 1))],
+            customdata=cell['WSPM'], hovertemplate='%{theta} · ' + speed + ' m/s<br>%{r:.2f}% of hours (%{customdata:,})<extra></extra>'
+        ))
+    fig.update_layout(
+        title=f'Wind Rose at {ctx.station_label}',
+        polar=dict(angularaxis=dict(direction='clockwise', rotation=90, categoryorder='array', categoryarray=WIND_DIRECTIONS),
+                   radialaxis=dict(ticksuffix='%')),
+        legend_title_text='Wind speed'
+    )
+    return fig
+
+
+def pollutant_wind_rose(ctx):
+    """Rata-rata fitur per arah (sudut) × kelas kecepatan angin (cincin)."""
+    cells = ctx.aggregate(['wd', 'speed_bin'], ctx.feature).dropna(subset=[ctx.feature])
+    ring = cells['speed_bin'].cat.codes.to_numpy()
+    fig = go.Figure(go.Barpolar(
+        theta=cells['wd'], r=np.ones(len(cells)), base=ring,
+        marker=dict(color=cells[ctx.feature], colorscale='Viridis', colorbar=dict(title=ctx.label),
+                    line=dict(width=0.5, color='white')),
+        customdata=np.column_stack([cells['speed_bin'].astype(str), cells[ctx.feature]]),
+        hovertemplate='%{theta} · %{customdata[0]} m/s<br>%{customdata[1]:.1f}<extra></extra>'
+    ))
+    fig.update_layout(
+        title=f'{ctx.label} by Wind Direction and Speed at {ctx.station_label}',
+        polar=dict(
+            angularaxis=dict(direction='clockwise', rotation=90, categoryorder='array', categoryarray=WIND_DIRECTIONS),
+            radialaxis=dict(range=[0, len(SPEED_BINS)], tickvals=np.arange(len(SPEED_BINS)) + 0.5,
+                            ticktext=[f"{b} m/s" for b in SPEED_BINS])
+        )
+    )
+    return fig
+
+
+def geo_overview(ctx):
+    fig = px.scatter_geo(
+        station_locations(ctx.aggregate('station')),
+        lat='lat', lon='lon',
+        color=ctx.feature, size=ctx.feature,
+        color_continuous_scale=AQI_COLORSCALE,
+        range_color=[0, 500],  # Ubah jika data di luar 0-500
+        size_max=15,
+        projection="natural earth",
+        hover_name='station',
+        title=f'Geographic Distribution of {ctx.label}'
+    )
+    fig.update_layout(
+        margin={"r": 0, "t": 30, "l": 0, "b": 0},
+        coloraxis_colorbar=dict(title=ctx.label)
+    )
+    return fig
+
+
+def station_map(ctx):
+    # Gunakan scatter_map untuk peta interaktif
+    fig = px.scatter_map(
+        station_locations(ctx.aggregate('station')),
+        lat="lat",
+        lon="lon",
+        color=ctx.feature,
+        size=ctx.feature,
+        color_continuous_scale=AQI_COLORSCALE,
+        range_color=[0, 500],
+        size_max=15,
+        zoom=8,
+        map_style="open-street-map",
+        hover_name="station",
+        title=f'Geographic Distribution of {ctx.label} by Station (map)'
+    )
+    fig.update_layout(
+        margin={"r": 0, "t": 30, "l": 0, "b": 0},
+        coloraxis_colorbar=dict(title=ctx.label)
+    )
+    return fig
+
+
+def idw_surface(ctx, hour=None):
+    """Permukaan IDW fitur di grid wilayah stasiun.
+
+    Tanpa `hour`: rata-rata seleksi (musim & tanggal) tiap stasiun dari cube;
+    dengan `hour`: nilai semua stasiun pada jam itu dari `ctx.load_hours`.
+    Filter stasiun tidak mengurangi titik interpolasi, hanya menandai stasiunnya.
+    """
+    grid = ctx.spatial
+    if hour is None:
+        values = grid.align(ctx.aggregate('station', all_stations=True).set_index('station')[ctx.feature])
+        when = "Mean of Selection"
+    else:
+        values = ctx.load_hours(ctx.feature).at(hour)
+        when = pd.Timestamp(hour).strftime('%Y-%m-%d %H:00')
+    aqi_scale = ctx.feature in ("AQI_True", "AQI_CN")
+    fig = go.Figure(go.Heatmap(
+        z=grid.evaluate(values).astype(np.float32), x=grid.lon, y=grid.lat,
+        colorscale=AQI_COLORSCALE if aqi_scale else 'Viridis',
+        zmin=0 if aqi_scale else None, zmax=500 if aqi_scale else None,
+        colorbar=dict(title=ctx.label), hovertemplate='%{y:.3f}, %{x:.3f}<br>%{z:.1f}<extra></extra>'
+    ))
+    measured = ~np.isnan(values)
+    selected = np.array([s == ctx.station for s in grid.stations])
+    fig.add_trace(go.Scatter(
+        x=grid.station_lon, y=grid.station_lat, mode='markers', name='Station',
+        text=grid.stations, customdata=values,
+        marker=dict(size=np.where(selected, 14, 8), color=np.where(measured, 'white', 'grey'),
+                    line=dict(width=np.where(selected, 3, 1), color='black')),
+        hovertemplate='%{text}<br>%{customdata:.1f}<extra></extra>'
+    ))
+    fig.update_layout(
+        title=f'Interpolated {ctx.label} (IDW) · {when}',
+        xaxis_title='Longitude', yaxis_title='Latitude', showlegend=False,
+        # 1° bujur lebih pendek dari 1° lintang pada lintang Beijing
+        yaxis=dict(scaleanchor='x', scaleratio=1 / np.cos(np.radians(grid.lat.mean())))
+    )
+    return fig
+
+
+def station_completeness(ctx):
+    """Persentase jam terukur (bukan hasil imputasi) per stasiun × variabel."""
+    table = ctx.completeness
+    grid = table.pivot(index="station", columns="feature", values="completeness")[table["feature"].unique()]
+    filled = table.pivot(index="station", columns="feature", values=["interpolated", "profile", "missing"])
+    fig = go.Figure(go.Heatmap(
+        z=grid.to_numpy(), x=list(grid.columns), y=list(grid.index),
+        colorscale="RdYlGn", zmin=90, zmax=100,
+        text=grid.round(1).to_numpy(), texttemplate="%{text}",
+        customdata=np.stack([filled[m][grid.columns].to_numpy() for m in ("interpolated", "profile", "missing")], -1),
+        hovertemplate=("%{y} · %{x}<br>%{z:.2f}% observed<br>%{customdata[0]} h interpolated"
+                       "<br>%{customdata[1]} h seasonal profile<br>%{customdata[2]} h missing<extra></extra>"),
+        colorbar=dict(title="% observed"),
+    ))
+    fig.update_layout(title="Data Completeness by Station (share of hours observed)",
+                      xaxis_title="Variable", yaxis_title="Station", yaxis_autorange="reversed")
+    return fig
+
+
+def exceedance_ranking(ctx, standard="US"):
+    summary = exceedance_summary(ctx.exposure_days(), standard)
+    fig = px.bar(
+        summary, x='station', y='exceedance_days', color='exceedance_share',
+        color_continuous_scale='Reds', text='exceedance_days',
+        hover_data={'days': True, 'mean_daily_aqi': ':.1f', 'exceedance_share': ':.1f'},
+        title=f'Days with Daily AQI > {EXCEEDANCE_AQI} ({STANDARD_LABELS[standard]}) by Station',
+        labels={'exceedance_days': 'Exceedance days', 'exceedance_share': '% of days',
+                'days': 'Days with data', 'mean_daily_aqi': 'Mean daily AQI'}
+    )
+    fig.update_layout(xaxis_title="Station", xaxis={'categoryorder': 'total descending'})
+    return fig
+
+
+def exceedance_calendar(ctx, standard="US"):
+    """Kalender harian (bulan × tanggal): AQI harian satu stasiun, atau jumlah stasiun yang melampaui ambang."""
+    days = ctx.exposure_days(ctx.station)
+    if ctx.station is not None:
+        values = days.set_index('date')[aqi_column(standard)]
+        color = dict(colorscale=AQI_COLORSCALE, zmin=0, zmax=500, colorbar=dict(title="Daily AQI"))
+        title = f'Daily AQI Calendar at {ctx.station} ({STANDARD_LABELS[standard]})'
+    else:
+        values = days.groupby('date')[exceed_column(standard)].sum()
+        color = dict(colorscale='Reds', zmin=0, zmax=len(ctx.dataset.stations), colorbar=dict(title="Stations"))
+        title = f'Stations with Daily AQI > {EXCEEDANCE_AQI} ({STANDARD_LABELS[standard]})'
+    dates = pd.DatetimeIndex(values.index)
+    grid = pd.DataFrame({'month': dates.strftime('%Y-%m'), 'day': dates.day, 'value': values.to_numpy()}) \
+        .pivot(index='month', columns='day', values='value')
+    fig = go.Figure(go.Heatmap(
+        z=grid.to_numpy(), x=list(grid.columns), y=list(grid.index), xgap=1, ygap=1,
+        hovertemplate='%{y}-%{x}: %{z}<extra></extra>', **color
+    ))
+    fig.update_layout(title=title, xaxis_title="Day of Month", yaxis_title="Month",
+                      yaxis_autorange="reversed", height=max(400, 14 * len(grid) + 120))
+    return fig
+
+
+def station_rolling(ctx, pollutant=None, n_points=MAX_SERIES_POINTS):
+    """Rata-rata bergerak 24 jam (PM) / 8 jam (O3, CO) stasiun terpilih beserta ambang AQI 100."""
+    pollutant = pollutant or (ctx.feature if ctx.feature in ROLLING_WINDOWS else "PM2.5")
+    times, values = rolling_series(ctx.dataset, ctx.station, pollutant)
+    lo = np.searchsorted(times, np.datetime64(ctx.start, "ns")) if ctx.start is not None else 0
+    hi = np.searchsorted(times, np.datetime64(ctx.end, "ns")) if ctx.end is not None else len(times)
+    x, y = downsample(times[lo:hi], values[lo:hi], n_points, "lttb")
+    window = ROLLING_WINDOWS[pollutant]
+    label = f"{window}-hour mean {FEATURE_NAMES.get(pollutant, pollutant)}"
+    fig = px.line(
+        pd.DataFrame({'datetime': x, pollutant: y}), x='datetime', y=pollutant,
+        title=f"{window}-Hour Rolling {pollutant} at {ctx.station_label}",
+        labels={'datetime': 'Time', pollutant: label}
+    )
+    for standard, dash in zip(STANDARD_LABELS, ("dash", "dot")):
+        fig.add_hline(y=threshold(pollutant, standard), line_dash=dash, line_color="red",
+                      annotation_text=f"AQI {EXCEEDANCE_AQI} ({STANDARD_LABELS[standard]})")
+    return fig
+
+
+# Jam observasi terakhir yang ditampilkan sebelum prakiraan
+FORECAST_CONTEXT_HOURS = 72
+
+
+def forecast_overview(ctx, target="AQI_True", model_version=None):
+    """Prakiraan per jam 24 jam ke depan semua stasiun (stasiun × jam).
+
+    `model_version` hanya membedakan kunci cache figure antar versi model.
+    """
+    forecasts = ctx.forecast_table()
+    table = forecasts[forecasts['target'] == target]
+    grid = table.pivot(index='station', columns='horizon', values='prediction')
+    aqi_scale = target == 'AQI_True'
+    fig = go.Figure(go.Heatmap(
+        z=grid.to_numpy(), x=[f"+{h}h" for h in grid.columns], y=list(grid.index),
+        colorscale=AQI_COLORSCALE if aqi_scale else 'Viridis',
+        zmin=0 if aqi_scale else None, zmax=500 if aqi_scale else None,
+        colorbar=dict(title=target), hovertemplate='%{y} · %{x}<br>%{z:.1f}<extra></extra>'
+    ))
+    origin = pd.Timestamp(table['origin'].max())
+    fig.update_layout(
+        title=f"Next 24 Hours {FEATURE_NAMES.get(target, target)} Forecast (from {origin:%Y-%m-%d %H:00})",
+        xaxis_title="Hours Ahead", yaxis_title="Station", yaxis_autorange="reversed"
+    )
+    return fig
+
+
+def forecast_series(ctx, target="AQI_True", model_version=None):
+    """Observasi 72 jam terakhir & prakiraan 24 jam stasiun terpilih dengan pita ± MAE holdout."""
+    forecasts = ctx.forecast_table()
+    table = forecasts[(forecasts['target'] == target) & (forecasts['station'] == ctx.station)]
+    fig = go.Figure()
+    if not len(table):
+        fig.update_layout(title=f"No Forecast Model for {ctx.station_label}")
+        return fig
+    origin = pd.Timestamp(table['origin'].iloc[0])
+    history = ctx.filter_data(['datetime', target], by_season=False,
+                              start=origin - pd.Timedelta(hours=FORECAST_CONTEXT_HOURS),
+                              end=origin + pd.Timedelta(hours=1))
+    fig.add_trace(go.Scatter(
+        x=pd.concat([table['datetime'], table['datetime'][::-1]]),
+        y=np.concatenate([table['prediction'] + table['mae'], (table['prediction'] - table['mae']).clip(lower=0)[::-1]]),
+        fill='toself', fillcolor='rgba(255,127,14,0.2)', line=dict(width=0), name='± holdout MAE', hoverinfo='skip'
+    ))
+    fig.add_trace(go.Scatter(x=history['datetime'], y=history[target], mode='lines', name='Observed'))
+    fig.add_trace(go.Scatter(x=table['datetime'], y=table['prediction'], mode='lines+markers', name='Forecast',
+                             line=dict(dash='dash', color='#ff7f0e')))
+    fig.update_layout(
+        title=f"{FEATURE_NAMES.get(target, target)} Forecast at {ctx.station_label}",
+        xaxis_title="Time", yaxis_title=target
+    )
+    return fig
+
+
+def station_series(ctx, start=None, end=None, n_points=MAX_SERIES_POINTS, method="lttb"):
+    # Ambil rentang waktu yang terlihat lewat indeks (sudah terurut), lalu downsample di sisi server
+    # Seperti sebelumnya, time series stasiun tidak difilter per musim
+    series = ctx.filter_data(['datetime', ctx.feature], by_season=False, start=start, end=end)
+    x, y = downsample(series['datetime'].to_numpy(), series[ctx.feature].to_numpy(), n_points, method)
+    fig = px.line(
+        pd.DataFrame({'datetime': x, ctx.feature: y}), x='datetime', y=ctx.feature,
+        title=f"{ctx.label} Over Time at {ctx.station_label}",
+        markers=len(x) <= 300,
+        labels={'datetime': 'Time', ctx.feature: ctx.label}
+    )
+    fig.update_layout(annotations=[dict(
+        text=f"{len(x):,} dari {len(series):,} titik ditampilkan ({DOWNSAMPLE_LABELS[method]})",
+        xref="paper", yref="paper", x=1, y=1.08, showarrow=False, font=dict(size=11)
+    )])
+    return fig
+
+
+def station_series_preview(ctx):
+    return station_series(ctx, n_points=MAX_SERIES_POINTS // 2)
+
+
+# Semua chart yang bisa dibangun hanya dari context (id -> fungsi)
+CHARTS = {
+    "hourly_trend": hourly_trend,
+    "daily_trend": daily_trend,
+    "monthly_trend": monthly_trend,
+    "yearly_trend": yearly_trend,
+    "station_rank_bar": station_rank_bar,
+    "station_trend": station_trend,
+    "seasonal_box": seasonal_box,
+    "seasonal_trend": seasonal_trend,
+    "seasonal_station_bar": seasonal_station_bar,
+    "weather_by_season": weather_by_season,
+    "pressure_by_season": pressure_by_season,
+    "weather_by_station": weather_by_station,
+    "pressure_by_station": pressure_by_station,
+    "wind_rose": wind_rose,
+    "pollutant_wind_rose": pollutant_wind_rose,
+    "geo_overview": geo_overview,
+    "station_map": station_map,
+    "idw_surface": idw_surface,
+    "station_completeness": station_completeness,
+    "exceedance_ranking": exceedance_ranking,
+    "exceedance_calendar": exceedance_calendar,
+    "station_rolling": station_rolling,
+    "forecast_overview": forecast_overview,
+    "forecast_series": forecast_series,
+    "station_series": station_series,
+    "station_series_preview": station_series_preview,
+}
+
+# Chart per view dashboard (urutan tampil). Overview memakai satu chart dari tiap
+# view lain.
+VIEW_CHARTS = {
+    "overview": ["monthly_trend", "station_rank_bar", "seasonal_box", "weather_by_season",
+                 "geo_overview", "station_series_preview"],
+    "trends": ["hourly_trend", "daily_trend", "monthly_trend", "yearly_trend"],
+    "station_rankings": ["station_rank_bar", "station_trend", "station_completeness"],
+    "seasonal_patterns": ["seasonal_box", "seasonal_trend", "seasonal_station_bar"],
+    "weather_impact": ["weather_by_season", "pressure_by_season", "weather_by_station", "pressure_by_station",
+                       "wind_rose", "pollutant_wind_rose"],
+    "geographic_distribution": ["station_map", "idw_surface"],
+    "station_details": ["station_series"],
+    "exposure": ["exceedance_ranking", "exceedance_calendar", "station_rolling"],
+    "forecast": ["forecast_overview", "forecast_series"],
+}
+
+# Chart yang hanya ada jika satu stasiun dipilih, dan chart yang butuh artefak
+# opsional pada context (atribut yang harus terisi)
+STATION_CHARTS = {"station_series", "station_series_preview", "station_rolling", "forecast_series"}
+OPTIONAL_CHARTS = {
+    "station_completeness": "completeness",
+    "exceedance_ranking": "load_exposure",
+    "exceedance_calendar": "load_exposure",
+    "idw_surface": "spatial",
+    "forecast_overview": "load_forecasts",
+    "forecast_series": "load_forecasts",
+}
+
+
+def view_charts(view, ctx):
+    """Id chart yang tampil di `view` untuk filter pada context."""
+    charts = [c for c in VIEW_CHARTS[view] if ctx.station is not None or c not in STATION_CHARTS]
+    return [c for c in charts if c not in OPTIONAL_CHARTS or getattr(ctx, OPTIONAL_CHARTS[c]) is not None]
+
+
+def build_view(view, ctx):
+    """Figure semua chart `view` (agregat bersama dihitung sekali lewat context)."""
+    return {c: CHARTS[c](ctx) for c in view_charts(view, ctx)}